@@ -1,3 +1,15 @@
 from abaqus_python_interface.abaqus_interface import ABQInterface
+from abaqus_python_interface.abaqus_interface import FieldRequest
+from abaqus_python_interface.abaqus_interface import MapResult
 from abaqus_python_interface.abaqus_interface import OdbReadingError
 from abaqus_python_interface.abaqus_interface import OdbWritingError
+from abaqus_python_interface.abaqus_interface import OdbWriteTransaction
+from abaqus_python_interface.async_interface import AsyncABQInterface
+from abaqus_python_interface.job_scheduler import Job
+from abaqus_python_interface.job_scheduler import JobScheduler
+from abaqus_python_interface.launcher import AbaqusLauncher
+from abaqus_python_interface.launcher import AbaqusLaunchError
+from abaqus_python_interface.mesh import Mesh
+from abaqus_python_interface.mesh_store import OdbGeometry
+from abaqus_python_interface.session import AbaqusSessionError
+from abaqus_python_interface.stats import CallStats
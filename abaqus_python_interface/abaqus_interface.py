@@ -1,28 +1,43 @@
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
+import copy
 import os
 import pickle
 import pathlib
-import subprocess
+import shlex
+import tempfile
+import threading
 import time
 
 import numpy as np
-from abaqus_python_interface.common import TemporaryDirectory
+from abaqus_python_interface.common import TemporaryDirectory, abaqus_python_directory
+from abaqus_python_interface.mesh import Mesh
+from abaqus_python_interface.in_process import InProcessBackend, odb_access_available
+from abaqus_python_interface.launcher import AbaqusLauncher
+from abaqus_python_interface.mesh_store import OdbGeometry
+from abaqus_python_interface.session import AbaqusSession
+from abaqus_python_interface.stats import CallStats, InterfaceStats
+from abaqus_python_interface.odb_cache import OdbMetadataCache, odb_stamp
+from abaqus_python_interface.odb_requests import (OdbReadingError, OdbWritingError, check_field, check_odb_file,
+                                                  field_parameters, field_results, path_parameters, resolve_frame,
+                                                  resolve_set, write_parameters)
+from abaqus_python_interface.operator_cache import OperatorCache, operator_key
+from abaqus_python_interface.path_engine import interpolation_operator, locate_points
+from abaqus_python_interface import mesh_store
+from abaqus_python_interface import transport
 
 
-abaqus_python_directory = pathlib.Path(__file__).parents[1].absolute() / "abaqus_python_scripts"
-
 CoordinateSystem = namedtuple('CoordinateSystem', ['name', 'origin', 'point1', 'point2', 'system_type'])
 cylindrical_system_z = CoordinateSystem(name='cylindrical', origin=(0., 0., 0.), point1=(1., 0., 0.),
                                         point2=(0., 1., 0.), system_type='CYLINDRICAL')
 
+FieldRequest = namedtuple('FieldRequest', ['field_id', 'step_name', 'frame_number', 'set_name', 'instance_name',
+                                           'position', 'invariant', 'coordinate_system', 'deform_system'],
+                          defaults=(None, -1, '', '', 'INTEGRATION_POINT', None, None, True))
 
-class OdbReadingError(KeyError):
-    pass
-
-
-class OdbWritingError(ValueError):
-    pass
+MapResult = namedtuple('MapResult', ['odb_file_name', 'result', 'error'])
 
 
 class OdbInstance:
@@ -44,70 +59,506 @@ class OdbInstance:
             self.data['elements'][element_type] = element_data.tolist()
 
 
-def check_odb_file(odb_file_name, exists=True):
-    odb_path = pathlib.Path(odb_file_name).absolute().expanduser()
-    if not odb_path.is_file() and exists:
-        raise OdbReadingError("The odb file " + str(odb_file_name) + " does not exist")
-    return odb_path
+def _field_info(field_id, field_data, position, field_description, invariants):
+    field_type, suffixes = {1: ('SCALAR', []), 3: ('VECTOR', ['1', '2', '3']),
+                            6: ('TENSOR_3D_FULL', ['11', '22', '33', '12', '13', '23'])}[
+        1 if len(field_data.shape) == 1 else field_data.shape[1]]
+    return {
+        "type": field_type,
+        "description": field_description,
+        "positions": [position],
+        "component_labels": [field_id + suffix for suffix in suffixes],
+        "valid_invariants": list(invariants or [])
+    }
+
+
+def _metadata_with_field(metadata, step_name, frame_number, frame_value, field_id, field_info):
+    """
+    Patches the cached metadata of an odb, see OdbMetadataCache.patch, after a field is written by write_field_to_odb.
+    A field_id of None only creates the frame
+    """
+    summary = metadata.get('summary', None)
+    odb_dict = metadata.get('odb_dict', None)
+    if summary is not None:
+        frame_count = summary["steps"].get(step_name, {}).get("frame_count", 0)
+    elif odb_dict is not None:
+        frame_count = len(odb_dict["steps"].get(step_name, {}))
+    else:
+        return {}
+    new_frame = frame_number is None or frame_count == 0 or frame_count <= frame_number
+    frame_index = frame_count if new_frame else frame_number % frame_count
+    # Writing fields does not change the mesh so the mesh store is still valid
+    patched_metadata = {key: value for key, value in metadata.items()
+                        if isinstance(key, tuple) or key == 'mesh_store'}
+
+    if odb_dict is not None:
+        frames = odb_dict["steps"].setdefault(step_name, OrderedDict())
+        if new_frame:
+            frames[frame_index] = {'fieldOutputs': []}
+        if field_id is not None and field_id not in frames[frame_index]['fieldOutputs']:
+            frames[frame_index]['fieldOutputs'].append(field_id)
+        patched_metadata['odb_dict'] = odb_dict
+
+    if summary is not None:
+        step = summary["steps"].setdefault(step_name, {"frame_count": 0, "frame_values": []})
+        if new_frame:
+            if frame_value is None:
+                frame_value = step["frame_values"][-1] + 1. if step["frame_values"] else 0.
+            step["frame_values"].append(frame_value)
+            step["frame_count"] += 1
+        patched_metadata['summary'] = summary
+
+    frame_key = ('fields', step_name, frame_index)
+    if new_frame:
+        patched_metadata[frame_key] = {field_id: field_info} if field_id is not None else {}
+    elif field_id is not None and frame_key in patched_metadata:
+        frame_fields = patched_metadata[frame_key]
+        if field_id not in frame_fields:
+            frame_fields[field_id] = field_info
+        elif field_info["positions"][0] not in frame_fields[field_id]["positions"]:
+            frame_fields[field_id]["positions"].append(field_info["positions"][0])
+    return patched_metadata
+
+
+def _metadata_with_step(metadata, step_name):
+    """
+    Patches the cached metadata of an odb, see OdbMetadataCache.patch, after a step is created
+    """
+    if 'odb_dict' in metadata:
+        metadata['odb_dict']["steps"].setdefault(step_name, OrderedDict())
+    if 'summary' in metadata:
+        metadata['summary']["steps"].setdefault(step_name, {"frame_count": 0, "frame_values": []})
+    return metadata
+
+
+def _metadata_with_set(metadata, set_name, set_type, instance_name):
+    """
+    Patches the cached metadata of an odb, see OdbMetadataCache.patch, after a set is created by add_set.py
+    """
+    set_key = "nodeSets" if set_type == "node" else "elementSets"
+    # The mesh store lacks the new set and is exported again
+    metadata.pop('mesh_store', None)
+    for key in ['odb_dict', 'summary']:
+        if key in metadata:
+            if instance_name is not None:
+                sets = metadata[key]["rootAssembly"]["instances"][instance_name][set_key]
+            else:
+                sets = metadata[key]["rootAssembly"][set_key]
+            if set_name not in sets:
+                sets.append(set_name)
+    return metadata
+
+
+def _check_set_instance(odb_summary, odb_file_name, instance_name):
+    if instance_name is not None:
+        if not instance_name in odb_summary["rootAssembly"]["instances"]:
+            raise OdbReadingError("The instance", instance_name, "is not present in the odb file", odb_file_name)
+    else:
+        if len(odb_summary["rootAssembly"]["instances"]) > 1:
+            raise OdbReadingError("The odb file", odb_file_name, "consist of several instances, please specity an "
+                                                                 "instance")
+
+
+class OdbWriteTransaction:
+    """
+    Write operations on an odb file that are queued and then committed in one abaqus launch where the odb is opened
+    and saved once, see ABQInterface.write_transaction. The operations are validated when they are queued, taking the
+    steps, frames and sets created earlier in the transaction into account. If an operation fails in abaqus, the odb
+    is closed without saving and none of the operations of the commit are applied.
+    """
+    def __init__(self, abq_interface, odb_file_name):
+        self.abq_interface = abq_interface
+        self.odb_file_name = check_odb_file(odb_file_name)
+        self.operations = []
+        self.metadata_updates = []
+        self.metadata = {'summary': copy.deepcopy(abq_interface.get_odb_summary(self.odb_file_name))}
+
+    def _queue(self, operation, metadata_update):
+        self.metadata = metadata_update(self.metadata)
+        self.operations.append(operation)
+        self.metadata_updates.append(metadata_update)
+
+    def _frame_count(self, step_name):
+        return self.metadata['summary']["steps"].get(step_name, {"frame_count": 0})["frame_count"]
+
+    def create_step(self, step_name, step_description=''):
+        self._queue({'operation': 'create_step', 'step_name': step_name, 'step_description': step_description},
+                    lambda metadata: _metadata_with_step(metadata, step_name))
+
+    def create_frame(self, step_name, frame_value=None, frame_description='', step_description=''):
+        """
+        Creates a new frame last in a step, the step is created if it does not exist
+
+        :return:    The frame number of the new frame
+        """
+        self._queue({'operation': 'create_frame', 'step_name': step_name, 'step_description': step_description,
+                     'frame_value': frame_value, 'frame_description': frame_description},
+                    lambda metadata: _metadata_with_field(metadata, step_name, None, frame_value, None, None))
+        return self._frame_count(step_name) - 1
+
+    def write_field(self, field_data, field_id, step_name, instance_name='', set_name='', step_description='',
+                    frame_number=None, frame_value=None, field_description='', position='INTEGRATION_POINT',
+                    invariants=None, labels=None):
+        """
+        Writes a field, see ABQInterface.write_data_to_odb for the arguments
+
+        :return:    The frame number of the frame the field is written to
+        """
+        instance_name, set_name = resolve_set(self.metadata['summary'], self.odb_file_name, instance_name, set_name,
+                                              position)
+        parameters = write_parameters(field_data, field_id, self.odb_file_name, step_name, instance_name, set_name,
+                                      step_description, frame_number, frame_value, field_description, position,
+                                      invariants, labels)
+        parameters['operation'] = 'write_field'
+        field_info = _field_info(field_id, parameters['field_data'], position, field_description,
+                                 parameters['invariants'])
+        frame_count = self._frame_count(step_name)
+        self._queue(parameters, lambda metadata: _metadata_with_field(metadata, step_name, frame_number, frame_value,
+                                                                      field_id, field_info))
+        if self._frame_count(step_name) > frame_count:
+            return frame_count
+        return frame_number % frame_count
+
+    def add_element_set(self, element_set_name, element_labels, instance_name=None):
+        self._add_set(element_set_name, element_labels, instance_name, "element")
+
+    def add_node_set(self, node_set_name, node_labels, instance_name=None):
+        self._add_set(node_set_name, node_labels, instance_name, "node")
+
+    def _add_set(self, set_name, labels, instance_name, set_type):
+        _check_set_instance(self.metadata['summary'], self.odb_file_name, instance_name)
+        self._queue({'operation': 'add_set', 'set_name': set_name, 'set_type': set_type, 'instance_name': instance_name,
+                     'labels': np.asarray(labels, dtype=int).tolist()},
+                    lambda metadata: _metadata_with_set(metadata, set_name, set_type, instance_name))
+
+    def commit(self):
+        """
+        Applies the queued operations to the odb, the queue is emptied also if the commit fails
+        """
+        operations, self.operations = self.operations, []
+        metadata_updates, self.metadata_updates = self.metadata_updates, []
+        if not operations:
+            return
+        abq = self.abq_interface
+        stamp = odb_stamp(self.odb_file_name)
+        if abq.in_process is not None:
+            return_dict = abq._call_in_process('write_transaction', 'apply_operations', self.odb_file_name, operations)
+        else:
+            with TemporaryDirectory(self.odb_file_name) as work_directory:
+                pickle_filename = work_directory / 'write_transaction.pkl'
+                transport.dump({'odb_file': str(self.odb_file_name), 'operations': operations}, pickle_filename)
+                return_dict = abq._run_script('write_transaction.py', pickle_filename, results=pickle_filename)
+        if "ERROR" in return_dict:
+            abq.metadata_cache.invalidate(self.odb_file_name)
+            raise OdbWritingError(" ".join(return_dict["ERROR"]))
+
+        def update(metadata):
+            for metadata_update in metadata_updates:
+                metadata = metadata_update(metadata)
+            return metadata
+        abq.metadata_cache.patch(self.odb_file_name, stamp, update)
+
+
+class ScriptRun:
+    """
+    A script run prepared by ABQInterface._script_run
+
+    command:        The arguments to abaqus for running the script, under profile_script.py when profiling
+    environment:    Variables added to the environment of the script, the files for the timings and the profile
+    data:           The results loaded after the script has finished, None if no results are expected
+    """
+    def __init__(self, command, environment):
+        self.command = command
+        self.environment = environment
+        self.data = None
 
 
 class ABQInterface:
-    def __init__(self, abq_command, shell=None, output=True):
+    def __init__(self, abq_command, shell=None, output=True, cache_directory=None, use_mesh_store=False,
+                 stats_callback=None, profile_directory=None, backend='subprocess', environment_shell='interactive',
+                 timeout=None):
+        """
+        :param abq_command:     The command for launching abaqus, like abq2018
+        :param shell:           Shell used for resolving the abaqus command and its environment, default is /bin/bash.
+                                The shell is started once per process, abaqus is then executed directly
+        :param output:          Flag if the output from abaqus should be shown
+        :param cache_directory: Directory for the persistent cache of odb metadata and interpolation operators.
+                                Default is None which uses ABAQUS_PYTHON_INTERFACE_CACHE or
+                                ~/.cache/abaqus_python_interface, False disables the persistent cache
+        :param use_mesh_store:  Flag if get_mesh and get_element_data are answered from the mesh store, see
+                                get_odb_geometry, instead of launching abaqus for every call
+        :param stats_callback:  Optional function called with a CallStats after every script run, the CallStats are
+                                also collected in self.stats
+        :param profile_directory:   Optional: Directory where the scripts are run under cProfile, one .prof file per
+                                    script run, for inspection with pstats or snakeviz. Default is None which runs the
+                                    scripts without profiling
+        :param backend:         How the abaqus python scripts are run. 'subprocess' launches abaqus, or uses the session
+                                if one is started. 'in_process' runs the scripts in this python process and reads and
+                                writes fields, sets and meshes without any files, which requires that the interface
+                                itself runs in abaqus python. 'auto' selects 'in_process' if odbAccess can be imported
+                                and 'subprocess' otherwise. Scripts that need "abaqus viewer" are always launched
+        :param environment_shell:   How the abaqus command and its environment are resolved, see AbaqusLauncher.
+                                    'interactive' reads the same rc files as a terminal, 'login' uses a login shell and
+                                    None takes the environment of this process
+        :param timeout:         Max time in seconds for every abaqus python script launched, default is None which
+                                waits until the script is done. AbaqusLaunchError is raised at the timeout
+        """
         self.abq = abq_command
         if shell is None:
             shell = '/bin/bash'
         # ToDo: Update shell command for windows systems
         self.shell_command = shell
+        self.launcher = AbaqusLauncher(abq_command, shell, environment_shell)
+        self.timeout = timeout
         self.output = output
-        self.cached_odb_dicts = {}
-
-    def run_command(self, command_string, directory=None):
-        current_directory = os.getcwd()
-        if directory is not None:
-            os.chdir(directory)
-        stdout = None
-        stderr = None
-        if self.output is False:
-            stdout = open(os.devnull, 'w')
-
-        job = subprocess.run([self.shell_command, '-ic', "cd " + str(directory) + " && " +  command_string + " && "
-                              + "exit"],
-                               stderr=stderr, stdout=stdout)
-        os.chdir(current_directory)
-
-    def run_abaqus_inp(self, input_file, cpus=1, user_material=None, ask_delete=True):
+        self.metadata_cache = OdbMetadataCache(cache_directory)
+        if self.metadata_cache.cache_directory is not None:
+            self.operator_cache = OperatorCache(self.metadata_cache.cache_directory / 'operators')
+        else:
+            self.operator_cache = OperatorCache(False)
+        self.use_mesh_store = use_mesh_store
+        # Geometries of the odbs used last, the least recently used ones are dropped beyond max_geometries
+        self.geometries = OrderedDict()
+        self.max_geometries = 8
+        self.stats = InterfaceStats()
+        self.stats_callback = stats_callback
+        self.profile_directory = pathlib.Path(profile_directory) if profile_directory is not None else None
+        if backend == 'auto':
+            backend = 'in_process' if odb_access_available() else 'subprocess'
+        if backend not in ('subprocess', 'in_process'):
+            raise ValueError("Unknown backend " + str(backend) + ", use 'subprocess', 'in_process' or 'auto'")
+        self.backend = backend
+        self.in_process = InProcessBackend() if backend == 'in_process' else None
+        self.abaqus_session = None
+        self.session_lock = threading.Lock()
+
+    def start_session(self, startup_timeout=None):
+        """
+        Starts a persistent abaqus process which runs all scripts launched with "abaqus python" until stop_session is
+        called. Odb files opened for reading are kept open between the calls. Scripts that need "abaqus viewer" are
+        still launched in separate processes.
+
+        :param startup_timeout:     Max time in seconds to wait for abaqus to start, default is None which waits until
+                                    abaqus is started, for instance when queueing for a license
+        """
+        with self.session_lock:
+            if self.abaqus_session is None:
+                self.abaqus_session = AbaqusSession(self.launcher, self.output, startup_timeout)
+            abaqus_session = self.abaqus_session
+        abaqus_session.start()
+
+    def stop_session(self):
+        with self.session_lock:
+            abaqus_session, self.abaqus_session = self.abaqus_session, None
+        if abaqus_session is not None:
+            abaqus_session.stop()
+
+    @contextmanager
+    def session(self, startup_timeout=None):
+        self.start_session(startup_timeout)
+        try:
+            yield self
+        finally:
+            self.stop_session()
+
+    def _clone(self):
+        cache_directory = self.metadata_cache.cache_directory
+        abq = ABQInterface(self.abq, self.shell_command, self.output,
+                           cache_directory=cache_directory if cache_directory is not None else False,
+                           use_mesh_store=self.use_mesh_store, backend=self.backend,
+                           environment_shell=self.launcher.environment_shell, timeout=self.timeout)
+        abq.operator_cache = self.operator_cache
+        abq.stats = self.stats
+        abq.stats_callback = self.stats_callback
+        abq.profile_directory = self.profile_directory
+        return abq
+
+    def map(self, odb_files, operation, max_workers=4, session=False):
+        """
+        Applies an operation to many odb files with up to max_workers abaqus processes running at the same time
+
+        :param odb_files:       Sequence of odb file names
+        :param operation:       Function operation(abq, odb_file_name) called for each odb file where abq is an
+                                ABQInterface owned by the worker thread, for instance
+                                lambda abq, odb: abq.read_data_from_odb('S', odb)
+        :param max_workers:     Max number of concurrent abaqus processes, for instance the number of available
+                                license tokens
+        :param session:         Flag if each worker should run its operations in a persistent abaqus session, see
+                                start_session
+        :return:                A list of MapResult(odb_file_name, result, error) in the order of odb_files. If the
+                                operation raised an exception for an odb file, result is None and error the exception,
+                                the remaining odb files are still processed
+        """
+        if not isinstance(max_workers, int) or max_workers < 1:
+            raise ValueError("max_workers must be an integer > 0")
+        odb_files = [pathlib.Path(odb_file_name).absolute().expanduser() for odb_file_name in odb_files]
+        workers = threading.local()
+        interfaces = []
+        interfaces_lock = threading.Lock()
+
+        def worker_interface():
+            abq = getattr(workers, 'abq', None)
+            if abq is None:
+                abq = workers.abq = self._clone()
+                with interfaces_lock:
+                    interfaces.append(abq)
+                if session:
+                    abq.start_session()
+            return abq
+
+        def apply(odb_file_name):
+            try:
+                return MapResult(odb_file_name, operation(worker_interface(), odb_file_name), None)
+            except Exception as error:
+                return MapResult(odb_file_name, None, error)
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                return list(executor.map(apply, odb_files))
+        finally:
+            for abq in interfaces:
+                abq.stop_session()
+
+    def run_command(self, command, directory=None, environment=None, timeout=None):
+        """
+        Runs abaqus, see AbaqusLauncher.run
+
+        :param command:     The arguments to abaqus as a list, like ['python', 'script.py'], or as a string split
+                            into words like a shell would. A string starting with the abaqus command is also accepted
+        :param directory:   Working directory of abaqus
+        :param environment: Variables added to the environment of abaqus
+        :param timeout:     Max time in seconds, default is self.timeout
+        """
+        if isinstance(command, str):
+            if command.startswith(self.abq + ' '):
+                command = command[len(self.abq):]
+            command = shlex.split(command)
+        # The working directory is given to the subprocess as os.chdir would affect all threads
+        return self.launcher.run(command, directory, environment, self.output,
+                                 timeout if timeout is not None else self.timeout)
+
+    def _script_command(self, script_name, arguments, viewer=False):
+        if viewer:
+            return ['viewer', 'noGUI=' + script_name, '--'] + list(arguments)
+        return ['python', script_name] + list(arguments)
+
+    @contextmanager
+    def _script_run(self, script_name, arguments, viewer=False, session=False, results=None):
+        """
+        Prepares the run of a script in abaqus_python_scripts and records its timings in self.stats when the context
+        is left without an error, used by _run_script and AsyncABQInterface. Yields a ScriptRun, the script must be
+        run with its environment, and its command if abaqus is launched
+
+        :param results: Optional: Name of the results pickle written by the script, which is loaded with
+                        transport.load into the data of the ScriptRun
+        """
+        timings_file, timings_file_name = tempfile.mkstemp(prefix='abaqus_timings_', suffix='.pkl')
+        os.close(timings_file)
+        environment = {'ABAQUS_PYTHON_INTERFACE_TIMINGS': timings_file_name}
+        profile_file_name = None
+        if self.profile_directory is not None:
+            self.profile_directory.mkdir(parents=True, exist_ok=True)
+            profile_file, profile_file_name = tempfile.mkstemp(prefix=pathlib.Path(script_name).stem + '_',
+                                                               suffix='.prof', dir=self.profile_directory)
+            os.close(profile_file)
+            environment['ABAQUS_PYTHON_INTERFACE_PROFILE'] = profile_file_name
+            command = self._script_command('profile_script.py', [script_name] + list(arguments), viewer)
+        else:
+            command = self._script_command(script_name, arguments, viewer)
+        run = ScriptRun(command, environment)
+        start_time = time.time()
+        try:
+            yield run
+            record = CallStats(script_name, session, start_time, time.time() - start_time)
+            try:
+                with open(timings_file_name, 'rb') as timings_pickle:
+                    timings = pickle.load(timings_pickle, encoding='latin1')
+                record.script_time = timings['script_time']
+                record.phases = timings['phases']
+            except (OSError, EOFError, pickle.UnpicklingError):
+                pass
+        finally:
+            os.remove(timings_file_name)
+            if profile_file_name is not None and os.path.getsize(profile_file_name) == 0:
+                os.remove(profile_file_name)
+                profile_file_name = None
+        record.profile_file = profile_file_name
+        if results is not None:
+            load_start_time = time.time()
+            run.data = transport.load(results)
+            record.deserialize_time = time.time() - load_start_time
+            record.payload_bytes = transport.file_size(results)
+        self.stats.add(record)
+        if self.stats_callback is not None:
+            self.stats_callback(record)
+
+    def _run_script(self, script_name, *arguments, viewer=False, results=None):
+        """
+        Runs a script in abaqus_python_scripts and records its timings in self.stats. The script is run under
+        cProfile if self.profile_directory is set
+
+        :param results: Optional: Name of the results pickle written by the script, which is loaded with
+                        transport.load and returned
+        """
+        arguments = [str(argument) for argument in arguments]
+        abaqus_session = self.abaqus_session
+        with self._script_run(script_name, arguments, viewer, abaqus_session is not None and not viewer,
+                              results) as run:
+            if self.in_process is not None and not viewer:
+                self.in_process.run_script(script_name, arguments, run.environment)
+            elif abaqus_session is not None and not viewer:
+                abaqus_session.run_script(script_name, arguments, run.environment)
+            else:
+                self.run_command(run.command, directory=abaqus_python_directory, environment=run.environment)
+        return run.data
+
+    def _call_in_process(self, module_name, function_name, *arguments):
+        """
+        Calls a function in abaqus_python_scripts with the in-process backend and records its timings in self.stats
+        like _run_script
+        """
+        start_time = time.time()
+        result, script_time, phases = self.in_process.call(module_name, function_name, *arguments)
+        record = CallStats(module_name + '.' + function_name, False, start_time, time.time() - start_time,
+                           script_time, phases)
+        self.stats.add(record)
+        if self.stats_callback is not None:
+            self.stats_callback(record)
+        return result
+
+    def _inp_command(self, input_file, cpus=1, user_material=None, ask_delete=True):
         input_file = pathlib.Path(input_file)
         if not input_file.is_file():
             raise ValueError("input file "  + str(input_file) + " does not exist!")
-        run_directory = input_file.parent
-        current_directory = os.getcwd()
-        os.chdir(run_directory)
-        stdout = None
-        stderr = None
-        if self.output is False:
-            stdout = open(os.devnull, 'w')
-            stderr = subprocess.STDOUT
-        run_str = self.abq + " j=" + input_file.stem
+        arguments = ["j=" + input_file.stem]
         if cpus != 1:
             if not isinstance(cpus, int) or cpus < 1:
                 raise ValueError("cpus must be an integer > 0")
-            run_str += " cpus=" + str(cpus)
+            arguments.append("cpus=" + str(cpus))
         if user_material:
-            run_str += " user=" + str(user_material)
+            arguments.append("user=" + str(user_material))
         if not ask_delete:
-            run_str += " ask_delete=OFF"
-        run_str += " interactive"
-        job = subprocess.run([self.shell_command, '-ic',  run_str +  " && " + "exit"],
-                             stderr=stderr, stdout=stdout)
-        os.chdir(current_directory)
+            arguments.append("ask_delete=OFF")
+        arguments.append("interactive")
+        return arguments
+
+    def run_abaqus_inp(self, input_file, cpus=1, user_material=None, ask_delete=True, timeout=None):
+        """
+        Runs an abaqus job in the directory of the input file and waits until it is done
+
+        :param timeout: Max time in seconds for the job, default is None which waits until the job is done. The job
+                        is killed and AbaqusLaunchError is raised at the timeout
+        """
+        arguments = self._inp_command(input_file, cpus, user_material, ask_delete)
+        self.launcher.run(arguments, pathlib.Path(input_file).parent, output=self.output, timeout=timeout)
 
     def read_data_history_for_element(self, field_id, odb_file_name, instance_name=None, element_labels=None,
                                       node_labels=None, element_set_names=None, node_set_names=None,
                                       variable_position="INTEGRATION_POINT", output_position="INTEGRATION_POINT",
                                       component=None, invariant=None):
         odb_file_name = check_odb_file(odb_file_name)
-        odb_dict = self.get_odb_as_dict(odb_file_name)
-        instances = odb_dict["rootAssembly"]["instances"]
+        odb_summary = self.get_odb_summary(odb_file_name)
+        instances = odb_summary["rootAssembly"]["instances"]
         if instance_name is None:
             if len(instances) == 1:
                 instance_name = next(iter(instances))
@@ -147,45 +598,157 @@ class ABQInterface:
             with open(parameter_pickle_name, 'wb') as pickle_file:
                 pickle.dump(parameter_dict, pickle_file, protocol=2)
 
-            self.run_command(self.abq + ' viewer noGUI=read_history_data.py -- ' + str(parameter_pickle_name)
-                             + " " + str(data_filename), directory=abaqus_python_directory)
-            with open(data_filename, "rb") as data_pickle:
-                data = pickle.load(data_pickle, encoding="latin1")
+            data = self._run_script('read_history_data.py', parameter_pickle_name, data_filename, viewer=True,
+                                    results=data_filename)
         return data
 
+    def read_history_output(self, odb_file_name, output_names=None, region_names=None, step_names=None):
+        """
+        Reads history outputs from the history regions of the steps with abaqus python, without the viewer
+
+        :param odb_file_name:   Name of the odb file
+        :param output_names:    Optional: Names of the history outputs, like ALLIE or U3. Default is all outputs
+        :param region_names:    Optional: Names of the history regions, like "Node PART-1.1". Default is all regions
+        :param step_names:      Optional: Names of the steps. Default is all steps
+        :return:                A dict {region_name: {output_name: data}} where data is a structured array with the
+                                fields step, step_time, total_time and value with one entry per output time
+        """
+        odb_file_name = check_odb_file(odb_file_name)
+        with TemporaryDirectory(odb_file_name) as work_directory:
+            parameter_pickle_name = work_directory / 'parameter_pickle.pkl'
+            results_pickle_name = work_directory / 'results.pkl'
+            with open(parameter_pickle_name, 'wb') as pickle_file:
+                pickle.dump({'odb_file_name': str(odb_file_name), 'output_names': output_names,
+                             'region_names': region_names, 'step_names': step_names}, pickle_file, protocol=2)
+            results = self._run_script('read_history_output.py', parameter_pickle_name, results_pickle_name,
+                                       results=results_pickle_name)
+        step_names = np.array(results['step_names'])
+        history = {}
+        for region_name, outputs in results['history'].items():
+            history[region_name] = {}
+            for output_name, output in outputs.items():
+                data = np.zeros(output['value'].shape[0], dtype=[('step', step_names.dtype), ('step_time', float),
+                                                                 ('total_time', float), ('value', float)])
+                data['step'] = step_names[output['steps']]
+                for key in ['step_time', 'total_time', 'value']:
+                    data[key] = output[key]
+                history[region_name][output_name] = data
+        return history
+
     def get_steps(self, odb_file_name):
-        return list(self.get_odb_as_dict(odb_file_name)["steps"].keys())
+        return list(self.get_odb_summary(odb_file_name)["steps"].keys())
 
     def get_frames(self, odb_file_name, step_name=-1):
-        steps = self.get_odb_as_dict(odb_file_name)["steps"]
+        steps = self.get_odb_summary(odb_file_name)["steps"]
         if len(steps) == 0.:
             return []
         if step_name == -1:
             step_name = list(steps.keys())[-1]
         elif step_name not in steps:
             raise OdbReadingError(f"The step name {step_name} is not present in the odb {odb_file_name}")
-        return list(range(len(steps[step_name])))
+        return list(range(steps[step_name]["frame_count"]))
 
     def get_odb_as_dict(self, odb_file_name):
+        """
+        Returns the full structure of the odb, including the field names of every frame. For large odbs this
+        enumerates all frames, get_odb_summary and get_frame_fields are cheaper when that is not needed
+        """
         odb_file_name = check_odb_file(odb_file_name)
-        if odb_file_name in self.cached_odb_dicts:
-            return self.cached_odb_dicts[odb_file_name]
+        odb_dict = self.metadata_cache.get(odb_file_name, 'odb_dict')
+        if odb_dict is not None:
+            return odb_dict
         with TemporaryDirectory(odb_file_name) as work_directory:
             results_pickle_name = work_directory / 'results.pkl'
-            self.run_command(self.abq + ' python odb_as_dict.py ' + str(odb_file_name) + ' '
-                             + str(results_pickle_name), directory=abaqus_python_directory)
-            with open(results_pickle_name, 'rb') as results_pickle:
-                odb_dict = pickle.load(results_pickle, encoding='latin1')
-        self.cached_odb_dicts[odb_file_name] = odb_dict
+            odb_dict = self._run_script('odb_as_dict.py', odb_file_name, results_pickle_name,
+                                        results=results_pickle_name)
+        self.metadata_cache.put(odb_file_name, 'odb_dict', odb_dict)
         return odb_dict
 
-    def create_empty_odb_from_odb(self, new_odb_filename, odb_to_copy):
+    def get_odb_summary(self, odb_file_name):
+        """
+        Returns the cheap part of the odb metadata without touching any field outputs
+
+        :param odb_file_name:   Name of the odb file
+        :return:                A dict {"steps": {step_name: {"frame_count": n, "frame_values": [...]}},
+                                "rootAssembly": ...} where "rootAssembly" is as in get_odb_as_dict
+        """
+        odb_file_name = check_odb_file(odb_file_name)
+        summary = self.metadata_cache.get(odb_file_name, 'summary')
+        if summary is not None:
+            return summary
+        with TemporaryDirectory(odb_file_name) as work_directory:
+            results_pickle_name = work_directory / 'results.pkl'
+            summary = self._run_script('odb_summary.py', odb_file_name, results_pickle_name,
+                                       results=results_pickle_name)
+        self.metadata_cache.put(odb_file_name, 'summary', summary)
+        return summary
+
+    def get_fields_in_frames(self, odb_file_name, frames):
+        """
+        Returns the fields present in a number of frames. Only the frames not already cached are read, all of them in
+        one abaqus launch
+
+        :param odb_file_name:   Name of the odb file
+        :param frames:          Sequence of (step_name, frame_number), step_name None means the last step and
+                                frame_number -1 the last frame
+        :return:                A list with a dict {field_name: info} for each frame where info is a dict with the keys
+                                "type", "description", "positions", "component_labels" and "valid_invariants"
+        """
+        odb_file_name = check_odb_file(odb_file_name)
+        odb_summary = self.get_odb_summary(odb_file_name)
+        frames = [resolve_frame(odb_summary, odb_file_name, step_name, frame_number)
+                  for step_name, frame_number in frames]
+        frame_fields = {frame: self.metadata_cache.get(odb_file_name, ('fields',) + frame) for frame in frames}
+        missing_frames = list(OrderedDict.fromkeys(frame for frame in frames if frame_fields[frame] is None))
+        if missing_frames:
+            with TemporaryDirectory(odb_file_name) as work_directory:
+                parameter_pickle_name = work_directory / 'parameter_pickle.pkl'
+                results_pickle_name = work_directory / 'results.pkl'
+                with open(parameter_pickle_name, 'wb') as pickle_file:
+                    pickle.dump({'odb_file_name': str(odb_file_name), 'frames': missing_frames}, pickle_file,
+                                protocol=2)
+                frame_info = self._run_script('odb_frame_info.py', parameter_pickle_name, results_pickle_name,
+                                              results=results_pickle_name)
+            for frame, fields in zip(missing_frames, frame_info):
+                frame_fields[frame] = fields
+                self.metadata_cache.put(odb_file_name, ('fields',) + frame, fields)
+        return [frame_fields[frame] for frame in frames]
+
+    def get_frame_fields(self, odb_file_name, step_name=None, frame_number=-1):
+        """
+        Returns the fields in a frame, see get_fields_in_frames
+        """
+        return self.get_fields_in_frames(odb_file_name, [(step_name, frame_number)])[0]
+
+    def create_empty_odb_from_odb(self, new_odb_filename, odb_to_copy, instance_names=None, set_names=None):
+        """
+        Creates an odb without any steps with the mesh, sets and coordinate systems of another odb
+
+        :param new_odb_filename:    Name of the new odb file
+        :param odb_to_copy:         Name of the odb file to copy the mesh from
+        :param instance_names:      Optional list of the instances to copy, default is None which copies all instances
+                                    and parts
+        :param set_names:           Optional list of the node and element sets to copy, default is None which copies
+                                    all sets
+        """
         new_odb_filename = pathlib.Path(new_odb_filename).absolute().expanduser()
         old_odb_filename = check_odb_file(odb_to_copy)
+        if instance_names is not None:
+            instances = self.get_odb_summary(old_odb_filename)["rootAssembly"]["instances"]
+            for instance_name in instance_names:
+                if instance_name not in instances:
+                    raise OdbReadingError("The instance " + instance_name + " is not present in the odb "
+                                          + str(old_odb_filename))
         dir_name = new_odb_filename.absolute().parents[0]
         dir_name.mkdir(exist_ok=True)
-        self.run_command(self.abq + ' python create_empty_odb_from_odb.py ' + str(new_odb_filename) + ' '
-                         + str(old_odb_filename), directory=abaqus_python_directory)
+        with TemporaryDirectory(new_odb_filename) as work_directory:
+            parameter_pickle_name = work_directory / 'parameter_pickle.pkl'
+            with open(parameter_pickle_name, 'wb') as pickle_file:
+                pickle.dump({'new_odb_file_name': str(new_odb_filename), 'old_odb_file_name': str(old_odb_filename),
+                             'instance_names': None if instance_names is None else list(instance_names),
+                             'set_names': None if set_names is None else list(set_names)}, pickle_file, protocol=2)
+            self._run_script('create_empty_odb_from_odb.py', parameter_pickle_name)
+        self.metadata_cache.invalidate(new_odb_filename)
 
     def create_empty_odb_from_nodes_and_elements(self, odb_file_name, instances):
         odb_file_name = check_odb_file(odb_file_name, exists=False)
@@ -196,57 +759,20 @@ class ABQInterface:
         }
         with TemporaryDirectory(odb_file_name) as work_directory:
             parameter_pickle_name = work_directory / 'parameter_pickle.pkl'
-            with open(parameter_pickle_name, 'wb') as pickle_file:
-                pickle.dump(data_for_creating_odb, pickle_file, protocol=2)
-            self.run_command(self.abq + ' python create_empty_odb_from_data.py ' + str(parameter_pickle_name),
-                             directory=abaqus_python_directory)
+            transport.dump(data_for_creating_odb, parameter_pickle_name)
+            self._run_script('create_empty_odb_from_data.py', parameter_pickle_name)
+        self.metadata_cache.invalidate(odb_file_name)
 
     def validate_field(self, odb_file_name, step_name, frame_number, field_id=None):
-        odb_dict = self.get_odb_as_dict(odb_file_name)
-        odb_steps = list(odb_dict["steps"].keys())
-        if step_name is None:
-            step_name =odb_steps[-1]
-        elif step_name not in odb_dict["steps"]:
-            raise OdbReadingError("The step " + step_name + " does not exist in the odb file " + str(odb_file_name))
-
-        odb_frames = list(odb_dict["steps"][step_name].keys())
-        if frame_number == -1:
-            frame_number = odb_frames[-1]
-        if frame_number not in odb_dict["steps"][step_name]:
-            raise OdbReadingError("The frame number " + str(frame_number) + " does not exist in the step " + step_name +
-                                  " in the odb file " + str(odb_file_name))
-        if field_id is not None and field_id not in odb_dict["steps"][step_name][frame_number]["fieldOutputs"]:
-            raise OdbReadingError("The field " + field_id + " is not present in the frame " + str(frame_number)
-                                  + " in step " + step_name + " in the odb file " + str(odb_file_name))
+        step_name, frame_number = resolve_frame(self.get_odb_summary(odb_file_name), odb_file_name, step_name,
+                                                frame_number)
+        if field_id is not None:
+            check_field(self.get_frame_fields(odb_file_name, step_name, frame_number), odb_file_name, step_name,
+                        frame_number, field_id)
         return step_name, frame_number
 
     def validate_set(self, odb_file_name, instance_name, set_name, position='INTEGRATION_POINT'):
-        odb_dict = self.get_odb_as_dict(odb_file_name)
-        set_type = "elementSets"
-        if position == "NODAL":
-            set_type = "nodeSets"
-        if not instance_name:
-            if set_name in odb_dict["rootAssembly"][set_type]:
-                return None, set_name
-            if len(odb_dict["rootAssembly"]["instances"]) == 1:
-                instance_name = next(iter(odb_dict["rootAssembly"]["instances"]))
-                if not set_name or set_name in odb_dict["rootAssembly"]["instances"][instance_name][set_type]:
-                    return instance_name, set_name
-            raise OdbReadingError(
-                "The " + set_type[:-1] + " " + set_name + " is not present in the rootAssembly of the  odb "
-                + str(odb_file_name) + " or if there is several instances in the odb file, specify an instance"
-            )
-        else:
-            if instance_name not in odb_dict["rootAssembly"]["instances"]:
-                raise OdbReadingError(
-                    "The instance " + instance_name + " is not present in the odb " + str(odb_file_name)
-                )
-            if set_name and set_name not in odb_dict["rootAssembly"]["instances"][instance_name][set_type]:
-                raise OdbReadingError(
-                    "The " + set_type[:-1] + " " + set_name + " is not present in the instance " + instance_name
-                    + " in the odb file " + str(odb_file_name)
-                )
-        return instance_name, set_name
+        return resolve_set(self.get_odb_summary(odb_file_name), odb_file_name, instance_name, set_name, position)
 
     def read_data_from_odb(self, field_id, odb_file_name, step_name=None, frame_number=-1, set_name='',
                            instance_name='', get_position_numbers=False, get_frame_value=False,
@@ -254,131 +780,367 @@ class ABQInterface:
         odb_file_name = check_odb_file(odb_file_name)
         step_name, frame_number = self.validate_field(odb_file_name, step_name, frame_number, field_id)
         instance_name, set_name = self.validate_set(odb_file_name, instance_name, set_name, position=position)
+        parameter_data = field_parameters(field_id, step_name, frame_number, set_name, instance_name, position,
+                                          invariant, coordinate_system, deform_system)
+        if self.in_process is not None:
+            data = self._call_in_process('read_many_from_odb', 'read_many', odb_file_name, [parameter_data])[0]
+            return field_results(data, get_position_numbers, get_frame_value)
         with TemporaryDirectory(odb_file_name) as work_directory:
             parameter_pickle_name = work_directory / 'parameter_pickle.pkl'
             results_pickle_name = work_directory / 'results.pkl'
-            parameter_data = {
-                'field_id': field_id,
+            parameter_data.update({
                 'odb_file_name': str(odb_file_name),
-                'step_name': step_name,
-                'frame_number': frame_number,
-                'set_name': set_name,
-                'instance_name': instance_name,
                 'get_position_numbers': get_position_numbers,
                 'get_frame_value': get_frame_value,
-                'position': position,
-                'invariant': invariant,
-                'deform_system': deform_system
-            }
-
-            if coordinate_system:
-                if isinstance(coordinate_system, str):
-                    parameter_data['coordinate_system'] = coordinate_system
-                else:
-                    parameter_data['coordinate_system'] = coordinate_system._asdict()
+            })
             with open(parameter_pickle_name, 'wb') as pickle_file:
                 pickle.dump(parameter_data, pickle_file, protocol=2)
-            self.run_command(self.abq + ' python read_data_from_odb.py ' + str(parameter_pickle_name) + ' '
-                             + str(results_pickle_name), directory=abaqus_python_directory)
-            with open(results_pickle_name, 'rb') as results_pickle:
-                data = pickle.load(results_pickle, encoding='latin1')
-
-        if not get_position_numbers and not get_frame_value:
-            return data['data']
-        elif not get_position_numbers:
-            return data['data'], data['frame_value']
-        elif not get_frame_value:
-            return data['data'], data['node_labels'], data['element_labels']
-        else:
-            return data['data'], data['frame_value'], data['node_labels'], data['element_labels']
+            data = self._run_script('read_data_from_odb.py', parameter_pickle_name, results_pickle_name,
+                                    results=results_pickle_name)
+        return field_results(data, get_position_numbers, get_frame_value)
+
+    def read_many(self, odb_file_name, requests, get_position_numbers=False, get_frame_value=False):
+        """
+        Reads many fields from an odb file in one abaqus launch where the odb is opened once
+
+        :param odb_file_name:           Name of the odb file
+        :param requests:                A sequence of FieldRequest, or dicts with the fields of FieldRequest, with
+                                        the same meaning as the arguments of read_data_from_odb
+        :param get_position_numbers:    Flag if node and element labels should be returned, see read_data_from_odb
+        :param get_frame_value:         Flag if the frame value should be returned, see read_data_from_odb
+        :return:                        A dict {request: result} where result is what read_data_from_odb returns for
+                                        the request. Requests given as dicts are keyed by the corresponding
+                                        FieldRequest
+        """
+        odb_file_name = check_odb_file(odb_file_name)
+        requests = [request if isinstance(request, FieldRequest) else FieldRequest(**request)
+                    for request in requests]
+        self.get_fields_in_frames(odb_file_name, [(request.step_name, request.frame_number) for request in requests])
+        parameter_list = []
+        for request in requests:
+            step_name, frame_number = self.validate_field(odb_file_name, request.step_name, request.frame_number,
+                                                          request.field_id)
+            instance_name, set_name = self.validate_set(odb_file_name, request.instance_name, request.set_name,
+                                                        position=request.position)
+            parameter_list.append(field_parameters(request.field_id, step_name, frame_number, set_name,
+                                                   instance_name, request.position, request.invariant,
+                                                   request.coordinate_system, request.deform_system))
+        if self.in_process is not None:
+            results = self._call_in_process('read_many_from_odb', 'read_many', odb_file_name, parameter_list)
+            return {request: field_results(data, get_position_numbers, get_frame_value)
+                    for request, data in zip(requests, results)}
+        with TemporaryDirectory(odb_file_name) as work_directory:
+            parameter_pickle_name = work_directory / 'parameter_pickle.pkl'
+            results_pickle_name = work_directory / 'results.pkl'
+            with open(parameter_pickle_name, 'wb') as pickle_file:
+                pickle.dump({'odb_file_name': str(odb_file_name), 'requests': parameter_list}, pickle_file,
+                            protocol=2)
+            results = self._run_script('read_many_from_odb.py', parameter_pickle_name, results_pickle_name,
+                                       results=results_pickle_name)
+        return {request: field_results(data, get_position_numbers, get_frame_value)
+                for request, data in zip(requests, results)}
+
+    def read_field_time_series(self, odb_file_name, field_ids, step_name=None, frame_numbers="ALL", labels=None,
+                               set_name='', instance_name='', position='INTEGRATION_POINT', invariant=None):
+        """
+        Reads the history of field outputs at a set of nodes or elements in the frames of a step, in one abaqus launch
+
+        :param odb_file_name:   Name of the odb file
+        :param field_ids:       Name of a field or a list of names
+        :param step_name:       Optional: Name of the step, default is the last step
+        :param frame_numbers:   Optional: List of frame numbers, default is "ALL" for all frames in the step
+        :param labels:          Optional: The node labels for NODAL and ELEMENT_NODAL data and the element labels for
+                                the other positions. Default is None which takes all nodes or elements in the set
+        :param set_name:        Optional: Name of a node or element set
+        :param instance_name:   Optional: Name of the instance
+        :param position:        Position of the data
+        :param invariant:       Optional: Invariant to read instead of the components
+        :return:                A dict {field_id: data} where data is a structured array with one entry per frame
+                                with the fields frame_number, frame_value, labels, the node or element label of each
+                                row of the field data, and data, the field data with one row per point
+        """
+        odb_file_name = check_odb_file(odb_file_name)
+        if isinstance(field_ids, str):
+            field_ids = [field_ids]
+        step_name, _ = self.validate_field(odb_file_name, step_name, -1)
+        frame_count = self.get_odb_summary(odb_file_name)["steps"][step_name]["frame_count"]
+        if isinstance(frame_numbers, str) and frame_numbers == "ALL":
+            frame_numbers = list(range(frame_count))
+        frame_numbers = [frame_number % frame_count for frame_number in frame_numbers]
+        self.get_fields_in_frames(odb_file_name, [(step_name, frame_number) for frame_number in frame_numbers])
+        instance_name, set_name = self.validate_set(odb_file_name, instance_name, set_name, position=position)
+        parameter_list = []
+        for field_id in field_ids:
+            for frame_number in frame_numbers:
+                self.validate_field(odb_file_name, step_name, frame_number, field_id)
+                parameter_list.append(field_parameters(field_id, step_name, frame_number, set_name, instance_name,
+                                                       position, invariant, None, False))
+        with TemporaryDirectory(odb_file_name) as work_directory:
+            parameter_pickle_name = work_directory / 'parameter_pickle.pkl'
+            results_pickle_name = work_directory / 'results.pkl'
+            parameters = {'odb_file_name': str(odb_file_name), 'requests': parameter_list, 'position': position}
+            if labels is not None:
+                parameters['labels'] = np.asarray(labels, dtype=int)
+            transport.dump(parameters, parameter_pickle_name)
+            results = self._run_script('read_field_time_series.py', parameter_pickle_name, results_pickle_name,
+                                       results=results_pickle_name)
+
+        time_series = {}
+        for i, field_id in enumerate(field_ids):
+            frame_results = results[i*len(frame_numbers):(i + 1)*len(frame_numbers)]
+            row_labels = frame_results[0]['labels']
+            if any(not np.array_equal(result['labels'], row_labels) for result in frame_results):
+                raise OdbReadingError("The field " + field_id + " is not defined at the same points in all frames of "
+                                      "the step " + step_name + " in the odb file " + str(odb_file_name))
+            data_shape = frame_results[0]['data'].shape
+            data = np.zeros(len(frame_numbers), dtype=[('frame_number', int), ('frame_value', float),
+                                                       ('labels', int, row_labels.shape),
+                                                       ('data', float, data_shape)])
+            data['frame_number'] = frame_numbers
+            data['frame_value'] = [result['frame_value'] for result in frame_results]
+            data['labels'] = row_labels
+            data['data'] = np.stack([result['data'] for result in frame_results])
+            time_series[field_id] = data
+        return time_series
 
     def write_data_to_odb(self, field_data, field_id, odb_file_name, step_name, instance_name='', set_name='',
                           step_description='', frame_number=None, frame_value=None, field_description='',
-                          position='INTEGRATION_POINT', invariants=None):
+                          position='INTEGRATION_POINT', invariants=None, labels=None):
+        """
+        Writes a field to an odb file, see odb_io_functions.write_field_to_odb for the meaning of the arguments
+
+        :param labels:  Optional array with the node or element labels of the data. If given, the labels are not
+                        looked up from the set or the instance in the odb. For element positions every label
+                        corresponds to len(field_data)/len(labels) consecutive rows in field_data
+        """
         odb_file_name = check_odb_file(odb_file_name)
         instance_name, set_name = self.validate_set(odb_file_name, instance_name, set_name, position=position)
+        parameters = write_parameters(field_data, field_id, odb_file_name, step_name, instance_name, set_name,
+                                      step_description, frame_number, frame_value, field_description, position,
+                                      invariants, labels)
+        stamp = odb_stamp(odb_file_name)
+        if self.in_process is not None:
+            return_dict = self._call_in_process('write_transaction', 'apply_operations', odb_file_name,
+                                                [dict(parameters, operation='write_field')])
+            self._check_written_field(return_dict, parameters, stamp)
+            return
         with TemporaryDirectory(odb_file_name) as work_directory:
             pickle_filename = work_directory / 'load_field_to_odb_pickle.pkl'
-            data_filename = work_directory / 'field_data.npy'
-            np.save(str(data_filename), field_data)
-            if invariants is None:
-                invariants = []
-            with open(pickle_filename, 'wb') as pickle_file:
-                pickle.dump({
-                    'field_id': field_id,
-                    'odb_file': str(odb_file_name),
-                    'step_name': step_name,
-                    'instance_name': instance_name,
-                    'set_name': set_name,
-                    'step_description': step_description,
-                    'frame_number': frame_number,
-                    'frame_value': frame_value,
-                    'field_description': field_description,
-                    'position': position,
-                    'invariants': invariants
-                }, pickle_file, protocol=2)
-
-            self.run_command(self.abq + ' python write_data_to_odb.py ' + str(data_filename) + ' '
-                             + str(pickle_filename), directory=abaqus_python_directory)
-            with open(pickle_filename, 'rb') as pickle_file:
-                return_dict = pickle.load(pickle_file)
-            if "ERROR" in return_dict:
-                raise OdbWritingError(" ".join(return_dict["ERROR"]))
+            transport.dump(parameters, pickle_filename)
+            self._run_script('write_data_to_odb.py', pickle_filename)
+            self._field_written(pickle_filename, parameters, stamp)
+
+    @contextmanager
+    def write_transaction(self, odb_file_name):
+        """
+        Context manager queuing writes of fields, steps, frames and sets to an odb file that are committed in one
+        abaqus launch, with a single save of the odb, when the with block exits without an exception
+
+            with abq.write_transaction('model.odb') as transaction:
+                for frame_value, data in zip(time, temperatures):
+                    frame_number = transaction.create_frame('cooling', frame_value=frame_value)
+                    transaction.write_field(data, 'NT11', 'cooling', frame_number=frame_number, position='NODAL')
+
+        :param odb_file_name:   Name of the odb file
+        :return:                An OdbWriteTransaction
+        """
+        transaction = OdbWriteTransaction(self, odb_file_name)
+        yield transaction
+        transaction.commit()
+
+    def _field_written(self, pickle_filename, parameters, stamp):
+        """
+        Checks the errors reported by write_data_to_odb.py and patches the metadata cache with the written field, stamp
+        is the stamp of the odb file before the write
+        """
+        with open(pickle_filename, 'rb') as pickle_file:
+            return_dict = pickle.load(pickle_file, encoding='latin1')
+        self._check_written_field(return_dict, parameters, stamp)
+
+    def _check_written_field(self, return_dict, parameters, stamp):
+        odb_file_name = pathlib.Path(parameters['odb_file'])
+        if "ERROR" in return_dict:
+            self.metadata_cache.invalidate(odb_file_name)
+            raise OdbWritingError(" ".join(return_dict["ERROR"]))
+        field_info = _field_info(parameters['field_id'], parameters['field_data'], parameters['position'],
+                                 parameters['field_description'], parameters['invariants'])
+        self.metadata_cache.patch(odb_file_name, stamp, lambda metadata: _metadata_with_field(
+            metadata, parameters['step_name'], parameters['frame_number'], parameters['frame_value'],
+            parameters['field_id'], field_info))
 
     def get_data_from_path(self, odb_file_name, path_points, variable, component=None, step_name=None,
-                           frame_numbers=None, output_position='INTEGRATION_POINT', frame_data=None):
+                           frame_numbers=None, output_position='INTEGRATION_POINT', frame_data=None, engine='viewer',
+                           instance_name=None):
+        """
+        :param odb_file_name:   Name of the odb file
+        :param path_points:     Array with the coordinates of the points of the path
+        :param variable:        Name of the field, like S
+        :param component:       Optional: Component of the field, like S11
+        :param step_name:       Optional: Name of the step, default is the last step
+        :param frame_numbers:   Optional: Frame number or list of frame numbers, "ALL" for all frames in the step.
+                                Default is the last frame
+        :param output_position: Position of the field data the path data is computed from
+        :param engine:          "viewer" uses XYDataFromPath in the abaqus viewer, "numpy" locates the points in the
+                                mesh and interpolates field data read in one launch for all frames, see path_engine
+        :param instance_name:   Optional: Name of the instance with the path, only used by the numpy engine
+        :return:                Array of shape (frames, points) with the data along the path
+        """
         odb_file_name = check_odb_file(odb_file_name)
+        if engine == 'numpy':
+            return self._interpolated_field(odb_file_name, path_points, variable, [component], step_name,
+                                            frame_numbers, output_position, instance_name)[:, :, 0]
+        if engine != 'viewer':
+            raise ValueError("The path engine must be viewer or numpy")
         with TemporaryDirectory(odb_file_name) as work_directory:
             parameter_pickle_name = work_directory / 'parameter_pickle.pkl'
             path_points_filename = work_directory / 'path_points.npy'
             data_filename = work_directory / 'path_data.npy'
-            parameter_dict = {
-                'odb_filename': str(odb_file_name),
-                'variable': str(variable),
-                'path_points_filename': str(path_points_filename),
-                'data_filename': str(data_filename)
-            }
-
-            if component is not None:
-                parameter_dict['component'] = component
-            if step_name is not None:
-                parameter_dict['step_name'] = step_name
-            if frame_numbers is not None:
-                parameter_dict['frame_numbers'] = frame_numbers
-            parameter_dict['output_position'] = output_position
-
+            parameter_dict = path_parameters(odb_file_name, variable, path_points_filename, data_filename,
+                                             component, step_name, frame_numbers, output_position)
             with open(parameter_pickle_name, 'wb') as pickle_file:
                 pickle.dump(parameter_dict, pickle_file, protocol=2)
-            if not isinstance(path_points, np.ndarray):
-                path_points = np.array(path_points)
-            np.save(path_points_filename, path_points)
-            self.run_command(self.abq + ' viewer noGUI=write_data_along_path.py -- ' + str(parameter_pickle_name),
-                             directory=abaqus_python_directory)
+            np.save(path_points_filename, np.asarray(path_points))
+            self._run_script('write_data_along_path.py', parameter_pickle_name, viewer=True)
             return np.load(data_filename)
 
+    def _interpolated_field(self, odb_file_name, points, field_id, components, step_name, frame_numbers,
+                            output_position, instance_name):
+        """
+        Interpolates components of a field at points for many frames with the path_engine, the field data for all
+        frames is read in one launch. Returns an array of shape (frames, points, components)
+        """
+        instance_name, _ = self.validate_set(odb_file_name, instance_name, '')
+        step_name, _ = self.validate_field(odb_file_name, step_name, -1)
+        if frame_numbers is None:
+            frame_numbers = [-1]
+        elif isinstance(frame_numbers, str) and frame_numbers == "ALL":
+            frame_numbers = list(range(self.get_odb_summary(odb_file_name)["steps"][step_name]["frame_count"]))
+        elif np.ndim(frame_numbers) == 0:
+            frame_numbers = [frame_numbers]
+        if output_position == 'NODAL':
+            read_position = 'NODAL'
+        elif output_position in ['CENTROID', 'ELEMENT_CENTROID']:
+            read_position = 'CENTROID'
+        else:
+            # Integration point data is extrapolated to the nodes by abaqus, like in the viewer
+            read_position = 'ELEMENT_NODAL'
+
+        requests = [FieldRequest(field_id, step_name, frame_number, '', instance_name, read_position)
+                    for frame_number in frame_numbers]
+        results = self.read_many(odb_file_name, requests, get_position_numbers=True)
+        component_labels = self.get_frame_fields(odb_file_name, step_name, requests[0].frame_number)[field_id][
+            "component_labels"]
+        columns = []
+        for component in components:
+            if component is None:
+                if len(component_labels) > 1:
+                    raise ValueError("The field " + field_id + " has the components " + ', '.join(component_labels)
+                                     + ", specify a component")
+                columns.append(0)
+            elif component in component_labels:
+                columns.append(component_labels.index(component))
+            elif field_id + component in component_labels:
+                columns.append(component_labels.index(field_id + component))
+            else:
+                raise ValueError("The field " + field_id + " has no component " + str(component))
+
+        points = np.asarray(points, dtype=float)
+        meshes = []
+        locations = []
+
+        def instance_mesh():
+            # The mesh is taken from the mesh store, see get_odb_geometry, and only when it is needed
+            if not meshes:
+                meshes.append(self.get_odb_geometry(odb_file_name).mesh(instance_name=instance_name))
+            return meshes[0]
+
+        # The fingerprint of the mesh is kept in the metadata cache so that cached operators are found without
+        # loading the mesh
+        fingerprint_key = ('mesh_fingerprint', instance_name)
+        fingerprint = self.metadata_cache.get(odb_file_name, fingerprint_key)
+        if fingerprint is None:
+            fingerprint = instance_mesh().fingerprint
+            self.metadata_cache.put(odb_file_name, fingerprint_key, fingerprint)
+
+        def operator(node_labels, element_labels):
+            # The operator only depends on the mesh, the points and the layout of the field data, and is reused for
+            # other frames and odb files with the same mesh
+            key = operator_key(fingerprint, points, read_position, node_labels, element_labels)
+            cached_operator = self.operator_cache.get(key)
+            if cached_operator is None:
+                if not locations:
+                    locations.append(locate_points(instance_mesh(), points))
+                cached_operator = interpolation_operator(locations[0], read_position, node_labels, element_labels)
+                self.operator_cache.put(key, cached_operator)
+            return cached_operator
+
+        field_data = [np.asarray(results[request][0]).reshape(len(results[request][0]), -1)[:, columns]
+                      for request in requests]
+        labels = [results[request][1:] for request in requests]
+        if all(np.array_equal(frame_labels[0], labels[0][0]) and np.array_equal(frame_labels[1], labels[0][1])
+               for frame_labels in labels):
+            # All frames are interpolated with one product when the field data has the same layout in all frames
+            return operator(*labels[0]).apply(np.stack(field_data), axis=1)
+        return np.array([operator(*frame_labels).apply(frame_data)
+                         for frame_data, frame_labels in zip(field_data, labels)])
+
     def get_tensor_from_path(self, odb_file_name, path_points, field_id, step_name=None, frame_numbers=None,
-                             components=('11', '22', '33', '12', '13', '23'), output_position='INTEGRATION_POINT'):
-        data = np.zeros((path_points.shape[0], len(components)))
-        for i, component in enumerate(components):
-            stress = self.get_data_from_path(
-                odb_file_name, path_points, field_id, step_name=step_name, frame_numbers=frame_number,
-                output_position=output_position, component=field_id + component)
-            data[:, i] = stress
-        return data
+                             components=('11', '22', '33', '12', '13', '23'), output_position='INTEGRATION_POINT',
+                             engine='viewer', instance_name=None):
+        """
+        Extracts many components of a field along a path, for all frames in one abaqus launch
 
-    def get_element_data(self, odb_file_name, element_set=None, instance_name=None):
+        :param components:  The components, either with the field name like S11 or without like 11
+        :return:            Array of shape (frames, points, components)
+
+        The other parameters are the same as for get_data_from_path
+        """
+        odb_file_name = check_odb_file(odb_file_name)
+        components = [component if component.startswith(field_id) else field_id + component
+                      for component in components]
+        if engine == 'numpy':
+            return self._interpolated_field(odb_file_name, path_points, field_id, components, step_name,
+                                            frame_numbers, output_position, instance_name)
+        if engine != 'viewer':
+            raise ValueError("The path engine must be viewer or numpy")
+        with TemporaryDirectory(odb_file_name) as work_directory:
+            parameter_pickle_name = work_directory / 'parameter_pickle.pkl'
+            path_points_filename = work_directory / 'path_points.npy'
+            data_filename = work_directory / 'path_data.npy'
+            parameter_dict = path_parameters(odb_file_name, field_id, path_points_filename, data_filename, None,
+                                             step_name, frame_numbers, output_position, components=components)
+            with open(parameter_pickle_name, 'wb') as pickle_file:
+                pickle.dump(parameter_dict, pickle_file, protocol=2)
+            np.save(path_points_filename, np.asarray(path_points))
+            self._run_script('write_data_along_path.py', parameter_pickle_name, viewer=True)
+            return np.load(data_filename)
+
+    def get_mesh(self, odb_file_name, element_set=None, instance_name=None):
         """
         :param odb_file_name:   Name of the odb file
         :param element_set:     Optional: Name of the element set. If omitted all elements in the instance or the model
                                 is used
         :param instance_name:   Optional: Name of the instance. If omitted and the model contains just one instance and,
                                 no elements on the rootAssembly that one is used.
-        :return:                A dict of the type {element_type: {element_number: element_data}}
-                                where element data is an array with  the nodal coordinates for the element accordning
-                                to the standard ordering of nodes
+        :return:                A Mesh with the elements, and the nodes of the elements if element_set is given
         """
         odb_file_name = check_odb_file(odb_file_name)
+        if self.use_mesh_store:
+            geometry = self.get_odb_geometry(odb_file_name)
+            instance_name, element_set = resolve_set({"rootAssembly": geometry.root_assembly()}, odb_file_name,
+                                                     instance_name, element_set)
+            return geometry.mesh(element_set, instance_name)
         instance_name, element_set = self.validate_set(odb_file_name, instance_name, element_set)
+        if self.in_process is not None:
+            mesh_data = self._call_in_process('write_element_data', 'element_data', odb_file_name, element_set,
+                                              instance_name)
+        else:
+            mesh_data = self._mesh_data(odb_file_name, element_set, instance_name)
+        return Mesh(mesh_data['node_labels'], mesh_data['node_coordinates'],
+                    {element_type: (block['labels'], block['connectivity'])
+                     for element_type, block in mesh_data['elements'].items()})
+
+    def _mesh_data(self, odb_file_name, element_set, instance_name):
         with TemporaryDirectory(odb_file_name) as work_directory:
             parameter_pickle_name = work_directory / 'parameter_pickle.pkl'
             results_pickle_name = work_directory /'results.pkl'
@@ -391,40 +1153,95 @@ class ABQInterface:
                 parameter_dict["instance_name"] = instance_name
             with open(parameter_pickle_name, 'wb') as pickle_file:
                 pickle.dump(parameter_dict, pickle_file, protocol=2)
-            self.run_command((self.abq + ' viewer noGUI=write_element_data.py -- ' + str(parameter_pickle_name) + " "
-                              + str(results_pickle_name)), directory=abaqus_python_directory)
-            with open(results_pickle_name, 'rb') as results_pickle:
-                return pickle.load(results_pickle, encoding="latin1")
+            return self._run_script('write_element_data.py', parameter_pickle_name, results_pickle_name,
+                                    results=results_pickle_name)
 
-    def add_element_set(self, odb_file_name, element_set_name, element_labels, instance_name=None):
-        self._add_set(odb_file_name, element_set_name, element_labels, instance_name, "element")
+    def get_element_data(self, odb_file_name, element_set=None, instance_name=None):
+        """
+        :param odb_file_name:   Name of the odb file
+        :param element_set:     Optional: Name of the element set. If omitted all elements in the instance or the model
+                                is used
+        :param instance_name:   Optional: Name of the instance. If omitted and the model contains just one instance and,
+                                no elements on the rootAssembly that one is used.
+        :return:                A dict of the type {element_type: {element_number: element_data}}
+                                where element data is an array with  the nodal coordinates for the element accordning
+                                to the standard ordering of nodes. get_mesh returns the same data as arrays
+        """
+        return self.get_mesh(odb_file_name, element_set, instance_name).as_dict()
 
-    def add_node_set(self, odb_file_name, node_set_name, node_labels, instance_name=None):
-        self._add_set(odb_file_name, node_set_name, node_labels, instance_name, "node")
+    def get_odb_geometry(self, odb_file_name):
+        """
+        Returns the geometry of an odb, the mesh of all instances, the node and element sets and the datum coordinate
+        systems. The geometry is exported by abaqus once and saved in the file <odb name>_mesh.npz next to the odb,
+        later calls, also from other python processes, read that file instead of launching abaqus. The store is
+        exported again if the odb is changed by something else than writing fields with this library
 
-    def _add_set(self, odb_file_name, set_name, labels, instance_name, set_type):
+        :param odb_file_name:   Name of the odb file
+        :return:                An OdbGeometry
+        """
         odb_file_name = check_odb_file(odb_file_name)
-        parameter_dict = {
-            'odb_filename': str(odb_file_name),
-            'set_name': set_name,
-            'labels': list(labels),
-            'set_type': set_type
-        }
-        odb_dict = self.get_odb_as_dict(odb_file_name)
-        if instance_name is not None:
-            if not instance_name in odb_dict["rootAssembly"]["instances"]:
-                raise OdbReadingError("The instance", instance_name, "is not present in the odb file", odb_file_name)
-            parameter_dict["instance_name"] = instance_name
-        else:
-            if len(odb_dict["rootAssembly"]["instances"]) > 1:
-                raise OdbReadingError("The odb file", odb_file_name, "consist of several instances, please specity an "
-                                                                     "instance")
+        stamp = odb_stamp(odb_file_name)
+        with self.session_lock:
+            stored = self.geometries.get(odb_file_name, None)
+        if stored is None:
+            stored = mesh_store.load(odb_file_name)
+        if stored is not None:
+            geometry, store_stamp = stored
+            if store_stamp == stamp or self.metadata_cache.get(odb_file_name, 'mesh_store') == store_stamp:
+                self._keep_geometry(odb_file_name, stored)
+                return geometry
         with TemporaryDirectory(odb_file_name) as work_directory:
-            parameter_pickle_name = work_directory/'parameter_pickle.pkl'
-            with open(parameter_pickle_name, 'wb') as pickle_file:
-                pickle.dump(parameter_dict, pickle_file, protocol=2)
-            self.run_command((self.abq + ' python add_set.py -- ' + str(parameter_pickle_name)),
-                             directory=abaqus_python_directory)
+            results_pickle_name = work_directory / 'geometry.pkl'
+            geometry = OdbGeometry.from_export(self._run_script('export_mesh.py', odb_file_name, results_pickle_name,
+                                                                results=results_pickle_name))
+        if mesh_store.save(odb_file_name, geometry, stamp):
+            self.metadata_cache.put(odb_file_name, 'mesh_store', stamp)
+        self._keep_geometry(odb_file_name, (geometry, stamp))
+        return geometry
+
+    def _keep_geometry(self, odb_file_name, stored):
+        with self.session_lock:
+            self.geometries.pop(odb_file_name, None)
+            self.geometries[odb_file_name] = stored
+            while len(self.geometries) > self.max_geometries:
+                self.geometries.popitem(last=False)
+
+    def get_nodal_coordinates_from_node_set(self, odb_file_name, node_set_name, instance_name=None):
+        """
+        :param odb_file_name:   Name of the odb file
+        :param node_set_name:   Name of the node set
+        :param instance_name:   Optional: Name of the instance, if omitted the node set is taken from the rootAssembly
+        :return:                A dict {node_label: nodal_coordinates} answered from the mesh store, see
+                                get_odb_geometry
+        """
+        geometry = self.get_odb_geometry(odb_file_name)
+        instance_name, node_set_name = resolve_set({"rootAssembly": geometry.root_assembly()}, odb_file_name,
+                                                   instance_name, node_set_name, position='NODAL')
+        return geometry.nodal_coordinates(node_set_name, instance_name)
+
+    def add_element_set(self, odb_file_name, element_set_name, element_labels, instance_name=None):
+        self.add_sets(odb_file_name, element_sets={instance_name: {element_set_name: element_labels}})
+
+    def add_node_set(self, odb_file_name, node_set_name, node_labels, instance_name=None):
+        self.add_sets(odb_file_name, node_sets={instance_name: {node_set_name: node_labels}})
+
+    def add_sets(self, odb_file_name, node_sets=None, element_sets=None):
+        """
+        Creates many node and element sets in one abaqus launch where the odb is opened and saved once
+
+        :param odb_file_name:   Name of the odb file
+        :param node_sets:       A dict {instance_name: {set_name: node_labels}}. Sets under the instance_name None are
+                                created in the rootAssembly, which requires that the odb has one instance. Sets that
+                                already exist in the odb are left unchanged
+        :param element_sets:    A dict {instance_name: {set_name: element_labels}}, see node_sets
+        """
+        with self.write_transaction(odb_file_name) as transaction:
+            for instance_name, sets in (node_sets or {}).items():
+                for set_name, labels in sets.items():
+                    transaction.add_node_set(set_name, labels, instance_name)
+            for instance_name, sets in (element_sets or {}).items():
+                for set_name, labels in sets.items():
+                    transaction.add_element_set(set_name, labels, instance_name)
 
 
 if __name__ == '__main__':
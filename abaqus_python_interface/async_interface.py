@@ -0,0 +1,282 @@
+"""
+An asyncio version of ABQInterface for driving many abaqus launches from one event loop. The abaqus processes are
+started as asyncio subprocesses, at most max_concurrent of them at the same time, and a cancelled call kills its
+process.
+"""
+from contextlib import asynccontextmanager
+
+import asyncio
+import functools
+import os
+import pathlib
+import pickle
+import weakref
+
+import numpy as np
+
+from abaqus_python_interface.abaqus_interface import ABQInterface
+from abaqus_python_interface.common import TemporaryDirectory, abaqus_python_directory
+from abaqus_python_interface.launcher import AbaqusLaunchError
+from abaqus_python_interface.odb_cache import odb_stamp
+from abaqus_python_interface.odb_requests import (check_field, check_odb_file, field_parameters, field_results,
+                                                  path_parameters, resolve_frame, resolve_set, write_parameters)
+from abaqus_python_interface.processes import StderrTail, kill_process, stderr_tail_bytes, stop_reader_task
+from abaqus_python_interface import transport
+
+
+async def _in_thread(function, *arguments):
+    # File io and (de)serialization of the data run in the default executor so that they do not block the event loop
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(function, *arguments))
+
+
+@asynccontextmanager
+async def _thread_context(context_manager):
+    """
+    Enters and exits a context manager doing file io, like TemporaryDirectory, in the default executor
+    """
+    value = await _in_thread(context_manager.__enter__)
+    try:
+        yield value
+    except BaseException as e:
+        if not await _in_thread(context_manager.__exit__, type(e), e, e.__traceback__):
+            raise
+    else:
+        await _in_thread(context_manager.__exit__, None, None, None)
+
+
+def _dump_parameters(parameters, file_name):
+    with open(file_name, 'wb') as pickle_file:
+        pickle.dump(parameters, pickle_file, protocol=2)
+
+
+class AsyncABQInterface:
+    def __init__(self, abq_command, shell=None, output=True, cache_directory=None, max_concurrent=4,
+                 stats_callback=None, profile_directory=None, timeout=None):
+        """
+        :param abq_command:     The command for launching abaqus, like abq2018
+        :param shell:           Shell used for resolving the abaqus command and its environment, see ABQInterface
+        :param output:          Flag if the output from abaqus should be shown
+        :param cache_directory: Directory for the persistent cache of odb metadata, see ABQInterface
+        :param max_concurrent:  Max number of abaqus processes running at the same time, for instance the number of
+                                available license tokens
+        :param stats_callback:  Optional function called with a CallStats after every script run, the CallStats are
+                                also collected in self.stats
+        :param profile_directory:   Optional: Directory where the scripts are run under cProfile, see ABQInterface
+        :param timeout:         Max time in seconds for every abaqus python script launched, default is None which
+                                waits until the script is done. AbaqusLaunchError is raised at the timeout
+        """
+        if not isinstance(max_concurrent, int) or max_concurrent < 1:
+            raise ValueError("max_concurrent must be an integer > 0")
+        # Used for building the commands and for the metadata cache, it never launches anything itself
+        self.abq_interface = ABQInterface(abq_command, shell, output, cache_directory, stats_callback=stats_callback,
+                                          profile_directory=profile_directory, timeout=timeout)
+        self.metadata_cache = self.abq_interface.metadata_cache
+        self.stats = self.abq_interface.stats
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        # The locks are dropped when no call is using them
+        self.metadata_locks = weakref.WeakValueDictionary()
+
+    async def run_command(self, arguments, directory=None, environment=None, timeout=None):
+        """
+        Runs abaqus, see ABQInterface.run_command. The standard error is written to sys.stderr as it arrives if output
+        is True, and its end is kept for AbaqusLaunchError, which is raised if abaqus exits with an error or does not
+        finish within the timeout
+
+        :param arguments:   The arguments to abaqus as a list, like ['python', 'script.py']
+        :param directory:   Working directory of abaqus
+        :param environment: Variables added to the environment of abaqus
+        :param timeout:     Max time in seconds, default is the timeout of abq_interface
+        :return:            The exit code
+        """
+        return await self._run_process(arguments, directory, environment,
+                                       timeout if timeout is not None else self.abq_interface.timeout)
+
+    async def _run_process(self, arguments, directory, environment, timeout):
+        launcher = self.abq_interface.launcher
+        # The command is resolved once per process, the later calls return at once
+        command = await asyncio.get_running_loop().run_in_executor(None, launcher.command, arguments)
+        async with self.semaphore:
+            stdout = None
+            if self.abq_interface.output is False:
+                stdout = asyncio.subprocess.DEVNULL
+            # The standard error is read from a pipe of its own as asyncio waits for its pipes to be closed before
+            # the process counts as exited, which processes started by abaqus in the background may delay
+            read_fd, write_fd = os.pipe()
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *command, cwd=directory, env=launcher.environment(environment), stdin=asyncio.subprocess.DEVNULL,
+                    stdout=stdout, stderr=write_fd, start_new_session=True)
+            except OSError as e:
+                os.close(read_fd)
+                raise AbaqusLaunchError(command, "could not be started: " + str(e)) from e
+            finally:
+                os.close(write_fd)
+            stderr_stream = asyncio.StreamReader()
+            stderr_transport, _ = await asyncio.get_running_loop().connect_read_pipe(
+                lambda: asyncio.StreamReaderProtocol(stderr_stream), os.fdopen(read_fd, 'rb', 0))
+            stderr_tail = StderrTail(self.abq_interface.output)
+
+            async def read_stderr():
+                while True:
+                    chunk = await stderr_stream.read(stderr_tail_bytes)
+                    if not chunk:
+                        return
+                    stderr_tail.add(chunk)
+
+            reader = asyncio.ensure_future(read_stderr())
+            try:
+                await asyncio.wait_for(process.wait(), timeout)
+            except asyncio.TimeoutError:
+                kill_process(process)
+                await process.wait()
+                await stop_reader_task(reader, stderr_transport)
+                raise AbaqusLaunchError(command, "did not finish within " + str(timeout) + " s", None,
+                                        stderr_tail.text())
+            except BaseException:
+                kill_process(process)
+                await process.wait()
+                reader.cancel()
+                stderr_transport.close()
+                raise
+            await stop_reader_task(reader, stderr_transport)
+        if process.returncode != 0:
+            raise AbaqusLaunchError(command, "exited with code " + str(process.returncode), process.returncode,
+                                    stderr_tail.text())
+        return process.returncode
+
+    async def _run_script(self, script_name, *arguments, viewer=False, results=None):
+        """
+        Runs a script in abaqus_python_scripts with the timings recorded in self.stats, see ABQInterface._run_script
+        """
+        arguments = [str(argument) for argument in arguments]
+        async with _thread_context(self.abq_interface._script_run(script_name, arguments, viewer,
+                                                                  results=results)) as run:
+            await self.run_command(run.command, directory=abaqus_python_directory, environment=run.environment)
+        return run.data
+
+    async def run_abaqus_inp(self, input_file, cpus=1, user_material=None, ask_delete=True, timeout=None):
+        """
+        Runs an abaqus job in the directory of the input file, see ABQInterface.run_abaqus_inp
+
+        :param timeout: Max time in seconds for the job, default is None which waits until the job is done. The job
+                        is killed and AbaqusLaunchError is raised at the timeout
+        """
+        arguments = self.abq_interface._inp_command(input_file, cpus, user_material, ask_delete)
+        await self._run_process(arguments, pathlib.Path(input_file).parent, None, timeout)
+
+    def _metadata_lock(self, odb_file_name, key):
+        # Concurrent calls for the same metadata wait for the first one instead of launching abaqus each
+        lock = self.metadata_locks.get((odb_file_name, key), None)
+        if lock is None:
+            lock = self.metadata_locks[(odb_file_name, key)] = asyncio.Lock()
+        return lock
+
+    async def _cached_metadata(self, odb_file_name, key, script_name, *arguments):
+        async with self._metadata_lock(odb_file_name, key):
+            value = self.metadata_cache.get(odb_file_name, key)
+            if value is None:
+                async with _thread_context(TemporaryDirectory(odb_file_name)) as work_directory:
+                    results_pickle_name = work_directory / 'results.pkl'
+                    value = await self._run_script(script_name, *(arguments + (results_pickle_name,)),
+                                                   results=results_pickle_name)
+                self.metadata_cache.put(odb_file_name, key, value)
+        return value
+
+    async def get_odb_as_dict(self, odb_file_name):
+        odb_file_name = check_odb_file(odb_file_name)
+        return await self._cached_metadata(odb_file_name, 'odb_dict', 'odb_as_dict.py', odb_file_name)
+
+    async def get_odb_summary(self, odb_file_name):
+        odb_file_name = check_odb_file(odb_file_name)
+        return await self._cached_metadata(odb_file_name, 'summary', 'odb_summary.py', odb_file_name)
+
+    async def get_frame_fields(self, odb_file_name, step_name=None, frame_number=-1):
+        odb_file_name = check_odb_file(odb_file_name)
+        step_name, frame_number = resolve_frame(await self.get_odb_summary(odb_file_name), odb_file_name,
+                                                step_name, frame_number)
+        key = ('fields', step_name, frame_number)
+        async with self._metadata_lock(odb_file_name, key):
+            frame_fields = self.metadata_cache.get(odb_file_name, key)
+            if frame_fields is None:
+                async with _thread_context(TemporaryDirectory(odb_file_name)) as work_directory:
+                    parameter_pickle_name = work_directory / 'parameter_pickle.pkl'
+                    results_pickle_name = work_directory / 'results.pkl'
+                    await _in_thread(_dump_parameters, {'odb_file_name': str(odb_file_name),
+                                                        'frames': [(step_name, frame_number)]}, parameter_pickle_name)
+                    frame_fields = (await self._run_script('odb_frame_info.py', parameter_pickle_name,
+                                                           results_pickle_name, results=results_pickle_name))[0]
+                self.metadata_cache.put(odb_file_name, key, frame_fields)
+        return frame_fields
+
+    async def validate_field(self, odb_file_name, step_name, frame_number, field_id=None):
+        step_name, frame_number = resolve_frame(await self.get_odb_summary(odb_file_name), odb_file_name,
+                                                step_name, frame_number)
+        if field_id is not None:
+            check_field(await self.get_frame_fields(odb_file_name, step_name, frame_number), odb_file_name,
+                        step_name, frame_number, field_id)
+        return step_name, frame_number
+
+    async def validate_set(self, odb_file_name, instance_name, set_name, position='INTEGRATION_POINT'):
+        return resolve_set(await self.get_odb_summary(odb_file_name), odb_file_name, instance_name, set_name,
+                           position)
+
+    async def read_data_from_odb(self, field_id, odb_file_name, step_name=None, frame_number=-1, set_name='',
+                                 instance_name='', get_position_numbers=False, get_frame_value=False,
+                                 position='INTEGRATION_POINT', invariant=None, coordinate_system=None,
+                                 deform_system=True):
+        """
+        Reads a field from an odb file, see ABQInterface.read_data_from_odb
+        """
+        odb_file_name = check_odb_file(odb_file_name)
+        step_name, frame_number = await self.validate_field(odb_file_name, step_name, frame_number, field_id)
+        instance_name, set_name = await self.validate_set(odb_file_name, instance_name, set_name, position=position)
+        async with _thread_context(TemporaryDirectory(odb_file_name)) as work_directory:
+            parameter_pickle_name = work_directory / 'parameter_pickle.pkl'
+            results_pickle_name = work_directory / 'results.pkl'
+            parameter_data = field_parameters(field_id, step_name, frame_number, set_name, instance_name, position,
+                                              invariant, coordinate_system, deform_system)
+            parameter_data.update({
+                'odb_file_name': str(odb_file_name),
+                'get_position_numbers': get_position_numbers,
+                'get_frame_value': get_frame_value,
+            })
+            await _in_thread(_dump_parameters, parameter_data, parameter_pickle_name)
+            data = await self._run_script('read_data_from_odb.py', parameter_pickle_name, results_pickle_name,
+                                          results=results_pickle_name)
+        return field_results(data, get_position_numbers, get_frame_value)
+
+    async def write_data_to_odb(self, field_data, field_id, odb_file_name, step_name, instance_name='', set_name='',
+                                step_description='', frame_number=None, frame_value=None, field_description='',
+                                position='INTEGRATION_POINT', invariants=None, labels=None):
+        """
+        Writes a field to an odb file, see ABQInterface.write_data_to_odb. Writes to the same odb file are not
+        serialized, they should be awaited one at a time
+        """
+        odb_file_name = check_odb_file(odb_file_name)
+        instance_name, set_name = await self.validate_set(odb_file_name, instance_name, set_name, position=position)
+        parameters = write_parameters(field_data, field_id, odb_file_name, step_name, instance_name, set_name,
+                                      step_description, frame_number, frame_value, field_description, position,
+                                      invariants, labels)
+        stamp = odb_stamp(odb_file_name)
+        async with _thread_context(TemporaryDirectory(odb_file_name)) as work_directory:
+            pickle_filename = work_directory / 'load_field_to_odb_pickle.pkl'
+            await _in_thread(transport.dump, parameters, pickle_filename)
+            await self._run_script('write_data_to_odb.py', pickle_filename)
+            await _in_thread(self.abq_interface._field_written, pickle_filename, parameters, stamp)
+
+    async def get_data_from_path(self, odb_file_name, path_points, variable, component=None, step_name=None,
+                                 frame_numbers=None, output_position='INTEGRATION_POINT'):
+        """
+        Reads data along a path, see ABQInterface.get_data_from_path
+        """
+        odb_file_name = check_odb_file(odb_file_name)
+        async with _thread_context(TemporaryDirectory(odb_file_name)) as work_directory:
+            parameter_pickle_name = work_directory / 'parameter_pickle.pkl'
+            path_points_filename = work_directory / 'path_points.npy'
+            data_filename = work_directory / 'path_data.npy'
+            parameter_dict = path_parameters(odb_file_name, variable, path_points_filename, data_filename,
+                                             component, step_name, frame_numbers, output_position)
+            await _in_thread(_dump_parameters, parameter_dict, parameter_pickle_name)
+            await _in_thread(np.save, path_points_filename, np.asarray(path_points))
+            await self._run_script('write_data_along_path.py', parameter_pickle_name, viewer=True)
+            return await _in_thread(np.load, data_filename)
@@ -4,6 +4,7 @@ import pathlib
 import shutil
 
 package_path = os.path.dirname(__file__)
+abaqus_python_directory = pathlib.Path(__file__).parents[1].absolute() / "abaqus_python_scripts"
 
 
 class TemporaryDirectory:
@@ -0,0 +1,56 @@
+"""
+Backend running the abaqus python scripts in the python process of ABQInterface, used when the interface itself runs
+in abaqus python so that odbAccess can be imported
+"""
+import importlib
+import sys
+import threading
+import time
+
+from abaqus_python_interface.common import abaqus_python_directory
+
+# The scripts change sys.argv and os.environ and are run one at a time in the process
+_lock = threading.RLock()
+
+
+def odb_access_available():
+    try:
+        import odbAccess  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class InProcessBackend:
+    """
+    Runs the scripts in abaqus_python_scripts with runpy in this process instead of launching abaqus, like the server
+    of an AbaqusSession does. The functions reading and writing fields, sets and meshes are called directly with the
+    parameters and results as python objects so that nothing is written to files.
+    """
+    def __init__(self):
+        if not odb_access_available():
+            raise ImportError("odbAccess cannot be imported, the in_process backend must be run in abaqus python")
+        if str(abaqus_python_directory) not in sys.path:
+            sys.path.insert(0, str(abaqus_python_directory))
+
+    def run_script(self, script_name, arguments, environment=None):
+        """
+        Runs a script as if it was started by "abaqus python script_name arguments", see odb_server.run_script
+        """
+        with _lock:
+            importlib.import_module('odb_server').run_script(script_name, list(arguments), environment)
+
+    def call(self, module_name, function_name, *arguments):
+        """
+        Calls a function in one of the scripts in abaqus_python_scripts
+
+        :return:    The tuple (result, script_time, phases) where phases are the timings reported by the function, see
+                    timing.py
+        """
+        with _lock:
+            timing = importlib.import_module('timing')
+            function = getattr(importlib.import_module(module_name), function_name)
+            timing.reset()
+            start_time = time.time()
+            result = function(*arguments)
+            return result, time.time() - start_time, dict(timing.phases)
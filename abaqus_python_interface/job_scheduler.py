@@ -0,0 +1,258 @@
+"""
+Scheduler running many abaqus jobs at the same time within a budget of cpus and license tokens
+"""
+from collections import deque
+
+import os
+import pathlib
+import subprocess
+import threading
+import time
+
+from abaqus_python_interface.launcher import AbaqusLaunchError
+from abaqus_python_interface.processes import kill_process
+
+QUEUED = 'QUEUED'
+RUNNING = 'RUNNING'
+COMPLETED = 'COMPLETED'
+FAILED = 'FAILED'
+CANCELLED = 'CANCELLED'
+
+
+def abaqus_license_tokens(cpus):
+    """
+    Number of analysis tokens checked out by an abaqus/standard or abaqus/explicit job using cpus cores
+    """
+    return int(5*cpus**0.422)
+
+
+class Job:
+    """
+    Handle to a job submitted to a JobScheduler
+    """
+    def __init__(self, scheduler, input_file, cpus, user_material, ask_delete, license_tokens):
+        self.scheduler = scheduler
+        self.input_file = input_file
+        self.cpus = cpus
+        self.user_material = user_material
+        self.ask_delete = ask_delete
+        self.license_tokens = license_tokens
+        self.status = QUEUED
+        self.exit_code = None
+        self.start_time = None
+        self.end_time = None
+        self.process = None
+        self.cancel_requested = False
+
+    def __repr__(self):
+        return 'Job(' + str(self.input_file) + ', status=' + self.status + ')'
+
+    @property
+    def name(self):
+        return self.input_file.stem
+
+    @property
+    def odb_file(self):
+        return self.input_file.with_suffix('.odb')
+
+    @property
+    def sta_file(self):
+        return self.input_file.with_suffix('.sta')
+
+    @property
+    def msg_file(self):
+        return self.input_file.with_suffix('.msg')
+
+    @property
+    def done(self):
+        return self.status in (COMPLETED, FAILED, CANCELLED)
+
+    @property
+    def wall_time(self):
+        """
+        Time in seconds the job has been running, None if it has not started
+        """
+        if self.start_time is None:
+            return None
+        return (self.end_time if self.end_time is not None else time.time()) - self.start_time
+
+    def wait(self, timeout=None):
+        """
+        Waits until the job is done, returns True if the job is done and False if the timeout expired
+        """
+        return bool(self.scheduler.wait_all([self], timeout))
+
+    def cancel(self):
+        self.scheduler.cancel(self)
+
+
+class JobScheduler:
+    def __init__(self, abq_interface, max_cpus=None, license_tokens=None):
+        """
+        :param abq_interface:   ABQInterface with the abaqus launcher used for the jobs
+        :param max_cpus:        Max number of cpus used by all running jobs, default is the number of cpus on the
+                                machine
+        :param license_tokens:  Max number of license tokens checked out by all running jobs, default is None which
+                                does not limit the number of tokens
+        """
+        self.abq_interface = abq_interface
+        self.max_cpus = max_cpus if max_cpus is not None else os.cpu_count()
+        self.license_tokens = license_tokens
+        self.jobs = []
+        self.queue = deque()
+        self.used_cpus = 0
+        self.used_tokens = 0
+        self.condition = threading.Condition()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown(cancel=exc_type is not None)
+
+    def submit(self, input_file, cpus=1, user_material=None, ask_delete=False, license_tokens=None):
+        """
+        Queues a job, the job is started as soon as the cpus and license tokens it needs are available. Jobs are
+        started in the order they are submitted
+
+        :param input_file:      Name of the input file, the job is run in the directory of the input file
+        :param cpus:            Number of cpus used by the job
+        :param user_material:   Optional user subroutine for the job
+        :param ask_delete:      Flag if abaqus should ask before overwriting old job files, default is False as
+                                there is nobody to answer
+        :param license_tokens:  Number of license tokens used by the job, default is abaqus_license_tokens(cpus)
+        :return:                A Job handle
+        """
+        input_file = pathlib.Path(input_file).absolute().expanduser()
+        # Validates the input file and the job options before the job is queued
+        self.abq_interface._inp_command(input_file, cpus, user_material, ask_delete)
+        if license_tokens is None:
+            license_tokens = abaqus_license_tokens(cpus)
+        if cpus > self.max_cpus:
+            raise ValueError("The job needs " + str(cpus) + " cpus but the scheduler only has " + str(self.max_cpus))
+        if self.license_tokens is not None and license_tokens > self.license_tokens:
+            raise ValueError("The job needs " + str(license_tokens) + " license tokens but the scheduler only has "
+                             + str(self.license_tokens))
+        job = Job(self, input_file, cpus, user_material, ask_delete, license_tokens)
+        with self.condition:
+            self.jobs.append(job)
+            self.queue.append(job)
+            jobs = self._reserve()
+        self._start(jobs)
+        return job
+
+    def _fits(self, job):
+        if self.used_cpus + job.cpus > self.max_cpus:
+            return False
+        return self.license_tokens is None or self.used_tokens + job.license_tokens <= self.license_tokens
+
+    def _reserve(self):
+        # Called with the condition held, returns the jobs that can start with their cpus and tokens reserved
+        jobs = []
+        while self.queue and self._fits(self.queue[0]):
+            job = self.queue.popleft()
+            job.status = RUNNING
+            job.start_time = time.time()
+            self.used_cpus += job.cpus
+            self.used_tokens += job.license_tokens
+            jobs.append(job)
+        self.condition.notify_all()
+        return jobs
+
+    def _release(self, job):
+        # Called with the condition held
+        self.used_cpus -= job.cpus
+        self.used_tokens -= job.license_tokens
+
+    def _start(self, jobs):
+        # Called without the condition held as the first launch resolves the abaqus command, which can take a while
+        jobs = deque(jobs)
+        stdout = None
+        stderr = None
+        if self.abq_interface.output is False:
+            stdout = subprocess.DEVNULL
+            stderr = subprocess.STDOUT
+        while jobs:
+            job = jobs.popleft()
+            arguments = self.abq_interface._inp_command(job.input_file, job.cpus, job.user_material,
+                                                        job.ask_delete)
+            try:
+                process = self.abq_interface.launcher.popen(arguments, directory=job.input_file.parent,
+                                                            stdout=stdout, stderr=stderr, start_new_session=True)
+            except (OSError, AbaqusLaunchError):
+                with self.condition:
+                    job.end_time = time.time()
+                    job.status = CANCELLED if job.cancel_requested else FAILED
+                    self._release(job)
+                    jobs.extend(self._reserve())
+                continue
+            with self.condition:
+                job.process = process
+                if job.cancel_requested:
+                    kill_process(job.process)
+            threading.Thread(target=self._monitor, args=(job,), daemon=True).start()
+
+    def _monitor(self, job):
+        exit_code = job.process.wait()
+        with self.condition:
+            job.end_time = time.time()
+            job.exit_code = exit_code
+            if job.cancel_requested:
+                job.status = CANCELLED
+            else:
+                job.status = COMPLETED if exit_code == 0 else FAILED
+            self._release(job)
+            jobs = self._reserve()
+        self._start(jobs)
+
+    def cancel(self, job):
+        """
+        Removes a queued job from the queue or kills a running job
+        """
+        with self.condition:
+            if job.status == QUEUED:
+                self.queue.remove(job)
+                job.status = CANCELLED
+                self.condition.notify_all()
+            elif job.status == RUNNING:
+                job.cancel_requested = True
+                # A job that is still being started is killed when its process is there
+                if job.process is not None:
+                    kill_process(job.process)
+
+    def wait_any(self, jobs=None, timeout=None):
+        """
+        Waits until at least one of the jobs is done
+
+        :param jobs:    The jobs to wait for, default is all jobs submitted to the scheduler
+        :param timeout: Max time in seconds to wait, None waits until a job is done
+        :return:        List of the jobs that are done, empty if the timeout expired
+        """
+        with self.condition:
+            jobs = list(self.jobs if jobs is None else jobs)
+            self.condition.wait_for(lambda: any(job.done for job in jobs) or not jobs, timeout)
+            return [job for job in jobs if job.done]
+
+    def wait_all(self, jobs=None, timeout=None):
+        """
+        Waits until all the jobs are done
+
+        :param jobs:    The jobs to wait for, default is all jobs submitted to the scheduler
+        :param timeout: Max time in seconds to wait, None waits until all jobs are done
+        :return:        List of the jobs that are done
+        """
+        with self.condition:
+            jobs = list(self.jobs if jobs is None else jobs)
+            self.condition.wait_for(lambda: all(job.done for job in jobs), timeout)
+            return [job for job in jobs if job.done]
+
+    def shutdown(self, cancel=False):
+        """
+        Waits for all jobs to finish. If cancel is True, queued jobs are removed and running jobs are killed first
+        """
+        if cancel:
+            with self.condition:
+                jobs = list(self.jobs)
+            for job in jobs:
+                self.cancel(job)
+        self.wait_all()
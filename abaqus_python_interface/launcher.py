@@ -0,0 +1,174 @@
+"""
+Launching of abaqus. The abaqus executable and the environment it runs in are resolved once per process, optionally by
+the shell of the user so that environment modules and aliases in the rc files are taken into account, and abaqus is
+then executed directly with a list of arguments without starting a shell for every call.
+"""
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import threading
+
+from abaqus_python_interface.processes import StderrTail, kill_process, read_stderr, stop_reader
+
+# Printed by the shell between the resolved command and the environment
+_marker = '__ABAQUS_PYTHON_INTERFACE__'
+
+# {(abq_command, shell, environment_shell): (executable_words, environment)}, shared by all launchers of the process
+_resolved = {}
+_resolve_lock = threading.Lock()
+
+
+class AbaqusLaunchError(RuntimeError):
+    """
+    Raised when abaqus cannot be started, exits with an error or does not finish within its timeout
+
+    command:        The command as a list of arguments
+    returncode:     The exit code, None if abaqus was not started or was killed at the timeout
+    stderr:         The captured standard error of abaqus
+    """
+    def __init__(self, command, message, returncode=None, stderr=''):
+        self.command = command
+        self.returncode = returncode
+        self.stderr = stderr
+        text = ' '.join(command) + ' ' + message
+        if stderr:
+            text += '\n' + stderr.strip()
+        super().__init__(text)
+
+
+class AbaqusLauncher:
+    """
+    Starts abaqus with a list of arguments
+    """
+    def __init__(self, abq_command, shell='/bin/bash', environment_shell='interactive', resolve_timeout=300.):
+        """
+        :param abq_command:         The command for launching abaqus, like abq2018, split into words like a shell would
+        :param shell:               Shell used for resolving the command and the environment
+        :param environment_shell:   'interactive' resolves the command and the environment in an interactive shell,
+                                    which reads the same rc files as a terminal, 'login' uses a login shell and None
+                                    uses the environment of this process without any shell
+        :param resolve_timeout:     Max time in seconds for the shell resolving the command
+        """
+        if environment_shell not in ('interactive', 'login', None):
+            raise ValueError("environment_shell must be 'interactive', 'login' or None")
+        self.abq_command = abq_command
+        self.shell = shell
+        self.environment_shell = environment_shell
+        self.resolve_timeout = resolve_timeout
+
+    def resolve(self):
+        """
+        Returns the command words of abaqus with the executable as an absolute path, and the environment of abaqus. The
+        result is cached for the process
+        """
+        key = (self.abq_command, self.shell, self.environment_shell)
+        with _resolve_lock:
+            if key not in _resolved:
+                _resolved[key] = self._resolve()
+            return _resolved[key]
+
+    def _resolve(self):
+        words = shlex.split(self.abq_command)
+        if not words:
+            raise ValueError("The abaqus command is empty")
+        if self.environment_shell is None:
+            environment = dict(os.environ)
+            resolved_command = ''
+        else:
+            resolved_command, environment = self._shell_environment(words[0])
+        if resolved_command.startswith('alias '):
+            # The value of an alias, alias abq2018='/opt/abaqus/Commands/abq2018'
+            words = shlex.split(resolved_command.split('=', 1)[1]) + words[1:]
+        elif os.path.isabs(resolved_command):
+            words = [resolved_command] + words[1:]
+        executable = shutil.which(words[0], path=environment.get('PATH', None))
+        if executable is None:
+            raise AbaqusLaunchError(words, "cannot be resolved to an executable, functions in the rc files are not "
+                                           "supported, give the path to abaqus instead")
+        return [executable] + words[1:], environment
+
+    def _shell_environment(self, command_name):
+        script = ('echo ' + _marker + '; command -v ' + shlex.quote(command_name) + '; echo ' + _marker + '; '
+                  + shlex.quote(sys.executable) + ' -c "import json, os; print(json.dumps(dict(os.environ)))"')
+        flag = '-ic' if self.environment_shell == 'interactive' else '-lc'
+        try:
+            job = subprocess.run([self.shell, flag, script], stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                 stderr=subprocess.PIPE, timeout=self.resolve_timeout, start_new_session=True)
+        except subprocess.TimeoutExpired as e:
+            raise AbaqusLaunchError([self.shell, flag, script], "did not finish within " + str(self.resolve_timeout)
+                                    + " s") from e
+        except OSError as e:
+            raise AbaqusLaunchError([self.shell, flag, script], "could not be started: " + str(e)) from e
+        # The rc files may print to stdout before the markers
+        parts = job.stdout.decode(errors='replace').split(_marker + '\n')
+        try:
+            environment = json.loads(parts[2].strip().splitlines()[-1])
+        except (IndexError, ValueError):
+            raise AbaqusLaunchError([self.shell, flag, script], "did not report the environment",
+                                    job.returncode, job.stderr.decode(errors='replace'))
+        return parts[1].strip(), environment
+
+    def command(self, arguments):
+        """
+        Returns the command starting abaqus with arguments, like ['python', 'script.py'], as a list
+        """
+        words, _ = self.resolve()
+        return words + [str(argument) for argument in arguments]
+
+    def environment(self, environment=None):
+        """
+        Returns the environment of abaqus with the variables in environment added
+        """
+        _, resolved_environment = self.resolve()
+        return dict(resolved_environment, **environment) if environment else dict(resolved_environment)
+
+    def popen(self, arguments, directory=None, environment=None, **kwargs):
+        """
+        Starts abaqus and returns the subprocess.Popen, kwargs are passed to Popen
+        """
+        command = self.command(arguments)
+        try:
+            return subprocess.Popen(command, cwd=directory, env=self.environment(environment), **kwargs)
+        except OSError as e:
+            raise AbaqusLaunchError(command, "could not be started: " + str(e)) from e
+
+    def run(self, arguments, directory=None, environment=None, output=True, timeout=None):
+        """
+        Runs abaqus until it exits. The standard error is written to sys.stderr as it arrives if output is True, and
+        its end is kept for AbaqusLaunchError
+
+        :param arguments:   The arguments to abaqus, like ['python', 'script.py']
+        :param directory:   Working directory of abaqus
+        :param environment: Variables added to the environment of abaqus
+        :param output:      Flag if the output from abaqus should be shown
+        :param timeout:     Max time in seconds, abaqus and the processes it started are killed at the timeout
+        :return:            The exit code, AbaqusLaunchError is raised if it is not 0
+        """
+        process = self.popen(arguments, directory, environment, stdin=subprocess.DEVNULL,
+                             stdout=None if output else subprocess.DEVNULL, stderr=subprocess.PIPE,
+                             start_new_session=True)
+        stderr_tail = StderrTail(output)
+        stop = threading.Event()
+        reader = threading.Thread(target=read_stderr, args=(process.stderr, stderr_tail, stop), daemon=True)
+        reader.start()
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            kill_process(process)
+            process.wait()
+            stop_reader(reader, stop)
+            raise AbaqusLaunchError(process.args, "did not finish within " + str(timeout) + " s", None,
+                                    stderr_tail.text())
+        except BaseException:
+            kill_process(process)
+            process.wait()
+            stop.set()
+            raise
+        stop_reader(reader, stop)
+        if process.returncode != 0:
+            raise AbaqusLaunchError(process.args, "exited with code " + str(process.returncode),
+                                    process.returncode, stderr_tail.text())
+        return process.returncode
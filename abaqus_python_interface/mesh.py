@@ -0,0 +1,83 @@
+"""
+Array based representation of the mesh of an odb instance
+"""
+from collections import namedtuple
+
+import hashlib
+
+import numpy as np
+
+ElementBlock = namedtuple('ElementBlock', ['labels', 'connectivity'])
+
+
+class Mesh:
+    """
+    The nodes and elements of an instance, or a part of it, stored as arrays. The elements are stored per element
+    type as an ElementBlock with the element labels and the connectivity, one row of node labels per element, and all
+    element types share the node arrays.
+    """
+    def __init__(self, node_labels, node_coordinates, elements):
+        """
+        :param node_labels:         Array with the node labels
+        :param node_coordinates:    Array with one row of coordinates per node
+        :param elements:            A dict {element_type: (element_labels, connectivity)}
+        """
+        self.node_labels = np.asarray(node_labels, dtype=int)
+        self.node_coordinates = np.asarray(node_coordinates)
+        self.elements = {element_type: ElementBlock(np.asarray(labels, dtype=int), np.asarray(connectivity, dtype=int))
+                         for element_type, (labels, connectivity) in elements.items()}
+        self._node_order = np.argsort(self.node_labels, kind='stable')
+        self._sorted_node_labels = self.node_labels[self._node_order]
+        self._fingerprint = None
+
+    def __repr__(self):
+        return ('Mesh(' + str(self.node_labels.shape[0]) + ' nodes, '
+                + ', '.join(str(block.labels.shape[0]) + ' ' + element_type
+                            for element_type, block in self.elements.items()) + ')')
+
+    @property
+    def element_types(self):
+        return list(self.elements.keys())
+
+    @property
+    def fingerprint(self):
+        """
+        Hash of the nodes and elements, equal meshes in different odb files have the same fingerprint
+        """
+        if self._fingerprint is None:
+            fingerprint = hashlib.sha1()
+            for array in [self.node_labels, self.node_coordinates]:
+                fingerprint.update(np.ascontiguousarray(array).tobytes())
+            for element_type in sorted(self.elements):
+                fingerprint.update(element_type.encode())
+                for array in self.elements[element_type]:
+                    fingerprint.update(np.ascontiguousarray(array).tobytes())
+            self._fingerprint = fingerprint.hexdigest()
+        return self._fingerprint
+
+    def node_indices(self, labels):
+        """
+        Returns the rows in node_coordinates for an array of node labels, of any shape
+        """
+        labels = np.asarray(labels, dtype=int)
+        positions = np.searchsorted(self._sorted_node_labels, labels)
+        positions = np.minimum(positions, max(self._sorted_node_labels.shape[0] - 1, 0))
+        if labels.size and (self._sorted_node_labels.shape[0] == 0
+                            or np.any(self._sorted_node_labels[positions] != labels)):
+            raise KeyError("Node labels not present in the mesh")
+        return self._node_order[positions]
+
+    def element_coordinates(self, element_type):
+        """
+        Returns an array of shape (elements, nodes per element, dimensions) with the nodal coordinates of the elements
+        of a type, in the order of the labels in elements[element_type]
+        """
+        return self.node_coordinates[self.node_indices(self.elements[element_type].connectivity)]
+
+    def as_dict(self):
+        """
+        Returns the mesh in the format {element_type: {element_label: element_coordinates}} where element_coordinates
+        is an array with the nodal coordinates of the element in the standard ordering of the nodes
+        """
+        return {element_type: dict(zip(block.labels.tolist(), self.element_coordinates(element_type)))
+                for element_type, block in self.elements.items()}
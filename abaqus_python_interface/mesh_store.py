@@ -0,0 +1,171 @@
+"""
+Local store of the geometry of an odb, the mesh of all instances, the node and element sets and the datum coordinate
+systems, saved as a .npz file next to the odb. Geometry queries are answered from the store without launching abaqus.
+"""
+import os
+import pathlib
+
+import numpy as np
+
+from abaqus_python_interface.mesh import Mesh
+
+# Separator between the parts of the array names in the .npz file
+_separator = '|'
+
+
+def mesh_store_file(odb_file_name):
+    odb_file_name = pathlib.Path(odb_file_name)
+    return odb_file_name.with_name(odb_file_name.stem + '_mesh.npz')
+
+
+class OdbGeometry:
+    """
+    The geometry of an odb as exported by export_mesh.py
+
+    instances:      A dict {instance_name: Mesh}
+    node_sets:      A dict {instance_name: {set_name: node_labels}}. The sets on the rootAssembly are stored under the
+                    instance_name None as {set_name: {instance_name: node_labels}}
+    element_sets:   As node_sets for the element sets
+    datum_systems:  A dict {name: {"system_type", "origin", "x_axis", "y_axis", "z_axis"}}
+    """
+    def __init__(self, instances, node_sets, element_sets, datum_systems):
+        self.instances = instances
+        self.node_sets = node_sets
+        self.element_sets = element_sets
+        self.datum_systems = datum_systems
+
+    @staticmethod
+    def from_export(data):
+        instances = {instance_name: Mesh(instance['node_labels'], instance['node_coordinates'],
+                                         {element_type: (block['labels'], block['connectivity'])
+                                          for element_type, block in instance['elements'].items()})
+                     for instance_name, instance in data['instances'].items()}
+        return OdbGeometry(instances, data['node_sets'], data['element_sets'], data['datum_systems'])
+
+    def root_assembly(self):
+        """
+        Returns the names of the instances and sets in the same format as "rootAssembly" in ABQInterface.get_odb_summary
+        """
+        return {
+            "instances": {instance_name: {"nodeSets": list(self.node_sets.get(instance_name, {})),
+                                          "elementSets": list(self.element_sets.get(instance_name, {}))}
+                          for instance_name in self.instances},
+            "nodeSets": list(self.node_sets.get(None, {})),
+            "elementSets": list(self.element_sets.get(None, {}))
+        }
+
+    def _instance_set(self, sets, set_name, instance_name):
+        if instance_name is not None:
+            return instance_name, np.asarray(sets[instance_name][set_name], dtype=int)
+        labels_by_instance = sets[None][set_name]
+        if len(labels_by_instance) != 1:
+            raise ValueError("The set " + set_name + " contains objects from several instances")
+        instance_name, labels = next(iter(labels_by_instance.items()))
+        return instance_name, np.asarray(labels, dtype=int)
+
+    def mesh(self, element_set=None, instance_name=None):
+        """
+        Returns the Mesh of an instance or of the elements in an element set, see ABQInterface.get_mesh
+        """
+        if not element_set:
+            return self.instances[instance_name]
+        instance_name, set_labels = self._instance_set(self.element_sets, element_set, instance_name)
+        mesh = self.instances[instance_name]
+        elements = {}
+        for element_type, block in mesh.elements.items():
+            in_set = np.isin(block.labels, set_labels)
+            if np.any(in_set):
+                elements[element_type] = (block.labels[in_set], block.connectivity[in_set])
+        used_nodes = np.isin(mesh.node_labels, np.concatenate(
+            [connectivity.ravel() for _, connectivity in elements.values()] + [np.zeros(0, dtype=int)]))
+        return Mesh(mesh.node_labels[used_nodes], mesh.node_coordinates[used_nodes], elements)
+
+    def nodal_coordinates(self, node_set_name, instance_name=None):
+        """
+        Returns the coordinates of the nodes in a node set as a dict {node_label: coordinates}
+        """
+        instance_name, labels = self._instance_set(self.node_sets, node_set_name, instance_name)
+        mesh = self.instances[instance_name]
+        return dict(zip(labels.tolist(), mesh.node_coordinates[mesh.node_indices(labels)]))
+
+
+def _key(*parts):
+    return _separator.join(parts)
+
+
+def save(odb_file_name, geometry, stamp):
+    """
+    Writes the geometry to the store of an odb together with the stamp, see odb_cache.odb_stamp, of the odb it was
+    exported from. Returns False if the store could not be written, for instance if the directory is read only
+    """
+    arrays = {'stamp': np.array(stamp, dtype=np.int64)}
+    for instance_name, mesh in geometry.instances.items():
+        arrays[_key('instance', instance_name, 'node_labels')] = mesh.node_labels
+        arrays[_key('instance', instance_name, 'node_coordinates')] = mesh.node_coordinates
+        for element_type, block in mesh.elements.items():
+            arrays[_key('instance', instance_name, 'elements', element_type, 'labels')] = block.labels
+            arrays[_key('instance', instance_name, 'elements', element_type, 'connectivity')] = block.connectivity
+    for set_type, sets in [('node_set', geometry.node_sets), ('element_set', geometry.element_sets)]:
+        for instance_name, instance_sets in sets.items():
+            for set_name, labels in instance_sets.items():
+                if instance_name is None:
+                    for labels_instance, instance_labels in labels.items():
+                        arrays[_key('root_' + set_type, set_name, labels_instance)] = instance_labels
+                else:
+                    arrays[_key(set_type, instance_name, set_name)] = labels
+    for system_name, system in geometry.datum_systems.items():
+        for name, value in system.items():
+            arrays[_key('datum_system', system_name, name)] = np.asarray(value)
+
+    store_file = mesh_store_file(odb_file_name)
+    temp_file = store_file.with_name(store_file.name + '.' + str(os.getpid()) + '.tmp')
+    try:
+        with open(temp_file, 'wb') as npz_file:
+            np.savez(npz_file, **arrays)
+        os.replace(temp_file, store_file)
+    except OSError:
+        try:
+            temp_file.unlink()
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def load(odb_file_name):
+    """
+    Reads the store of an odb
+
+    :return:    The tuple (geometry, stamp) where stamp is the stamp of the odb the geometry was exported from, or
+                None if there is no readable store
+    """
+    try:
+        with np.load(mesh_store_file(odb_file_name), allow_pickle=False) as npz_file:
+            arrays = {key: npz_file[key] for key in npz_file.files}
+    except (OSError, ValueError, KeyError):
+        return None
+    stamp = tuple(int(value) for value in arrays.pop('stamp'))
+    instances, node_sets, element_sets, datum_systems = {}, {None: {}}, {None: {}}, {}
+    for key, value in arrays.items():
+        parts = key.split(_separator)
+        if parts[0] == 'instance':
+            instances.setdefault(parts[1], {'elements': {}})
+            if parts[2] == 'elements':
+                instances[parts[1]]['elements'].setdefault(parts[3], {})[parts[4]] = value
+            else:
+                instances[parts[1]][parts[2]] = value
+        elif parts[0] in ('node_set', 'element_set'):
+            sets = node_sets if parts[0] == 'node_set' else element_sets
+            sets.setdefault(parts[1], {})[parts[2]] = value
+        elif parts[0] in ('root_node_set', 'root_element_set'):
+            sets = node_sets if parts[0] == 'root_node_set' else element_sets
+            sets[None].setdefault(parts[1], {})[parts[2]] = value
+        elif parts[0] == 'datum_system':
+            datum_systems.setdefault(parts[1], {})[parts[2]] = value if value.shape else value.item()
+    for instance_name in instances:
+        node_sets.setdefault(instance_name, {})
+        element_sets.setdefault(instance_name, {})
+    geometry = OdbGeometry.from_export({'instances': instances, 'node_sets': node_sets,
+                                        'element_sets': element_sets, 'datum_systems': datum_systems})
+    return geometry, stamp
+
@@ -0,0 +1,116 @@
+import copy
+import hashlib
+import os
+import pathlib
+import pickle
+import threading
+
+default_cache_directory = pathlib.Path(os.environ.get('ABAQUS_PYTHON_INTERFACE_CACHE',
+                                                      '~/.cache/abaqus_python_interface')).expanduser()
+
+
+def odb_stamp(odb_file_name):
+    stat = os.stat(odb_file_name)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class OdbMetadataCache:
+    """
+    Cache of metadata for odb files, like the dict from odb_as_dict.py, in memory and pickled in a cache directory so
+    that it survives between python processes. The entries for an odb are valid as long as the size and modification
+    time of the odb file are unchanged. Changes made by ABQInterface are patched into the cache with patch. The cache
+    can be shared between threads.
+    """
+    def __init__(self, cache_directory=None):
+        """
+        :param cache_directory: Directory for the cache files. Default is None which uses the environment variable
+                                ABAQUS_PYTHON_INTERFACE_CACHE or ~/.cache/abaqus_python_interface. False keeps the
+                                cache in memory only
+        """
+        if cache_directory is None:
+            cache_directory = default_cache_directory
+        self.cache_directory = pathlib.Path(cache_directory) if cache_directory is not False else None
+        self.entries = {}
+        self.lock = threading.RLock()
+
+    def _cache_file(self, odb_file_name):
+        return self.cache_directory / (hashlib.sha1(str(odb_file_name).encode()).hexdigest() + '.pkl')
+
+    def _entry(self, odb_file_name):
+        odb_file_name = pathlib.Path(odb_file_name)
+        entry = self.entries.get(odb_file_name, None)
+        if entry is None and self.cache_directory is not None:
+            try:
+                with open(self._cache_file(odb_file_name), 'rb') as cache_file:
+                    entry = pickle.load(cache_file)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                entry = None
+            if entry is not None and entry['odb_file_name'] != str(odb_file_name):
+                entry = None
+        return entry
+
+    def _store(self, odb_file_name, entry):
+        odb_file_name = pathlib.Path(odb_file_name)
+        self.entries[odb_file_name] = entry
+        if self.cache_directory is not None:
+            try:
+                self.cache_directory.mkdir(parents=True, exist_ok=True)
+                cache_file_name = self._cache_file(odb_file_name)
+                temp_file_name = cache_file_name.with_suffix('.' + str(os.getpid()) + '.tmp')
+                with open(temp_file_name, 'wb') as cache_file:
+                    pickle.dump(entry, cache_file)
+                os.replace(temp_file_name, cache_file_name)
+            except OSError:
+                pass
+
+    def get(self, odb_file_name, key):
+        """
+        Returns the cached value for key or None if it is missing or the odb file has changed
+        """
+        with self.lock:
+            entry = self._entry(odb_file_name)
+            if entry is None or entry['stamp'] != odb_stamp(odb_file_name):
+                return None
+            self.entries[pathlib.Path(odb_file_name)] = entry
+            return entry['data'].get(key, None)
+
+    def put(self, odb_file_name, key, value):
+        with self.lock:
+            stamp = odb_stamp(odb_file_name)
+            entry = self._entry(odb_file_name)
+            if entry is None or entry['stamp'] != stamp:
+                entry = {'odb_file_name': str(odb_file_name), 'stamp': stamp, 'data': {}}
+            entry['data'][key] = value
+            self._store(odb_file_name, entry)
+
+    def patch(self, odb_file_name, stamp, update):
+        """
+        Updates the entries of an odb after it has been modified by this library
+
+        :param odb_file_name:   Name of the modified odb file
+        :param stamp:           The stamp of the odb file before the modification, see odb_stamp. The entries are
+                                dropped instead if they were cached for another version of the odb file
+        :param update:          Function taking a copy of the dict {key: value} with the values cached before the
+                                modification and returning the values valid after it. Values that cannot be patched
+                                should be left out
+        """
+        with self.lock:
+            entry = self._entry(odb_file_name)
+            if entry is None:
+                return
+            if entry['stamp'] != stamp:
+                self.invalidate(odb_file_name)
+                return
+            data = update(copy.deepcopy(entry['data']))
+            self._store(odb_file_name, {'odb_file_name': str(odb_file_name), 'stamp': odb_stamp(odb_file_name),
+                                        'data': data})
+
+    def invalidate(self, odb_file_name):
+        with self.lock:
+            odb_file_name = pathlib.Path(odb_file_name)
+            self.entries.pop(odb_file_name, None)
+            if self.cache_directory is not None:
+                try:
+                    self._cache_file(odb_file_name).unlink()
+                except OSError:
+                    pass
@@ -0,0 +1,143 @@
+"""
+The parameters of the requests sent to the abaqus python scripts and the validation of steps, frames, fields and sets
+against the odb metadata, shared by ABQInterface and AsyncABQInterface
+"""
+import pathlib
+
+import numpy as np
+
+
+class OdbReadingError(KeyError):
+    pass
+
+
+class OdbWritingError(ValueError):
+    pass
+
+
+def field_parameters(field_id, step_name, frame_number, set_name, instance_name, position, invariant,
+                     coordinate_system, deform_system):
+    parameter_data = {
+        'field_id': field_id,
+        'step_name': step_name,
+        'frame_number': frame_number,
+        'set_name': set_name,
+        'instance_name': instance_name,
+        'position': position,
+        'invariant': invariant,
+        'deform_system': deform_system
+    }
+    if coordinate_system:
+        if isinstance(coordinate_system, str):
+            parameter_data['coordinate_system'] = coordinate_system
+        else:
+            parameter_data['coordinate_system'] = coordinate_system._asdict()
+    return parameter_data
+
+
+def field_results(data, get_position_numbers, get_frame_value):
+    if not get_position_numbers and not get_frame_value:
+        return data['data']
+    elif not get_position_numbers:
+        return data['data'], data['frame_value']
+    elif not get_frame_value:
+        return data['data'], data['node_labels'], data['element_labels']
+    else:
+        return data['data'], data['frame_value'], data['node_labels'], data['element_labels']
+
+
+def resolve_frame(odb_summary, odb_file_name, step_name, frame_number):
+    steps = odb_summary["steps"]
+    if step_name is None:
+        if len(steps) == 0:
+            raise OdbReadingError("The odb file " + str(odb_file_name) + " does not contain any steps")
+        step_name = list(steps.keys())[-1]
+    elif step_name not in steps:
+        raise OdbReadingError("The step " + step_name + " does not exist in the odb file " + str(odb_file_name))
+    frame_count = steps[step_name]["frame_count"]
+    if frame_number == -1:
+        frame_number = frame_count - 1
+    if not 0 <= frame_number < frame_count:
+        raise OdbReadingError("The frame number " + str(frame_number) + " does not exist in the step " + step_name +
+                              " in the odb file " + str(odb_file_name))
+    return step_name, frame_number
+
+
+def check_field(frame_fields, odb_file_name, step_name, frame_number, field_id):
+    if field_id is not None and field_id not in frame_fields:
+        raise OdbReadingError("The field " + field_id + " is not present in the frame " + str(frame_number)
+                              + " in step " + step_name + " in the odb file " + str(odb_file_name))
+
+
+def resolve_set(odb_summary, odb_file_name, instance_name, set_name, position='INTEGRATION_POINT'):
+    set_type = "elementSets"
+    if position == "NODAL":
+        set_type = "nodeSets"
+    if not instance_name:
+        if set_name in odb_summary["rootAssembly"][set_type]:
+            return None, set_name
+        if len(odb_summary["rootAssembly"]["instances"]) == 1:
+            instance_name = next(iter(odb_summary["rootAssembly"]["instances"]))
+            if not set_name or set_name in odb_summary["rootAssembly"]["instances"][instance_name][set_type]:
+                return instance_name, set_name
+        raise OdbReadingError(
+            "The " + set_type[:-1] + " " + set_name + " is not present in the rootAssembly of the  odb "
+            + str(odb_file_name) + " or if there is several instances in the odb file, specify an instance"
+        )
+    else:
+        if instance_name not in odb_summary["rootAssembly"]["instances"]:
+            raise OdbReadingError(
+                "The instance " + instance_name + " is not present in the odb " + str(odb_file_name)
+            )
+        if set_name and set_name not in odb_summary["rootAssembly"]["instances"][instance_name][set_type]:
+            raise OdbReadingError(
+                "The " + set_type[:-1] + " " + set_name + " is not present in the instance " + instance_name
+                + " in the odb file " + str(odb_file_name)
+            )
+    return instance_name, set_name
+
+
+def write_parameters(field_data, field_id, odb_file_name, step_name, instance_name, set_name, step_description,
+                     frame_number, frame_value, field_description, position, invariants, labels):
+    return {
+        'field_data': np.asarray(field_data),
+        'labels': None if labels is None else np.asarray(labels, dtype=int),
+        'field_id': field_id,
+        'odb_file': str(odb_file_name),
+        'step_name': step_name,
+        'instance_name': instance_name,
+        'set_name': set_name,
+        'step_description': step_description,
+        'frame_number': frame_number,
+        'frame_value': frame_value,
+        'field_description': field_description,
+        'position': position,
+        'invariants': invariants if invariants is not None else []
+    }
+
+
+def path_parameters(odb_file_name, variable, path_points_filename, data_filename, component, step_name,
+                    frame_numbers, output_position, components=None):
+    parameter_dict = {
+        'odb_filename': str(odb_file_name),
+        'variable': str(variable),
+        'path_points_filename': str(path_points_filename),
+        'data_filename': str(data_filename)
+    }
+    if component is not None:
+        parameter_dict['component'] = component
+    if components is not None:
+        parameter_dict['components'] = list(components)
+    if step_name is not None:
+        parameter_dict['step_name'] = step_name
+    if frame_numbers is not None:
+        parameter_dict['frame_numbers'] = frame_numbers
+    parameter_dict['output_position'] = output_position
+    return parameter_dict
+
+
+def check_odb_file(odb_file_name, exists=True):
+    odb_path = pathlib.Path(odb_file_name).absolute().expanduser()
+    if not odb_path.is_file() and exists:
+        raise OdbReadingError("The odb file " + str(odb_file_name) + " does not exist")
+    return odb_path
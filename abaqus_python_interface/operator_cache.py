@@ -0,0 +1,132 @@
+from collections import OrderedDict
+
+import hashlib
+import os
+import pathlib
+import threading
+
+import numpy as np
+
+from abaqus_python_interface.odb_cache import default_cache_directory
+from abaqus_python_interface.path_engine import InterpolationOperator
+
+
+def operator_key(*parts):
+    """
+    Returns a hash of strings and arrays, like the fingerprint of a mesh, the points and the output position, used as
+    the key of an interpolation operator
+    """
+    key = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            part = np.ascontiguousarray(part)
+            key.update((str(part.dtype) + str(part.shape)).encode())
+            key.update(part.tobytes())
+        else:
+            key.update(repr(part).encode())
+        key.update(b'|')
+    return key.hexdigest()
+
+
+class OperatorCache:
+    """
+    Cache of interpolation operators, see path_engine, in memory and as .npz files in a cache directory so that the
+    point location is done once for the same mesh and points, also across python processes and odb files. The least
+    recently used operators are evicted when the size of the operators exceeds max_bytes, in memory and on disk
+    separately. The cache can be shared between threads.
+    """
+    def __init__(self, cache_directory=None, max_bytes=256*2**20):
+        """
+        :param cache_directory: Directory for the operator files. Default is None which uses the directory operators
+                                in the cache directory of OdbMetadataCache. False keeps the cache in memory only
+        :param max_bytes:       Max size of the cached operators
+        """
+        if cache_directory is None:
+            cache_directory = default_cache_directory / 'operators'
+        self.cache_directory = pathlib.Path(cache_directory) if cache_directory is not False else None
+        self.max_bytes = max_bytes
+        self.operators = OrderedDict()
+        self.memory_bytes = 0
+        self.lock = threading.RLock()
+
+    def _operator_file(self, key):
+        return self.cache_directory / (key + '.npz')
+
+    def get(self, key):
+        """
+        Returns the operator stored under key or None if it is not cached
+        """
+        with self.lock:
+            operator = self.operators.get(key, None)
+            if operator is not None:
+                self.operators.move_to_end(key)
+                return operator
+            if self.cache_directory is None:
+                return None
+            operator_file = self._operator_file(key)
+            try:
+                with np.load(operator_file, allow_pickle=False) as npz_file:
+                    operator = InterpolationOperator(npz_file['rows'], npz_file['columns'], npz_file['weights'],
+                                                     npz_file['shape'])
+                # The modification time orders the files for the eviction
+                os.utime(operator_file)
+            except (OSError, ValueError, KeyError):
+                return None
+            self._keep(key, operator)
+            return operator
+
+    def put(self, key, operator):
+        with self.lock:
+            self._keep(key, operator)
+            if self.cache_directory is None:
+                return
+            try:
+                self.cache_directory.mkdir(parents=True, exist_ok=True)
+                operator_file = self._operator_file(key)
+                temp_file = operator_file.with_suffix('.' + str(os.getpid()) + '.tmp')
+                with open(temp_file, 'wb') as npz_file:
+                    np.savez(npz_file, rows=operator.rows, columns=operator.columns, weights=operator.weights,
+                             shape=np.array(operator.shape))
+                os.replace(temp_file, operator_file)
+                self._evict_files()
+            except OSError:
+                pass
+
+    def _keep(self, key, operator):
+        if key in self.operators:
+            self.memory_bytes -= self.operators.pop(key).nbytes
+        self.operators[key] = operator
+        self.memory_bytes += operator.nbytes
+        while self.memory_bytes > self.max_bytes and len(self.operators) > 1:
+            _, evicted = self.operators.popitem(last=False)
+            self.memory_bytes -= evicted.nbytes
+
+    def _evict_files(self):
+        files = []
+        for operator_file in self.cache_directory.glob('*.npz'):
+            try:
+                stat = operator_file.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, operator_file))
+        files.sort()
+        total_bytes = sum(size for _, size, _ in files)
+        for _, size, operator_file in files[:-1]:
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                operator_file.unlink()
+            except OSError:
+                pass
+            total_bytes -= size
+
+    def clear(self):
+        with self.lock:
+            self.operators.clear()
+            self.memory_bytes = 0
+            if self.cache_directory is not None:
+                for operator_file in self.cache_directory.glob('*.npz'):
+                    try:
+                        operator_file.unlink()
+                    except OSError:
+                        pass
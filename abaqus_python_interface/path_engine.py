@@ -0,0 +1,342 @@
+"""
+Interpolation of field data at arbitrary points, like the points of a path, without the abaqus viewer. The points are
+located in the elements of a Mesh by inverting the isoparametric mapping of the elements and the interpolation is
+stored as a sparse operator that is applied to the field data of all frames at once.
+"""
+import re
+import warnings
+
+import numpy as np
+
+# Natural coordinates of the corner nodes of the hexahedral elements in the abaqus node ordering
+_hex_corners = np.array([[-1, -1, -1], [1, -1, -1], [1, 1, -1], [-1, 1, -1],
+                         [-1, -1, 1], [1, -1, 1], [1, 1, 1], [-1, 1, 1]], dtype=float)
+# Node pairs of the edges of the hexahedral elements in the ordering of the midside nodes 9-20
+_hex_edges = [(0, 1), (1, 2), (2, 3), (3, 0), (4, 5), (5, 6), (6, 7), (7, 4), (0, 4), (1, 5), (2, 6), (3, 7)]
+_hex_midside = np.array([(_hex_corners[i] + _hex_corners[j])/2 for i, j in _hex_edges])
+# Node pairs of the edges of the tetrahedral elements in the ordering of the midside nodes 5-10
+_tet_edges = [(0, 1), (1, 2), (2, 0), (0, 3), (1, 3), (2, 3)]
+_quad_corners = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]], dtype=float)
+# Elements that overlap more cells of the spatial index are not put in the grid but checked against every point
+_max_cells_per_element = 64
+
+
+def _hex8(xi):
+    return np.prod(1 + xi[:, None, :]*_hex_corners, axis=2)/8
+
+
+def _hex20(xi):
+    corners = (np.prod(1 + xi[:, None, :]*_hex_corners, axis=2)/8
+               * (np.sum(xi[:, None, :]*_hex_corners, axis=2) - 2))
+    midside = np.prod(np.where(_hex_midside == 0, 1 - xi[:, None, :]**2, 1 + xi[:, None, :]*_hex_midside),
+                      axis=2)/4
+    return np.concatenate([corners, midside], axis=1)
+
+
+def _tet_coordinates(xi):
+    return np.column_stack([1 - xi.sum(axis=1), xi])
+
+
+def _tet10(xi):
+    volume_coordinates = _tet_coordinates(xi)
+    corners = volume_coordinates*(2*volume_coordinates - 1)
+    midside = np.column_stack([4*volume_coordinates[:, i]*volume_coordinates[:, j] for i, j in _tet_edges])
+    return np.concatenate([corners, midside], axis=1)
+
+
+def _wedge6(xi):
+    triangle = _tet_coordinates(xi[:, :2])
+    return np.concatenate([triangle*(1 - xi[:, 2:])/2, triangle*(1 + xi[:, 2:])/2], axis=1)
+
+
+def _quad4(xi):
+    return np.prod(1 + xi[:, None, :]*_quad_corners, axis=2)/4
+
+
+def _inside_box(xi, tolerance):
+    return np.all(np.abs(xi) <= 1 + tolerance, axis=1)
+
+
+def _inside_simplex(xi, tolerance):
+    return np.all(_tet_coordinates(xi) >= -tolerance, axis=1)
+
+
+def _inside_wedge(xi, tolerance):
+    return _inside_simplex(xi[:, :2], tolerance) & (np.abs(xi[:, 2]) <= 1 + tolerance)
+
+
+class _ElementFamily:
+    def __init__(self, shape_functions, dimensions, center, inside):
+        self.shape_functions = shape_functions
+        self.dimensions = dimensions
+        self.center = np.array(center, dtype=float)
+        self.inside = inside
+
+    def derivatives(self, xi, step=1e-6):
+        """
+        Derivatives of the shape functions with respect to the natural coordinates, shape (points, nodes, dimensions)
+        by central differences, which are exact to round off for the polynomials used by the elements
+        """
+        columns = []
+        for i in range(self.dimensions):
+            offset = np.zeros(self.dimensions)
+            offset[i] = step
+            columns.append((self.shape_functions(xi + offset) - self.shape_functions(xi - offset))/(2*step))
+        return np.stack(columns, axis=2)
+
+
+_families = {
+    ('3D', 8): _ElementFamily(_hex8, 3, [0, 0, 0], _inside_box),
+    ('3D', 20): _ElementFamily(_hex20, 3, [0, 0, 0], _inside_box),
+    ('3D', 4): _ElementFamily(_tet_coordinates, 3, [0.25, 0.25, 0.25], _inside_simplex),
+    ('3D', 10): _ElementFamily(_tet10, 3, [0.25, 0.25, 0.25], _inside_simplex),
+    ('3D', 6): _ElementFamily(_wedge6, 3, [1/3, 1/3, 0], _inside_wedge),
+    ('2D', 4): _ElementFamily(_quad4, 2, [0, 0], _inside_box),
+    ('2D', 3): _ElementFamily(_tet_coordinates, 2, [1/3, 1/3], _inside_simplex),
+}
+
+
+def element_family(element_type):
+    """
+    Returns the interpolation of an abaqus element type or None if the element type is not supported. Continuum
+    elements of the types C3D4, C3D6, C3D8, C3D10, C3D20 and the plane and axisymmetric elements with three or four
+    nodes are supported, with any suffix like C3D8R or CPE4H
+    """
+    match = re.match(r'^(C3D|CPE|CPS|CAX|CPEG|CGAX)(\d+)', element_type)
+    if match is None:
+        return None
+    return _families.get(('3D' if match.group(1) == 'C3D' else '2D', int(match.group(2))), None)
+
+
+class PointLocations:
+    """
+    The elements containing a set of points and the values of the shape functions of the elements at the points
+
+    element_types:  Array with the element type of the element containing each point, '' if the point is outside the
+                    mesh
+    element_labels: Array with the label of the element containing each point, -1 if the point is outside the mesh
+    node_labels:    List with an array of the node labels of the element for each point, empty outside the mesh
+    shape_values:   List with an array of the shape function values, the interpolation weights of the nodes, for each
+                    point
+    """
+    def __init__(self, element_types, element_labels, node_labels, shape_values):
+        self.element_types = element_types
+        self.element_labels = element_labels
+        self.node_labels = node_labels
+        self.shape_values = shape_values
+
+    @property
+    def found(self):
+        return self.element_labels >= 0
+
+
+def _inverse_mapping(family, element_coordinates, point, iterations=25, tolerance=1e-10):
+    # Newton iterations for all candidate elements at the same time
+    xi = np.tile(family.center, (element_coordinates.shape[0], 1))
+    for _ in range(iterations):
+        residual = np.einsum('en,end->ed', family.shape_functions(xi), element_coordinates) - point
+        jacobian = np.einsum('enk,end->edk', family.derivatives(xi), element_coordinates)
+        try:
+            step = np.linalg.solve(jacobian, residual[..., None])[..., 0]
+        except np.linalg.LinAlgError:
+            return None
+        xi -= step
+        if np.max(np.abs(step)) < tolerance:
+            break
+    return xi
+
+
+class _CellIndex:
+    """
+    Spatial index of element bounding boxes. Every element is put in all cells of a grid that its bounding box
+    overlaps, the cells are as large as a typical element so that few elements share a cell also when the element sizes
+    are graded. The elements are sorted by cell id and the elements of a cell are found by a binary search
+    """
+    def __init__(self, lower, upper):
+        self.cell_size = np.maximum(np.median(upper - lower, axis=0), 1e-12)
+        # Coarser cells if the cell ids of the grid would not fit in 64 bit integers
+        extent = (upper.max(axis=0) - lower.min(axis=0))/self.cell_size + 2
+        self.cell_size *= max(1., (np.prod(extent)/2.**62)**(1./lower.shape[1]))
+        first_cells = np.floor(lower/self.cell_size).astype(np.int64)
+        last_cells = np.floor(upper/self.cell_size).astype(np.int64)
+        self.origin = first_cells.min(axis=0)
+        self.shape = last_cells.max(axis=0) + 1 - self.origin
+        cell_counts = last_cells - first_cells + 1
+        element_cells = np.prod(cell_counts, axis=1)
+        gridded = element_cells <= _max_cells_per_element
+        self.large_elements = np.flatnonzero(~gridded)
+        # One entry per cell of every element, remainder is the position of the cell within the box of its element
+        elements = np.repeat(np.flatnonzero(gridded), element_cells[gridded])
+        starts = np.cumsum(element_cells[gridded]) - element_cells[gridded]
+        remainder = np.arange(elements.shape[0]) - np.repeat(starts, element_cells[gridded])
+        cells = np.empty((elements.shape[0], lower.shape[1]), dtype=np.int64)
+        for axis in reversed(range(lower.shape[1])):
+            cells[:, axis] = first_cells[elements, axis] + remainder % cell_counts[elements, axis]
+            remainder //= cell_counts[elements, axis]
+        cell_ids = self._cell_ids(cells)
+        order = np.argsort(cell_ids, kind='stable')
+        self.cell_ids = cell_ids[order]
+        self.elements = elements[order]
+
+    def _cell_ids(self, cells):
+        cell_ids = np.zeros(cells.shape[0], dtype=np.int64)
+        for axis in range(cells.shape[1]):
+            cell_ids = cell_ids*self.shape[axis] + cells[:, axis] - self.origin[axis]
+        return cell_ids
+
+    def candidates(self, point):
+        """
+        Returns the indices of the elements in the cell of a point and of the elements that overlap too many cells
+        """
+        cell = np.floor(point/self.cell_size).astype(np.int64)
+        if np.any(cell < self.origin) or np.any(cell >= self.origin + self.shape):
+            return self.large_elements
+        cell_id = self._cell_ids(cell[None, :])[0]
+        start = np.searchsorted(self.cell_ids, cell_id, side='left')
+        end = np.searchsorted(self.cell_ids, cell_id, side='right')
+        return np.concatenate([self.elements[start:end], self.large_elements])
+
+
+def locate_points(mesh, points, tolerance=1e-6):
+    """
+    Finds the elements of a mesh that contain the points
+
+    :param mesh:        A Mesh
+    :param points:      Array of shape (points, dimensions) with the coordinates of the points
+    :param tolerance:   Tolerance in natural coordinates for points on the boundary of an element
+    :return:            A PointLocations, points in several elements are assigned to the first element found
+    """
+    points = np.asarray(points, dtype=float).reshape(len(points), -1)
+    element_types = np.full(points.shape[0], '', dtype=object)
+    element_labels = np.full(points.shape[0], -1, dtype=int)
+    node_labels = [np.zeros(0, dtype=int) for _ in range(points.shape[0])]
+    shape_values = [np.zeros(0) for _ in range(points.shape[0])]
+    unsupported_types = []
+    for element_type, block in mesh.elements.items():
+        family = element_family(element_type)
+        if family is None and block.labels.shape[0] > 0:
+            unsupported_types.append(element_type)
+        if family is None or block.labels.shape[0] == 0:
+            continue
+        element_coordinates = mesh.element_coordinates(element_type)[:, :, :family.dimensions]
+        block_points = points[:, :family.dimensions]
+        lower, upper = element_coordinates.min(axis=1), element_coordinates.max(axis=1)
+        margin = tolerance*(upper - lower)
+        lower, upper = lower - margin, upper + margin
+        index = _CellIndex(lower, upper)
+        for point_index in np.flatnonzero(element_labels < 0):
+            point = block_points[point_index]
+            candidates = index.candidates(point)
+            in_box = np.all((point >= lower[candidates]) & (point <= upper[candidates]), axis=1)
+            candidates = candidates[in_box]
+            if candidates.shape[0] == 0:
+                continue
+            xi = _inverse_mapping(family, element_coordinates[candidates], point)
+            if xi is None:
+                continue
+            inside = np.flatnonzero(family.inside(xi, tolerance))
+            if inside.shape[0] == 0:
+                continue
+            element_index = candidates[inside[0]]
+            element_types[point_index] = element_type
+            element_labels[point_index] = block.labels[element_index]
+            node_labels[point_index] = block.connectivity[element_index]
+            shape_values[point_index] = family.shape_functions(xi[inside[:1]])[0]
+    if unsupported_types and np.any(element_labels < 0):
+        warnings.warn(str(np.count_nonzero(element_labels < 0)) + " points are not found in the mesh and the elements "
+                      "of the types " + ', '.join(unsupported_types) + " are not searched since their interpolation "
+                      "is not supported")
+    return PointLocations(element_types, element_labels, node_labels, shape_values)
+
+
+class InterpolationOperator:
+    """
+    Sparse matrix in coordinate format, with the weights of the rows of the field data for each point. Points outside
+    the mesh get the value nan
+    """
+    def __init__(self, rows, columns, weights, shape):
+        order = np.argsort(rows, kind='stable')
+        self.rows = np.asarray(rows, dtype=int)[order]
+        self.columns = np.asarray(columns, dtype=int)[order]
+        self.weights = np.asarray(weights, dtype=float)[order]
+        self.shape = tuple(shape)
+
+    def __repr__(self):
+        return ('InterpolationOperator(' + str(self.shape[0]) + ' points, ' + str(self.shape[1]) + ' field rows, '
+                + str(self.weights.shape[0]) + ' weights)')
+
+    @property
+    def nbytes(self):
+        return self.rows.nbytes + self.columns.nbytes + self.weights.nbytes
+
+    def apply(self, field_data, axis=0):
+        """
+        Interpolates field data at the points
+
+        :param field_data:  Array with the rows of the field data along axis, like (frames, rows, components) with
+                            axis=1 for many frames
+        :param axis:        The axis of the field data rows
+        :return:            Array with the same shape as field_data where the axis has the length of the points
+        """
+        field_data = np.moveaxis(np.asarray(field_data), axis, 0)
+        if field_data.shape[0] != self.shape[1]:
+            raise ValueError("The field data has " + str(field_data.shape[0]) + " rows but the operator expects "
+                             + str(self.shape[1]))
+        result = np.full((self.shape[0],) + field_data.shape[1:], np.nan)
+        if self.rows.shape[0]:
+            products = self.weights.reshape((-1,) + (1,)*(field_data.ndim - 1))*field_data[self.columns]
+            starts = np.flatnonzero(np.concatenate([[True], self.rows[1:] != self.rows[:-1]]))
+            result[self.rows[starts]] = np.add.reduceat(products, starts, axis=0)
+        return np.moveaxis(result, 0, axis)
+
+
+def _rows_of_labels(labels, wanted_labels):
+    order = np.argsort(labels, kind='stable')
+    positions = np.minimum(np.searchsorted(labels[order], wanted_labels), max(labels.shape[0] - 1, 0))
+    if wanted_labels.size and (labels.shape[0] == 0 or np.any(labels[order][positions] != wanted_labels)):
+        raise KeyError("The field data is missing for some of the elements or nodes containing the points")
+    return order[positions]
+
+
+def interpolation_operator(locations, position, node_labels=None, element_labels=None):
+    """
+    Builds the operator interpolating field data at the located points
+
+    :param locations:       PointLocations from locate_points
+    :param position:        The position of the field data, "NODAL", "ELEMENT_NODAL" or "CENTROID". ELEMENT_NODAL
+                            values are averaged at the nodes, like the default averaging in the abaqus viewer, before
+                            they are interpolated inside the element
+    :param node_labels:     The node label of each row of the field data for NODAL and ELEMENT_NODAL data
+    :param element_labels:  The element label of each row of the field data for ELEMENT_NODAL and CENTROID data
+    :return:                An InterpolationOperator
+    """
+    found = np.flatnonzero(locations.found)
+    point_count = locations.element_labels.shape[0]
+    if position == 'CENTROID':
+        element_labels = np.asarray(element_labels, dtype=int)
+        columns = _rows_of_labels(element_labels, locations.element_labels[found])
+        return InterpolationOperator(found, columns, np.ones(found.shape[0]), (point_count, element_labels.shape[0]))
+
+    node_labels = np.asarray(node_labels, dtype=int)
+    point_nodes = [locations.node_labels[i] for i in found]
+    rows = np.repeat(found, [nodes.shape[0] for nodes in point_nodes])
+    nodes = np.concatenate(point_nodes + [np.zeros(0, dtype=int)])
+    weights = np.concatenate([locations.shape_values[i] for i in found] + [np.zeros(0)])
+    if position == 'NODAL':
+        return InterpolationOperator(rows, _rows_of_labels(node_labels, nodes), weights,
+                                     (point_count, node_labels.shape[0]))
+    if position != 'ELEMENT_NODAL':
+        raise ValueError("The position " + str(position) + " is not supported, use NODAL, ELEMENT_NODAL or CENTROID")
+
+    # Each node of the elements takes the mean of the element nodal values of all elements sharing the node
+    order = np.argsort(node_labels, kind='stable')
+    sorted_labels = node_labels[order]
+    starts = np.searchsorted(sorted_labels, nodes, side='left')
+    counts = np.searchsorted(sorted_labels, nodes, side='right') - starts
+    if np.any(counts == 0):
+        raise KeyError("The field data is missing for some of the nodes of the elements containing the points")
+    expanded = np.repeat(np.arange(nodes.shape[0]), counts)
+    offsets = np.arange(expanded.shape[0]) - np.repeat(np.cumsum(counts) - counts, counts)
+    columns = order[starts[expanded] + offsets]
+    return InterpolationOperator(rows[expanded], columns, (weights/counts)[expanded],
+                                 (point_count, node_labels.shape[0]))
@@ -0,0 +1,98 @@
+"""
+Handling of the processes of abaqus, shared by AbaqusLauncher, AsyncABQInterface and JobScheduler: killing abaqus
+together with the processes it started and reading its standard error without waiting for processes that abaqus
+started in the background.
+"""
+import asyncio
+import codecs
+import os
+import select
+import signal
+import sys
+
+# Size of the end of the standard error of abaqus that is kept for AbaqusLaunchError
+stderr_tail_bytes = 64*1024
+# Max time in seconds the standard error is read after abaqus has exited, processes started by abaqus in the
+# background may keep it open
+stderr_join_timeout = 5.
+
+
+def kill_process(process):
+    """
+    Kills a subprocess.Popen or an asyncio process started in a new session, and the processes it started
+    """
+    if process.returncode is not None:
+        # The process is already waited for and its id may have been reused
+        return
+    try:
+        if hasattr(os, 'killpg'):
+            # The process is started in a new session, abaqus is killed together with the processes it started
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+
+class StderrTail:
+    """
+    The end of the standard error of abaqus, the last stderr_tail_bytes of it. The standard error is also written to
+    sys.stderr as it arrives if output is True
+    """
+    def __init__(self, output):
+        self.output = output
+        self.tail = bytearray()
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    def add(self, chunk):
+        if self.output:
+            sys.stderr.write(self.decoder.decode(chunk))
+            sys.stderr.flush()
+        self.tail.extend(chunk)
+        del self.tail[:-stderr_tail_bytes]
+
+    def text(self):
+        return self.tail.decode(errors='replace')
+
+
+def read_stderr(stream, stderr_tail, stop):
+    """
+    Reads the standard error of abaqus into a StderrTail, run in a thread until abaqus and the processes it started
+    have closed the standard error or until the event stop is set. The stream is closed by the thread as closing it
+    while it is read would block
+    """
+    try:
+        while True:
+            if os.name == 'posix':
+                readable, _, _ = select.select([stream], [], [], 0.1)
+                if not readable:
+                    if stop.is_set():
+                        return
+                    continue
+            chunk = stream.read1(stderr_tail_bytes)
+            if not chunk:
+                return
+            stderr_tail.add(chunk)
+    finally:
+        stream.close()
+
+
+def stop_reader(reader, stop):
+    """
+    Gives the thread running read_stderr stderr_join_timeout to finish after abaqus has exited, and then stops it
+    """
+    reader.join(stderr_join_timeout)
+    stop.set()
+    reader.join(1.)
+
+
+async def stop_reader_task(reader, transport):
+    """
+    Gives an asyncio task reading the standard error stderr_join_timeout to finish after abaqus has exited, and then
+    closes the pipe
+    """
+    try:
+        await asyncio.wait_for(reader, stderr_join_timeout)
+    except asyncio.TimeoutError:
+        pass
+    transport.close()
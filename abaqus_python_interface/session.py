@@ -0,0 +1,151 @@
+import pickle
+import secrets
+import socket
+import struct
+import subprocess
+import threading
+import time
+
+from abaqus_python_interface.common import abaqus_python_directory
+
+
+class AbaqusSessionError(RuntimeError):
+    pass
+
+
+def send_message(connection, message):
+    data = pickle.dumps(message, protocol=2)
+    connection.sendall(struct.pack('>Q', len(data)) + data)
+
+
+def _receive_bytes(connection, number_of_bytes):
+    chunks = []
+    while number_of_bytes > 0:
+        chunk = connection.recv(min(number_of_bytes, 1 << 20))
+        if not chunk:
+            raise EOFError("The connection to the abaqus server was closed")
+        chunks.append(chunk)
+        number_of_bytes -= len(chunk)
+    return b''.join(chunks)
+
+
+def receive_message(connection):
+    header = _receive_bytes(connection, 8)
+    data = _receive_bytes(connection, struct.unpack('>Q', header)[0])
+    return pickle.loads(data, encoding='latin1')
+
+
+class AbaqusSession:
+    """
+    A long-lived "abaqus python odb_server.py" process that runs the scripts in abaqus_python_scripts on request. The
+    scripts are sent over a local socket and odb files opened for reading are kept open by the server between the
+    calls. If the server process dies it is started again at the next request. Requests from several threads are
+    handled one at a time.
+    """
+    def __init__(self, launcher, output=True, startup_timeout=None):
+        """
+        :param launcher:        The AbaqusLauncher starting the server
+        :param output:          Flag if the output from abaqus should be shown
+        :param startup_timeout: Max time in seconds to wait for abaqus to start, None waits until abaqus is started
+        """
+        self.launcher = launcher
+        self.output = output
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.connection = None
+        self.lock = threading.RLock()
+
+    @property
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None and self.connection is not None
+
+    def start(self):
+        with self.lock:
+            if self.is_running:
+                return
+            self._terminate()
+            token = secrets.token_hex(16)
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server_socket:
+                server_socket.bind(('127.0.0.1', 0))
+                server_socket.listen(1)
+                server_socket.settimeout(1.)
+                port = server_socket.getsockname()[1]
+                stdout = None
+                stderr = None
+                if self.output is False:
+                    stdout = subprocess.DEVNULL
+                    stderr = subprocess.DEVNULL
+                self.process = self.launcher.popen(['python', 'odb_server.py', port, token],
+                                                   directory=abaqus_python_directory, stdout=stdout, stderr=stderr)
+                start_time = time.time()
+                while self.connection is None:
+                    try:
+                        connection, _ = server_socket.accept()
+                    except socket.timeout:
+                        if self.process.poll() is not None:
+                            raise AbaqusSessionError("The abaqus server process exited with return code "
+                                                     + str(self.process.returncode) + " during start up")
+                        if self.startup_timeout is not None and time.time() - start_time > self.startup_timeout:
+                            self._terminate()
+                            raise AbaqusSessionError("The abaqus server did not start within "
+                                                     + str(self.startup_timeout) + " s")
+                    else:
+                        connection.settimeout(None)
+                        try:
+                            greeting = receive_message(connection)
+                        except (OSError, EOFError):
+                            greeting = {}
+                        if greeting.get('token') == token:
+                            self.connection = connection
+                        else:
+                            connection.close()
+
+    def request(self, message):
+        with self.lock:
+            if not self.is_running:
+                self.start()
+            try:
+                send_message(self.connection, message)
+                response = receive_message(self.connection)
+            except (OSError, EOFError) as e:
+                self._terminate()
+                raise AbaqusSessionError("The abaqus server terminated while handling the request " + str(message)
+                                         + ", it will be restarted at the next request") from e
+            if response['status'] == 'ERROR':
+                raise AbaqusSessionError(response['traceback'])
+            return response
+
+    def run_script(self, script_name, arguments=(), environment=None):
+        return self.request({'command': 'run_script', 'script': script_name,
+                             'arguments': [str(argument) for argument in arguments],
+                             'environment': dict(environment or {})})
+
+    def close_odb(self, odb_file_name=None):
+        if self.is_running:
+            self.request({'command': 'close_odb', 'odb_file_name': None if odb_file_name is None
+                          else str(odb_file_name)})
+
+    def restart(self):
+        with self.lock:
+            self.stop()
+            self.start()
+
+    def stop(self, timeout=60.):
+        with self.lock:
+            if self.is_running:
+                try:
+                    send_message(self.connection, {'command': 'shutdown'})
+                    self.process.wait(timeout=timeout)
+                except (OSError, subprocess.TimeoutExpired):
+                    pass
+            self._terminate()
+
+    def _terminate(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+        if self.process is not None:
+            if self.process.poll() is None:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
@@ -0,0 +1,91 @@
+"""
+Timings and payload sizes of the scripts run by ABQInterface
+"""
+from collections import deque
+
+import threading
+
+
+class CallStats:
+    """
+    The timings of one script run
+
+    script:             Name of the script, or module.function for the functions called by the in-process backend
+    session:            Flag if the script was run in an AbaqusSession
+    start_time:         Time when the script was started, as time.time()
+    wall_time:          Time in seconds from starting abaqus until it finished
+    script_time:        Time spent in the script as reported by the script, None if the script did not report timings
+    launch_time:        wall_time - script_time, the startup of abaqus including license checkout, or the
+                        request overhead in a session
+    phases:             Dict {phase: seconds} reported by the script, like open, subset, transform, extract and
+                        serialize
+    deserialize_time:   Time spent loading the results on the client side
+    payload_bytes:      Size of the results, pickle and .npy files
+    profile_file:       The cProfile statistics of the script if ABQInterface.profile_directory is set
+    """
+    def __init__(self, script, session, start_time, wall_time, script_time=None, phases=None, deserialize_time=0.,
+                 payload_bytes=0, profile_file=None):
+        self.script = script
+        self.session = session
+        self.start_time = start_time
+        self.wall_time = wall_time
+        self.script_time = script_time
+        self.phases = phases or {}
+        self.deserialize_time = deserialize_time
+        self.payload_bytes = payload_bytes
+        self.profile_file = profile_file
+
+    def __repr__(self):
+        return ('CallStats(' + self.script + ', wall_time=' + format(self.wall_time, '.3f')
+                + ', launch_time=' + format(self.launch_time, '.3f') + ', deserialize_time='
+                + format(self.deserialize_time, '.3f') + ', payload_bytes=' + str(self.payload_bytes) + ')')
+
+    @property
+    def launch_time(self):
+        if self.script_time is None:
+            return self.wall_time
+        return max(self.wall_time - self.script_time, 0.)
+
+    def as_dict(self):
+        return {'script': self.script, 'session': self.session, 'start_time': self.start_time,
+                'wall_time': self.wall_time, 'script_time': self.script_time, 'launch_time': self.launch_time,
+                'phases': dict(self.phases), 'deserialize_time': self.deserialize_time,
+                'payload_bytes': self.payload_bytes, 'profile_file': self.profile_file}
+
+
+class InterfaceStats:
+    """
+    The CallStats of the latest script runs of an ABQInterface. The stats can be shared between threads
+    """
+    def __init__(self, max_records=10000):
+        self.records = deque(maxlen=max_records)
+        self.lock = threading.Lock()
+
+    def add(self, record):
+        with self.lock:
+            self.records.append(record)
+
+    def clear(self):
+        with self.lock:
+            self.records.clear()
+
+    def totals(self):
+        """
+        Returns a dict {script: totals} where totals is a dict with the number of calls and the summed times, phases
+        and payload sizes of the calls
+        """
+        with self.lock:
+            records = list(self.records)
+        totals = {}
+        for record in records:
+            script_totals = totals.setdefault(record.script, {'calls': 0, 'wall_time': 0., 'launch_time': 0.,
+                                                              'deserialize_time': 0., 'payload_bytes': 0,
+                                                              'phases': {}})
+            script_totals['calls'] += 1
+            script_totals['wall_time'] += record.wall_time
+            script_totals['launch_time'] += record.launch_time
+            script_totals['deserialize_time'] += record.deserialize_time
+            script_totals['payload_bytes'] += record.payload_bytes
+            for phase, seconds in record.phases.items():
+                script_totals['phases'][phase] = script_totals['phases'].get(phase, 0.) + seconds
+        return totals
@@ -0,0 +1,76 @@
+"""
+Exchange of parameters and results with the scripts in abaqus_python_scripts, the counterpart of
+abaqus_python_scripts/transport.py. Large numeric arrays are written as raw .npy files next to a protocol 2 pickle
+holding the remaining, small, data. Arrays in the results are returned memory mapped so that reading a large field
+keeps roughly one copy of the data in memory on the client side.
+"""
+import os
+import pathlib
+import pickle
+
+import numpy as np
+
+# Files that are memory mapped cannot be removed on windows when the work directory is deleted
+memory_map_results = os.name != 'nt'
+
+
+def _is_array_reference(obj):
+    return isinstance(obj, dict) and len(obj) == 1 and '__npy_file__' in obj
+
+
+def _replace(obj, function):
+    if isinstance(obj, dict) and not _is_array_reference(obj):
+        return {key: _replace(value, function) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)) and not hasattr(obj, '_fields'):
+        return type(obj)(_replace(item, function) for item in obj)
+    return function(obj)
+
+
+def dump(data, pickle_file_name):
+    """
+    Pickles data for a script in abaqus_python_scripts. All numeric arrays are written as .npy files as arrays pickled
+    by numpy 2 cannot be unpickled by the older numpy versions shipped with abaqus.
+    """
+    pickle_file_name = pathlib.Path(pickle_file_name)
+    array_count = 0
+
+    def write_array(obj):
+        nonlocal array_count
+        if isinstance(obj, np.ndarray) and obj.dtype.kind in 'biuf':
+            file_name = pickle_file_name.stem + '_array_' + str(array_count) + '.npy'
+            array_count += 1
+            np.save(pickle_file_name.parent / file_name, obj)
+            return {'__npy_file__': file_name}
+        return obj
+
+    with open(pickle_file_name, 'wb') as pickle_file:
+        pickle.dump(_replace(data, write_array), pickle_file, protocol=2)
+
+
+def load(pickle_file_name, memory_map=None):
+    """
+    Loads a pickle written by dump in this module or in abaqus_python_scripts/transport.py. The arrays stored in .npy
+    files are memory mapped copy-on-write, so they can be modified without changing the files, unless memory_map is
+    False.
+    """
+    pickle_file_name = pathlib.Path(pickle_file_name)
+    if memory_map is None:
+        memory_map = memory_map_results
+    with open(pickle_file_name, 'rb') as pickle_file:
+        data = pickle.load(pickle_file, encoding='latin1')
+
+    def read_array(obj):
+        if _is_array_reference(obj):
+            return np.load(pickle_file_name.parent / obj['__npy_file__'], mmap_mode='c' if memory_map else None)
+        return obj
+
+    return _replace(data, read_array)
+
+
+def file_size(pickle_file_name):
+    """
+    Returns the size in bytes of a pickle written by dump and the .npy files with its arrays
+    """
+    pickle_file_name = pathlib.Path(pickle_file_name)
+    return sum(file_name.stat().st_size for file_name in [pickle_file_name]
+               + list(pickle_file_name.parent.glob(pickle_file_name.stem + '_array_*.npy')))
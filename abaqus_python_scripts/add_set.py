@@ -3,8 +3,10 @@ from __future__ import division, print_function
 import pickle
 import sys
 
+from odb_io_functions import _add_set
 from utilities import OpenOdb
 
+
 def main():
     parameter_pickle_name = sys.argv[-1]
 
@@ -16,17 +18,7 @@ def main():
     labels = parameters["labels"]
     instance_name = parameters.get("instance_name", None)
     with OpenOdb(odb_file_name, read_only=False) as odb:
-        if instance_name is not None:
-            base = odb.rootAssembly.instances[str(instance_name)]
-        else:
-            base = odb.rootAssembly
-            labels = ((odb.rootAssembly.instances.keys()[0], labels),)
-        if set_type == "node":
-            base.NodeSetFromNodeLabels(name=set_name, nodeLabels=labels)
-        elif set_type == "element":
-            base.ElementSetFromElementLabels(name=set_name, elementLabels=labels)
-        else:
-            raise ValueError("The argument set_type", set_type, " is invalid. It must either be nodes or elements")
+        _add_set(odb, set_name, set_type, labels, None if instance_name is None else str(instance_name))
 
 
 if __name__ == '__main__':
@@ -1,39 +1,39 @@
 from __future__ import print_function
 
 import os
-import pickle
 import sys
 
 from abaqusConstants import DEFORMABLE_BODY, THREE_D
 import odbAccess
 
-from odb_io_functions import add_element_set, add_node_set
+from odb_io_functions import _add_sets
 from utilities import OpenOdb
+import transport
 
 
 def main():
     pickle_filename = sys.argv[-1]
-    with open(pickle_filename, 'rb') as pickle_file:
-        data_for_creating_odb = pickle.load(pickle_file)
+    data_for_creating_odb = transport.load(pickle_filename)
     odb_file_name = str(data_for_creating_odb['odb_file_name'])
     instances = data_for_creating_odb['instance_data']
     odb = odbAccess.Odb(name=os.path.basename(odb_file_name), path=odb_file_name)
     odb.close()
-    for instance in instances:
-        with OpenOdb(odb_file_name, read_only=False) as odb:
+    # All instances and sets are created with the odb opened and saved once
+    with OpenOdb(odb_file_name, read_only=False) as odb:
+        for instance in instances:
             instance_name = str(instance['instance_name'])
             part = odb.Part(name=instance_name, embeddedSpace=THREE_D,
                             type=DEFORMABLE_BODY)  # Todo Implement 2D models
             part.addNodes(nodeData=instance['nodes'])
-            for element_type, element_data in instance['elements'].iteritems():
+            for element_type, element_data in instance['elements'].items():
                 part.addElements(elementData=element_data, type=str(element_type))
             odb.rootAssembly.Instance(name=instance_name, object=part)
 
-        for node_set_name, nodes in instance['node_sets'].iteritems():
-            add_node_set(odb_file_name, str(node_set_name), nodes, instance_name)
-
-        for element_set_name, elements in instance['element_sets'].iteritems():
-            add_element_set(odb_file_name, str(element_set_name), elements, instance_name)
+            sets = [(str(set_name), 'node', labels, instance_name)
+                    for set_name, labels in instance['node_sets'].items()]
+            sets.extend((str(set_name), 'element', labels, instance_name)
+                        for set_name, labels in instance['element_sets'].items())
+            _add_sets(odb, sets)
 
 
 if __name__ == '__main__':
@@ -1,83 +1,95 @@
 from __future__ import print_function, division
 
-import odbAccess
-from abaqusConstants import DEFORMABLE_BODY, THREE_D
 import os
+import pickle
 import sys
 
+import odbAccess
+from abaqusConstants import DEFORMABLE_BODY, THREE_D
+
+from odb_io_functions import mesh_arrays, set_labels
+from utilities import OpenOdb
+
 
 def _copy_node_and_elements(to_odb_base, from_odb_base):
-    nodal_data = from_odb_base.nodes
-    if len(nodal_data) > 0:
-        node_labels = []
-        nodal_coordinates = []
-        for n in nodal_data:
-            node_labels.append(n.label)
-            nodal_coordinates.append(n.coordinates)
-        to_odb_base.addNodes(labels=node_labels, coordinates=nodal_coordinates)
-
-    element_data = from_odb_base.elements
-    element_dict = {}
-
-    for e in element_data:
-        element_type = e.type
-        if element_type not in element_dict:
-            element_dict[element_type] = {'labels': [], 'connectivity': []}
-        element_dict[element_type]['labels'].append(e.label)
-        element_dict[element_type]['connectivity'].append(e.connectivity)
-
-    for element_type, element_data in element_dict.iteritems():
-        to_odb_base.addElements(labels=element_data['labels'], connectivity=element_data['connectivity'],
+    node_labels, node_coordinates, elements = mesh_arrays(from_odb_base)
+    if node_labels.shape[0] > 0:
+        to_odb_base.addNodes(labels=node_labels.tolist(), coordinates=node_coordinates.tolist())
+    for element_type, (element_labels, connectivity) in elements.items():
+        to_odb_base.addElements(labels=element_labels.tolist(), connectivity=connectivity.tolist(),
                                 type=element_type)
 
 
-def _copy_sets(to_odb_base, from_odb_base):
+def _copy_sets(to_odb_base, from_odb_base, set_names=None):
     for node_set_name in from_odb_base.nodeSets.keys():
-        node_set = from_odb_base.nodeSets[node_set_name]
-        to_odb_base.NodeSet(name=node_set_name, nodes=node_set.nodes)
+        if set_names is None or node_set_name in set_names:
+            labels = set_labels(from_odb_base.nodeSets[node_set_name], "node")
+            to_odb_base.NodeSetFromNodeLabels(name=node_set_name, nodeLabels=labels.tolist())
 
     for element_set_name in from_odb_base.elementSets.keys():
-        element_set = from_odb_base.elementSets[element_set_name]
-        to_odb_base.ElementSet(name=element_set_name, elements=element_set.elements)
-
-
-def create_empty_odb(new_odb_file_name, old_odb_file_name):
+        if set_names is None or element_set_name in set_names:
+            labels = set_labels(from_odb_base.elementSets[element_set_name], "element")
+            to_odb_base.ElementSetFromElementLabels(name=element_set_name, elementLabels=labels.tolist())
+
+
+def _copy_assembly_sets(new_assembly, old_assembly, instance_names, set_names=None):
+    for set_type, repository_name in [("node", "nodeSets"), ("element", "elementSets")]:
+        old_sets = getattr(old_assembly, repository_name)
+        for set_name in old_sets.keys():
+            if set_names is not None and set_name not in set_names:
+                continue
+            labels = [(instance_name, instance_labels.tolist()) for instance_name, instance_labels
+                      in set_labels(old_sets[set_name], set_type, assembly_set=True).items()
+                      if instance_name in instance_names and instance_labels.shape[0] > 0]
+            if labels:
+                if set_type == "node":
+                    new_assembly.NodeSetFromNodeLabels(name=set_name, nodeLabels=labels)
+                else:
+                    new_assembly.ElementSetFromElementLabels(name=set_name, elementLabels=labels)
+
+
+def create_empty_odb(new_odb_file_name, old_odb_file_name, instance_names=None, set_names=None):
     """
     :param new_odb_file_name:   Filename including path for the new odb
     :param old_odb_file_name:   Filename including path for the odb file containing the geometry
+    :param instance_names:      Names of the instances to copy. Default is None which copies all instances and also
+                                all parts that are not replaced by a copied instance
+    :param set_names:           Names of the sets to copy, default is None which copies all sets
     :return:                    Nothing
     """
-
     new_odb = odbAccess.Odb(name=os.path.basename(new_odb_file_name), path=new_odb_file_name)
-    old_odb = odbAccess.openOdb(old_odb_file_name, readOnly=True)
-    # Copying the part and copying the nodes in that part
-    for part_name in old_odb.parts.keys():
-        old_part = old_odb.parts[part_name]
-        new_part = new_odb.Part(name=part_name, embeddedSpace=THREE_D, type=old_part.type)
-        _copy_node_and_elements(new_part, old_part)
-        _copy_sets(new_part, old_part)
-        new_odb.update()
-        new_odb.save()
-
-    # Copying the instances and copying the nodes
-    for instance_name in old_odb.rootAssembly.instances.keys():
-        old_instance = old_odb.rootAssembly.instances[instance_name]
-        try:
-            new_part = new_odb.parts[instance_name]
-        except KeyError:
-            try:
-                new_part = new_odb.Part(name=instance_name, embeddedSpace=THREE_D,
-                                        type=old_odb.parts[instance_name].type)
-            except KeyError:
-                new_part = new_odb.Part(name=instance_name, embeddedSpace=THREE_D, type=DEFORMABLE_BODY)
-
+    new_odb.close()
+    # Everything is saved once when the copy is complete, if the copy fails the new odb is closed without saving
+    with OpenOdb(old_odb_file_name, read_only=True) as old_odb:
+        with OpenOdb(new_odb_file_name, read_only=False) as new_odb:
+            _copy_odb(new_odb, old_odb, instance_names, set_names)
+
+
+def _copy_odb(new_odb, old_odb, instance_names, set_names):
+    old_instances = old_odb.rootAssembly.instances
+    if instance_names is None:
+        instance_names = old_instances.keys()
+        # Parts are only copied for a full copy, the instances are copied to parts with the instance names
+        for part_name in old_odb.parts.keys():
+            if part_name not in instance_names:
+                old_part = old_odb.parts[part_name]
+                new_part = new_odb.Part(name=part_name, embeddedSpace=THREE_D, type=old_part.type)
+                _copy_node_and_elements(new_part, old_part)
+                _copy_sets(new_part, old_part, set_names)
+
+    for instance_name in instance_names:
+        old_instance = old_instances[instance_name]
+        if instance_name in old_odb.parts.keys():
+            part_type = old_odb.parts[instance_name].type
+        else:
+            part_type = DEFORMABLE_BODY
+        new_part = new_odb.Part(name=instance_name, embeddedSpace=THREE_D, type=part_type)
         # Copying the instance nodes to the part with the same name
         _copy_node_and_elements(new_part, old_instance)
+        new_instance = new_odb.rootAssembly.Instance(name=instance_name, object=new_part)
+        _copy_sets(new_instance, old_instance, set_names)
 
-        new_instance = new_odb.rootAssembly.Instance(name=instance_name, object=new_odb.parts[instance_name])
-        _copy_sets(new_instance, old_instance)
-        new_odb.update()
-        new_odb.save()
+    _copy_assembly_sets(new_odb.rootAssembly, old_odb.rootAssembly, instance_names, set_names)
 
     # Copying any possible coordinate systems
     for coordinate_system_name in old_odb.rootAssembly.datumCsyses.keys():
@@ -85,18 +97,24 @@ def create_empty_odb(new_odb_file_name, old_odb_file_name):
         p1 = [coordinate_system.origin[i] + coordinate_system.xAxis[i] for i in range(3)]
         p2 = [coordinate_system.origin[i] + coordinate_system.yAxis[i] for i in range(3)]
 
-        transform_system = new_odb.rootAssembly.DatumCsysByThreePoints(name=coordinate_system.name,
-                                                                       coordSysType=coordinate_system.coordSysType,
-                                                                       origin=coordinate_system.origin,
-                                                                       point1=p1,
-                                                                       point2=p2)
-        new_odb.update()
-        new_odb.save()
-    new_odb.close()
-    old_odb.close()
+        new_odb.rootAssembly.DatumCsysByThreePoints(name=coordinate_system.name,
+                                                    coordSysType=coordinate_system.coordSysType,
+                                                    origin=coordinate_system.origin, point1=p1, point2=p2)
+
+
+def main():
+    parameter_pickle_name = sys.argv[-1]
+    with open(parameter_pickle_name, 'rb') as parameter_pickle:
+        parameters = pickle.load(parameter_pickle)
+    instance_names = parameters.get('instance_names', None)
+    if instance_names is not None:
+        instance_names = [str(name) for name in instance_names]
+    set_names = parameters.get('set_names', None)
+    if set_names is not None:
+        set_names = [str(name) for name in set_names]
+    create_empty_odb(str(parameters['new_odb_file_name']), str(parameters['old_odb_file_name']), instance_names,
+                     set_names)
 
 
 if __name__ == '__main__':
-    old_file = sys.argv[-1]
-    new_file = sys.argv[-2]
-    create_empty_odb(new_file, old_file)
+    main()
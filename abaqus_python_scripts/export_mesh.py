@@ -0,0 +1,48 @@
+from __future__ import print_function, division
+import sys
+
+import numpy as np
+
+from odb_io_functions import mesh_arrays, set_labels
+from timing import phase
+from utilities import OpenOdb
+import transport
+
+odb_filename = sys.argv[-2]
+results_pickle_file = sys.argv[-1]
+with OpenOdb(odb_filename, read_only=True) as odb:
+    geometry = {'instances': {}, 'node_sets': {None: {}}, 'element_sets': {None: {}}, 'datum_systems': {}}
+    for instance_name in odb.rootAssembly.instances.keys():
+        instance = odb.rootAssembly.instances[instance_name]
+        node_labels, node_coordinates, elements = mesh_arrays(instance)
+        geometry['instances'][instance_name] = {
+            'node_labels': node_labels,
+            'node_coordinates': node_coordinates,
+            'elements': dict((element_type, {'labels': labels, 'connectivity': connectivity})
+                             for element_type, (labels, connectivity) in elements.items())
+        }
+        geometry['node_sets'][instance_name] = dict(
+            (set_name, set_labels(instance.nodeSets[set_name], "node")) for set_name in instance.nodeSets.keys())
+        geometry['element_sets'][instance_name] = dict(
+            (set_name, set_labels(instance.elementSets[set_name], "element"))
+            for set_name in instance.elementSets.keys())
+
+    for set_name in odb.rootAssembly.nodeSets.keys():
+        geometry['node_sets'][None][set_name] = set_labels(odb.rootAssembly.nodeSets[set_name], "node",
+                                                           assembly_set=True)
+    for set_name in odb.rootAssembly.elementSets.keys():
+        geometry['element_sets'][None][set_name] = set_labels(odb.rootAssembly.elementSets[set_name], "element",
+                                                              assembly_set=True)
+
+    for system_name in odb.rootAssembly.datumCsyses.keys():
+        system = odb.rootAssembly.datumCsyses[system_name]
+        geometry['datum_systems'][system_name] = {
+            'system_type': str(system.coordSysType),
+            'origin': np.array(system.origin, dtype=float),
+            'x_axis': np.array(system.xAxis, dtype=float),
+            'y_axis': np.array(system.yAxis, dtype=float),
+            'z_axis': np.array(system.zAxis, dtype=float)
+        }
+
+with phase('serialize'):
+    transport.dump(geometry, results_pickle_file)
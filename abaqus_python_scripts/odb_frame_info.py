@@ -0,0 +1,35 @@
+from __future__ import print_function, division
+import pickle
+import sys
+
+from utilities import OpenOdb
+
+
+def field_info(field):
+    return {
+        "type": str(field.type),
+        "description": str(field.description),
+        "positions": [str(location.position) for location in field.locations],
+        "component_labels": [str(label) for label in field.componentLabels],
+        "valid_invariants": [str(invariant) for invariant in field.validInvariants]
+    }
+
+
+def main():
+    parameter_pickle_file = sys.argv[-2]
+    results_pickle_file = sys.argv[-1]
+    with open(parameter_pickle_file, 'rb') as parameter_pickle:
+        parameters = pickle.load(parameter_pickle)
+    frame_info = []
+    with OpenOdb(str(parameters['odb_file_name']), read_only=True) as odb:
+        for step_name, frame_number in parameters['frames']:
+            field_outputs = odb.steps[str(step_name)].frames[frame_number].fieldOutputs
+            frame_info.append(dict((field_name, field_info(field_outputs[field_name]))
+                                   for field_name in field_outputs.keys()))
+
+    with open(results_pickle_file, 'wb') as results_pickle:
+        pickle.dump(frame_info, results_pickle, 2)
+
+
+if __name__ == '__main__':
+    main()
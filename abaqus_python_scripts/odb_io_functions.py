@@ -1,6 +1,7 @@
 from __future__ import print_function, division
 
 from collections import namedtuple
+from itertools import chain
 
 import numpy as np
 
@@ -8,12 +9,16 @@ from abaqusConstants import INTEGRATION_POINT, ELEMENT_NODAL, NODAL, CYLINDRICAL
 from abaqusConstants import SCALAR, TENSOR_3D_FULL, VECTOR
 
 from abaqus_constants import abaqus_constants
+from timing import phase
 from utilities import OpenOdb
 
 CoordinateSystem = namedtuple('CoordinateSystem', ['name', 'origin', 'point1', 'point2', 'system_type'])
 cylindrical_system_z = CoordinateSystem(name='cylindrical', origin=(0., 0., 0.), point1=(1., 0., 0.),
                                         point2=(0., 1., 0.), system_type=CYLINDRICAL)
 
+# Max number of node or element labels passed to FieldOutput.addData in each call when writing fields
+write_chunk_size = 100000
+
 
 def read_field_from_odb(field_id, odb_file_name, step_name=None, frame_number=-1, set_name='', instance_name=None,
                         coordinate_system=None, rotating_system=False, position=INTEGRATION_POINT,
@@ -42,7 +47,7 @@ def read_field_from_odb(field_id, odb_file_name, step_name=None, frame_number=-1
 
     :return:                        The function returns a numpy matrix with the field data.
                                     Depending on the flags it could also return double with the frame value as well
-                                    as list with node and element numbers. The ordering of this objects is shown below
+                                    as arrays with node and element numbers. The ordering of this objects is shown below
 
                                     if not get_position_numbers and not get_frame_value:
                                         return data
@@ -53,93 +58,174 @@ def read_field_from_odb(field_id, odb_file_name, step_name=None, frame_number=-1
                                     else:
                                         return data, frame_value, node_labels, element_labels
     """
+    coordinate_system, read_only = _coordinate_system(coordinate_system)
+    with OpenOdb(odb_file_name, read_only=read_only) as odb:
+        data, frame_value, node_labels, element_labels = _read_field(odb, field_id, step_name, frame_number, set_name,
+                                                                     instance_name, coordinate_system,
+                                                                     rotating_system, position, invariant)
+
+    if not get_position_numbers and not get_frame_value:
+        return data
+    elif not get_position_numbers:
+        return data, frame_value
+    elif not get_frame_value:
+        return data, node_labels, element_labels
+    else:
+        return data, frame_value, node_labels, element_labels
+
+
+def read_fields_from_odb(odb_file_name, read_requests):
+    """
+    Function for reading many fields from an odb-file while opening the odb only once
+
+    :param odb_file_name:   Filename of the odb-file with the .odb extension
+    :param read_requests:   A list of dicts with the keyword arguments of read_field_from_odb for each field to be
+                            read, i.e. field_id, step_name, frame_number, set_name, instance_name,
+                            coordinate_system, rotating_system, position and invariant
+
+    :return:                A list with a tuple (data, frame_value, node_labels, element_labels) for each request
+    """
+    requests = []
     read_only = True
+    for read_request in read_requests:
+        request = dict(read_request)
+        request['coordinate_system'], request_read_only = _coordinate_system(request.get('coordinate_system', None))
+        read_only = read_only and request_read_only
+        requests.append(request)
+
+    with OpenOdb(odb_file_name, read_only=read_only) as odb:
+        return [_read_field(odb, request['field_id'], request.get('step_name', None),
+                            request.get('frame_number', -1), request.get('set_name', ''),
+                            request.get('instance_name', None), request['coordinate_system'],
+                            request.get('rotating_system', False), request.get('position', INTEGRATION_POINT),
+                            request.get('invariant', None)) for request in requests]
+
+
+def _coordinate_system(coordinate_system):
+    """
+    Converts a coordinate system given as a dict to a CoordinateSystem. Creating the system requires the odb to be
+    opened with write access which is returned as the second argument.
+    """
     if coordinate_system is not None and not isinstance(coordinate_system, str):
         coordinate_system = CoordinateSystem(str(coordinate_system['name']), coordinate_system['origin'],
                                              coordinate_system['point1'], coordinate_system['point2'],
                                              abaqus_constants[coordinate_system['system_type']])
-        read_only = False
-    with OpenOdb(odb_file_name, read_only=read_only) as odb:
-        if not instance_name:
-            base = odb.rootAssembly
-        else:
-            base = odb.rootAssembly.instances[instance_name]
-        if position in [INTEGRATION_POINT, CENTROID, ELEMENT_NODAL, ELEMENT_FACE]:
-            set_dict = base.elementSets
-            set_func = base.ElementSet
-            all_name = 'ALL_ELEMENTS'
-            object_list = base.elements
-        else:
-            set_dict = base.nodeSets
-            set_func = base.NodeSet
-            all_name = 'ALL_NODES'
-            object_list = base.nodes
-
-        if set_name == '':
-            if all_name not in set_dict:
-                objects = object_list
-                set_func(name=all_name, elements=objects)
-            element_set = set_dict[all_name]
-        else:
-            element_set = set_dict[set_name]
+        return coordinate_system, False
+    return coordinate_system, True
+
+
+def _read_field(odb, field_id, step_name, frame_number, set_name, instance_name, coordinate_system, rotating_system,
+                position, invariant):
+    if not instance_name:
+        base = odb.rootAssembly
+    else:
+        base = odb.rootAssembly.instances[instance_name]
+    if position in [INTEGRATION_POINT, CENTROID, ELEMENT_NODAL, ELEMENT_FACE]:
+        set_dict = base.elementSets
+        set_func = base.ElementSet
+        all_name = 'ALL_ELEMENTS'
+        object_list = base.elements
+    else:
+        set_dict = base.nodeSets
+        set_func = base.NodeSet
+        all_name = 'ALL_NODES'
+        object_list = base.nodes
+
+    if set_name == '':
+        if all_name not in set_dict:
+            set_func(all_name, object_list)
+        element_set = set_dict[all_name]
+    else:
+        element_set = set_dict[set_name]
 
+    with phase('subset'):
         field = odb.steps[step_name].frames[frame_number].fieldOutputs[field_id].getSubset(position=position)
         field = field.getSubset(region=element_set)
         if invariant:
             field = field.getScalarField(invariant=invariant)
-        frame_value = odb.steps[step_name].frames[frame_number].frameValue
-        if coordinate_system is not None:
-            if isinstance(coordinate_system, str):
-                try:
-                    transform_system = odb.rootAssembly.datumCsyses[coordinate_system]
-                except KeyError:
-                    print("The given coordinate system", coordinate_system, "does not exist")
+    frame_value = odb.steps[step_name].frames[frame_number].frameValue
+    if coordinate_system is not None:
+        if isinstance(coordinate_system, str):
+            try:
+                transform_system = odb.rootAssembly.datumCsyses[coordinate_system]
+            except KeyError:
+                print("The given coordinate system", coordinate_system, "does not exist")
+        else:
+            if coordinate_system.name not in odb.rootAssembly.datumCsyses:
+                transform_system = odb.rootAssembly.DatumCsysByThreePoints(name=coordinate_system.name,
+                                                                           coordSysType=coordinate_system.system_type,
+                                                                           origin=coordinate_system.origin,
+                                                                           point1=coordinate_system.point1,
+                                                                           point2=coordinate_system.point2)
             else:
-                if coordinate_system.name not in odb.rootAssembly.datumCsyses:
-                    transform_system = odb.rootAssembly.DatumCsysByThreePoints(name=coordinate_system.name,
-                                                                               coordSysType=coordinate_system.system_type,
-                                                                               origin=coordinate_system.origin,
-                                                                               point1=coordinate_system.point1,
-                                                                               point2=coordinate_system.point2)
-                else:
-                    transform_system = odb.rootAssembly.datumCsyses[coordinate_system.name]
+                transform_system = odb.rootAssembly.datumCsyses[coordinate_system.name]
 
+        with phase('transform'):
             if rotating_system:
                 deformation_field = odb.steps[step_name].frames[frame_number].fieldOutputs['U']
                 field = field.getTransformedField(transform_system, deformationField=deformation_field)
             else:
                 field = field.getTransformedField(transform_system)
-        field = field.values
+    with phase('extract'):
+        data, node_labels, element_labels = field_data_as_arrays(field, position)
+    return data, frame_value, node_labels, element_labels
 
-        # ToDo: raise exception if field is empty
-        n1 = len(field)
-        n2 = 1 if type(field[0].data) is float else len(field[0].data)
-        if n2 > 1:
-            data = np.zeros((n1, n2))
-        else:
-            data = np.zeros(n1)
-        node_labels = []
-        element_labels = []
-        for i, data_point in enumerate(field):
-            data[i] = data_point.data
-            if position in [NODAL, ELEMENT_NODAL]:
-                node_labels.append(data_point.nodeLabel)
-            elif position in [INTEGRATION_POINT, CENTROID, ELEMENT_NODAL, ELEMENT_FACE]:
-                element_labels.append(data_point.elementLabel)
 
-    if not get_position_numbers and not get_frame_value:
-        return data
-    elif not get_position_numbers:
-        return data, frame_value
-    elif not get_frame_value:
-        return data, node_labels, element_labels
+def field_data_as_arrays(field, position):
+    """
+    Function for extracting the data of a field output as numpy arrays. The data is extracted block-wise from
+    field.bulkDataBlocks, one contiguous array per element type and instance, and the per-point loop over field.values
+    is only used if bulk access is not available.
+
+    :param field:       The field output, typically a subset of a field for a position and a region
+    :param position:    AbaqusConstant with the position of the field data like INTEGRATION_POINT or NODAL
+    :return:            data, node_labels, element_labels where data is an array with one row per data point, or a
+                        1D-array for scalar fields, node_labels the node labels if position is NODAL or ELEMENT_NODAL
+                        and element_labels the element labels for the element based positions. The labels not
+                        relevant for the position are empty arrays
+    """
+    try:
+        blocks = field.bulkDataBlocks
+    except AttributeError:
+        return _field_data_from_values(field.values, position)
+
+    if len(blocks) == 0:
+        return np.zeros(0), np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    data = np.concatenate([np.asarray(block.data, dtype=float).reshape(len(block.data), -1) for block in blocks])
+    if data.shape[1] == 1:
+        data = data[:, 0]
+    node_labels = np.zeros(0, dtype=int)
+    element_labels = np.zeros(0, dtype=int)
+    if position in [NODAL, ELEMENT_NODAL]:
+        node_labels = np.concatenate([np.asarray(block.nodeLabels, dtype=int) for block in blocks])
+    elif position in [INTEGRATION_POINT, CENTROID, ELEMENT_FACE]:
+        element_labels = np.concatenate([np.asarray(block.elementLabels, dtype=int) for block in blocks])
+    return data, node_labels, element_labels
+
+
+def _field_data_from_values(field_values, position):
+    n1 = len(field_values)
+    if n1 == 0:
+        return np.zeros(0), np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    n2 = 1 if type(field_values[0].data) is float else len(field_values[0].data)
+    if n2 > 1:
+        data = np.zeros((n1, n2))
     else:
-        return data, frame_value, node_labels, element_labels
+        data = np.zeros(n1)
+    node_labels = []
+    element_labels = []
+    for i, data_point in enumerate(field_values):
+        data[i] = data_point.data
+        if position in [NODAL, ELEMENT_NODAL]:
+            node_labels.append(data_point.nodeLabel)
+        elif position in [INTEGRATION_POINT, CENTROID, ELEMENT_FACE]:
+            element_labels.append(data_point.elementLabel)
+    return data, np.array(node_labels, dtype=int), np.array(element_labels, dtype=int)
 
 
 def write_field_to_odb(field_data, field_id, odb_file_name, step_name, instance_name=None, set_name=None,
                        step_description='', frame_number=None, frame_value=None, field_description='', invariants=None,
-                       position=INTEGRATION_POINT):
+                       position=INTEGRATION_POINT, labels=None, chunk_size=write_chunk_size):
     """
     Function for writing a field to an odb to visualize the data
 
@@ -165,62 +251,182 @@ def write_field_to_odb(field_data, field_id, odb_file_name, step_name, instance_
                                     imports the von Mises stress and the maximum principal stress
     :param position:                The field output position where the data is written like INTEGRATION_POINT or
                                     UNIQUE_NODAL. Default is INTEGRATION_POINT
+    :param labels:                  Array with the node or element labels of the data. Default is None which takes the
+                                    labels from the set or the instance. For element positions, every label
+                                    corresponds to len(field_data)/len(labels) consecutive rows in field_data
+    :param chunk_size:              Max number of labels written to the odb in each call to addData
 
     :return:                        Nothing
     """
     with OpenOdb(odb_file_name, read_only=False) as odb:
-        if step_name not in odb.steps:
-            step = odb.Step(name=step_name, description=step_description, domain=TIME, timePeriod=1.)
+        _write_field(odb, field_data, field_id, step_name, instance_name, set_name, step_description, frame_number,
+                     frame_value, field_description, invariants, position, labels, chunk_size)
+
+
+def _object_labels(instance, position, set_name):
+    if position in [INTEGRATION_POINT, CENTROID, ELEMENT_NODAL, ELEMENT_FACE]:
+        if set_name:
+            objects = instance.elementSets[set_name].elements
         else:
-            step = odb.steps[step_name]
-        if instance_name == '':
-            if len(odb.rootAssembly.instances) == 1:
-                instance = odb.rootAssembly.instances[odb.rootAssembly.instances.keys()[0]]
-            else:
-                raise ValueError("The odb file consist of several instances, please specify an instance")
+            objects = instance.elements
+    elif position == NODAL:
+        if set_name:
+            objects = instance.nodeSets[set_name].nodes
         else:
-            instance = odb.rootAssembly.instances[instance_name]
+            objects = instance.nodes
+    else:
+        raise TypeError("The specified position is not a valid output position for abaqus")
+    return np.array([obj.label for obj in objects], dtype=int)
+
+
+def _step(odb, step_name, step_description=''):
+    if step_name not in odb.steps:
+        return odb.Step(name=step_name, description=step_description, domain=TIME, timePeriod=1.)
+    return odb.steps[step_name]
 
-        if position in [INTEGRATION_POINT, CENTROID, ELEMENT_NODAL, ELEMENT_FACE]:
-            if set_name:
-                objects = instance.elementSets[set_name].elements
-            else:
-                objects = instance.elements
-        elif position == NODAL:
-            if set_name:
-                objects = instance.nodeSets[set_name].nodes
-            else:
-                objects = instance.nodes
-        else:
-            raise TypeError("The specified position is not a valid output position for abaqus")
-        object_numbers = []
-        for obj in objects:
-            object_numbers.append(obj.label)
-        field_types = {1: SCALAR, 6: TENSOR_3D_FULL, 3: VECTOR}
-
-        if len(field_data.shape) == 1:
-            field_data = field_data[:, np.newaxis]
-        field_type = field_types[field_data.shape[1]]
-        field_data_to_frame = tuple(field_data[:, :])
-        if frame_value is None:
-            if len(step.frames) > 0:
-                frame_value = step.frames[len(step.frames)-1].frameValue + 1.0
-            else:
-                frame_value = 0.
 
-        if frame_number is None or len(step.frames) == 0 or len(step.frames) <= frame_number:
-            frame = step.Frame(incrementNumber=len(step.frames)+1, frameValue=frame_value, description='')
+def _new_frame(step, frame_value=None, description=''):
+    if frame_value is None:
+        if len(step.frames) > 0:
+            frame_value = step.frames[len(step.frames)-1].frameValue + 1.0
         else:
-            frame = step.frames[frame_number]
+            frame_value = 0.
+    return step.Frame(incrementNumber=len(step.frames)+1, frameValue=frame_value, description=description)
+
+
+def _add_set(odb, set_name, set_type, labels, instance_name=None):
+    if instance_name:
+        base = odb.rootAssembly.instances[instance_name]
+    else:
+        base = odb.rootAssembly
+        labels = ((odb.rootAssembly.instances.keys()[0], labels),)
+    # Sets that already exist, for instance in an odb copied with its sets, are kept as they are
+    if set_type == "node":
+        if set_name not in base.nodeSets:
+            base.NodeSetFromNodeLabels(name=set_name, nodeLabels=labels)
+    elif set_type == "element":
+        if set_name not in base.elementSets:
+            base.ElementSetFromElementLabels(name=set_name, elementLabels=labels)
+    else:
+        raise ValueError("The argument set_type " + set_type + " is invalid. It must either be node or element")
+
 
-        if invariants is None:
-            invariants = []
-        if field_id in frame.fieldOutputs:
-            field = frame.fieldOutputs[field_id]
+def _add_sets(odb, sets):
+    for set_name, set_type, labels, instance_name in sets:
+        _add_set(odb, set_name, set_type, np.asarray(labels, dtype=int).tolist(), instance_name)
+
+
+def add_sets(odb_file_name, sets):
+    """
+    Function for creating many node and element sets in an odb where the odb is opened and saved once
+
+    :param odb_file_name:   Name of the odb file where the sets will be created
+    :param sets:            A list of tuples (set_name, set_type, labels, instance_name) where set_type is "node" or
+                            "element". If instance_name is None, the set is created under odb.rootAssembly for the
+                            labels of the first instance. Sets that already exist are skipped
+    :return:                Nothing
+    """
+    with OpenOdb(odb_file_name, read_only=False) as odb:
+        _add_sets(odb, sets)
+
+
+def _write_field(odb, field_data, field_id, step_name, instance_name=None, set_name=None, step_description='',
+                 frame_number=None, frame_value=None, field_description='', invariants=None,
+                 position=INTEGRATION_POINT, labels=None, chunk_size=write_chunk_size):
+    step = _step(odb, step_name, step_description)
+    if not instance_name:
+        if len(odb.rootAssembly.instances) == 1:
+            instance = odb.rootAssembly.instances[odb.rootAssembly.instances.keys()[0]]
         else:
-            field = frame.FieldOutput(name=field_id, description=field_description, type=field_type,
-                                      validInvariants=invariants)
-        field.addData(position=position, instance=instance, labels=object_numbers, data=field_data_to_frame)
+            raise ValueError("The odb file consist of several instances, please specify an instance")
+    else:
+        instance = odb.rootAssembly.instances[instance_name]
+
+    if labels is None:
+        labels = _object_labels(instance, position, set_name)
+    elif position not in [INTEGRATION_POINT, CENTROID, ELEMENT_NODAL, ELEMENT_FACE, NODAL]:
+        raise TypeError("The specified position is not a valid output position for abaqus")
+    labels = np.asarray(labels, dtype=int)
+    field_types = {1: SCALAR, 6: TENSOR_3D_FULL, 3: VECTOR}
+
+    if len(field_data.shape) == 1:
+        field_data = field_data[:, np.newaxis]
+    field_type = field_types[field_data.shape[1]]
+    rows_per_label = field_data.shape[0] // max(labels.shape[0], 1)
+    if labels.shape[0] == 0 or rows_per_label*labels.shape[0] != field_data.shape[0]:
+        raise ValueError("The number of data points, " + str(field_data.shape[0]) + ", does not match the "
+                         + str(labels.shape[0]) + " labels")
+    if frame_number is None or len(step.frames) == 0 or len(step.frames) <= frame_number:
+        frame = _new_frame(step, frame_value)
+    else:
+        frame = step.frames[frame_number]
+
+    if invariants is None:
+        invariants = []
+    if field_id in frame.fieldOutputs:
+        field = frame.fieldOutputs[field_id]
+    else:
+        field = frame.FieldOutput(name=field_id, description=field_description, type=field_type,
+                                  validInvariants=invariants)
+    for start in range(0, labels.shape[0], chunk_size):
+        stop = min(start + chunk_size, labels.shape[0])
+        field.addData(position=position, instance=instance, labels=labels[start:stop].tolist(),
+                      data=np.asarray(field_data[start*rows_per_label:stop*rows_per_label], dtype=float).tolist())
+
+
+def mesh_arrays(container):
+    """
+    Gathers the mesh of a part or an instance as arrays
+
+    :param container:   An OdbPart or OdbInstance
+    :return:            node_labels, node_coordinates and a dict {element_type: (element_labels, connectivity)} where
+                        connectivity has one row of node labels per element
+    """
+    # Every node and element object is created by abaqus when it is accessed, they are visited once and their values
+    # streamed into flat arrays which are then split with numpy
+    nodes = container.nodes
+    number_of_nodes = len(nodes)
+    node_values = np.fromiter(chain.from_iterable((node.label,) + tuple(node.coordinates) for node in nodes),
+                              dtype=float)
+    node_values = node_values.reshape(number_of_nodes, -1) if number_of_nodes > 0 else np.zeros((0, 4))
+    node_labels = node_values[:, 0].astype(int)
+    node_coordinates = np.ascontiguousarray(node_values[:, 1:])
+
+    element_types = []
+    row_lengths = []
+    element_values = np.fromiter(chain.from_iterable(_element_rows(container.elements, element_types, row_lengths)),
+                                 dtype=int)
+    element_types = np.array(element_types)
+    row_lengths = np.array(row_lengths, dtype=int)
+    row_starts = np.cumsum(row_lengths) - row_lengths
+    elements = {}
+    if element_types.shape[0] > 0:
+        _, first_elements = np.unique(element_types, return_index=True)
+        for element_type in element_types[np.sort(first_elements)]:
+            rows = np.flatnonzero(element_types == element_type)
+            block = element_values[row_starts[rows][:, np.newaxis] + np.arange(row_lengths[rows[0]])]
+            elements[str(element_type)] = (block[:, 0], np.ascontiguousarray(block[:, 1:]))
+    return node_labels, node_coordinates, elements
+
+
+def _element_rows(elements, element_types, row_lengths):
+    for element in elements:
+        row = (element.label,) + tuple(element.connectivity)
+        element_types.append(str(element.type))
+        row_lengths.append(len(row))
+        yield row
+
+
+def set_labels(odb_set, set_type, assembly_set=False):
+    """
+    Returns the labels of a node set, set_type "node", or an element set, set_type "element". For sets on parts and
+    instances an array is returned and for sets on the rootAssembly a dict {instance_name: labels}
+    """
+    objects = odb_set.nodes if set_type == "node" else odb_set.elements
+    if assembly_set:
+        return dict((str(instance_name), np.fromiter((obj.label for obj in instance_objects), dtype=int))
+                    for instance_name, instance_objects in zip(odb_set.instanceNames, objects))
+    return np.fromiter((obj.label for obj in objects), dtype=int)
 
 
 def get_nodal_coordinates_from_node_set(odb_file_name, node_set_name, instance_name=None):
@@ -243,7 +449,6 @@ def get_nodal_coordinates_from_node_set(odb_file_name, node_set_name, instance_n
         node_dict = {}
         for node in node_set.nodes:
             node_dict[node.label] = node.coordinates
-        odb.close()
         return node_dict
 
 
@@ -259,7 +464,7 @@ def flip_node_order(data, axis):      # ToDo implement flip around x and y axis
     :return:        A data array where the data is flipped that can be written to the other part of the odb file
     """
     if axis == 'z':
-        for i in range(data.shape[0]/8):
+        for i in range(data.shape[0]//8):
             temp_data = np.copy(data[8*i:8*i+8])
             data[8*i:8*i+4] = temp_data[4:]
             data[8*i+4:8*i+8] = temp_data[:4]
@@ -0,0 +1,106 @@
+from __future__ import print_function, division
+
+import os
+import pickle
+import runpy
+import socket
+import struct
+import sys
+import traceback
+
+from profile_script import profile_variable, run_profiled
+from utilities import odb_cache
+import timing
+
+script_directory = os.path.dirname(os.path.abspath(__file__))
+
+
+def send_message(connection, message):
+    data = pickle.dumps(message, 2)
+    connection.sendall(struct.pack('>Q', len(data)) + data)
+
+
+def _receive_bytes(connection, number_of_bytes):
+    chunks = []
+    while number_of_bytes > 0:
+        chunk = connection.recv(min(number_of_bytes, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        number_of_bytes -= len(chunk)
+    return b''.join(chunks)
+
+
+def receive_message(connection):
+    header = _receive_bytes(connection, 8)
+    if header is None:
+        return None
+    data = _receive_bytes(connection, struct.unpack('>Q', header)[0])
+    if data is None:
+        return None
+    return pickle.loads(data)
+
+
+def run_script(script_name, arguments, environment=None):
+    """
+    Runs one of the scripts in this directory as if it was started by "abaqus python script_name arguments" with the
+    variables in environment added to os.environ
+    """
+    script_path = os.path.join(script_directory, os.path.basename(script_name))
+    argv = sys.argv
+    sys.argv = [script_path] + arguments
+    environment = environment or {}
+    saved_environment = dict((key, os.environ.get(key, None)) for key in environment)
+    os.environ.update(environment)
+    timing.reset()
+    try:
+        if os.environ.get(profile_variable, None):
+            run_profiled(script_path, os.environ[profile_variable])
+        else:
+            runpy.run_path(script_path, run_name='__main__')
+    except SystemExit as e:
+        if e.code not in [None, 0]:
+            raise RuntimeError("The script " + script_name + " exited with " + str(e.code))
+    finally:
+        timing.dump()
+        for key, value in saved_environment.items():
+            if value is None:
+                del os.environ[key]
+            else:
+                os.environ[key] = value
+        sys.argv = argv
+
+
+def serve(port, token):
+    """
+    Connects to the ABQInterface listening on port and handles requests until the connection is closed or a shutdown
+    request is received. Odb files opened for reading are kept open between the requests
+    """
+    connection = socket.create_connection(('127.0.0.1', port))
+    send_message(connection, {'token': token, 'pid': os.getpid()})
+    odb_cache.enabled = True
+    try:
+        while True:
+            request = receive_message(connection)
+            if request is None or request['command'] == 'shutdown':
+                break
+            try:
+                if request['command'] == 'run_script':
+                    run_script(str(request['script']), [str(argument) for argument in request['arguments']],
+                               dict((str(key), str(value)) for key, value in request.get('environment', {}).items()))
+                elif request['command'] == 'close_odb':
+                    odb_file_name = request.get('odb_file_name', None)
+                    odb_cache.close(str(odb_file_name) if odb_file_name else None)
+                else:
+                    raise ValueError("Unknown command " + str(request['command']))
+            except Exception:
+                send_message(connection, {'status': 'ERROR', 'traceback': traceback.format_exc()})
+            else:
+                send_message(connection, {'status': 'OK'})
+    finally:
+        odb_cache.close()
+        connection.close()
+
+
+if __name__ == '__main__':
+    serve(int(sys.argv[-2]), sys.argv[-1])
@@ -0,0 +1,35 @@
+from __future__ import print_function, division
+from collections import OrderedDict
+import pickle
+import sys
+
+from utilities import OpenOdb
+
+odb_filename = sys.argv[-2]
+results_pickle_file = sys.argv[-1]
+with OpenOdb(odb_filename, read_only=True) as odb:
+    summary = {
+        "steps": OrderedDict(),
+        "rootAssembly": {
+            "instances": {},
+            "nodeSets": odb.rootAssembly.nodeSets.keys(),
+            "elementSets": odb.rootAssembly.elementSets.keys()
+        }
+    }
+
+    for instance_name in odb.rootAssembly.instances.keys():
+        instance = odb.rootAssembly.instances[instance_name]
+        summary["rootAssembly"]["instances"][instance_name] = {
+            "nodeSets": instance.nodeSets.keys(),
+            "elementSets": instance.elementSets.keys(),
+        }
+
+    for step_name in odb.steps.keys():
+        frames = odb.steps[step_name].frames
+        summary["steps"][step_name] = {
+            "frame_count": len(frames),
+            "frame_values": [frame.frameValue for frame in frames]
+        }
+
+    with open(results_pickle_file, 'wb') as results_pickle:
+        pickle.dump(summary, results_pickle, 2)
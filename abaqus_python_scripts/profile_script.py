@@ -0,0 +1,43 @@
+"""
+Runs one of the scripts in this directory under cProfile and writes the statistics to the file in the environment
+variable ABAQUS_PYTHON_INTERFACE_PROFILE, used as
+
+    abaqus python profile_script.py script.py arguments
+"""
+from __future__ import print_function, division
+
+import cProfile
+import os
+import runpy
+import sys
+
+profile_variable = 'ABAQUS_PYTHON_INTERFACE_PROFILE'
+script_directory = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_profiled(script_path, stats_file_name):
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        runpy.run_path(script_path, run_name='__main__')
+    finally:
+        profile.disable()
+        profile.dump_stats(stats_file_name)
+
+
+def main():
+    # The profiled script is the first argument that is a script in this directory, the viewer adds its own
+    # arguments before the arguments of the script
+    for i, argument in enumerate(sys.argv[1:], 1):
+        script_name = os.path.basename(argument)
+        if script_name != os.path.basename(__file__) and os.path.isfile(os.path.join(script_directory, script_name)):
+            break
+    else:
+        raise ValueError("No script to profile in the arguments " + ' '.join(sys.argv))
+    script_path = os.path.join(script_directory, script_name)
+    sys.argv = [script_path] + sys.argv[i + 1:]
+    run_profiled(script_path, os.environ[profile_variable])
+
+
+if __name__ == '__main__':
+    main()
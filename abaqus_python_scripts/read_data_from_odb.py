@@ -5,6 +5,8 @@ import sys
 
 from abaqus_constants import output_positions, invariants
 from odb_io_functions import read_field_from_odb
+from timing import phase
+import transport
 
 
 parameter_pickle_name = sys.argv[-2]
@@ -52,5 +54,5 @@ else:
     data_dict['node_labels'] = field_data[pos_idx]
     data_dict['element_labels'] = field_data[pos_idx + 1]
 
-with open(results_pickle_name, 'wb') as results_pickle:
-    pickle.dump(data_dict, results_pickle)
+with phase('serialize'):
+    transport.dump(data_dict, results_pickle_name)
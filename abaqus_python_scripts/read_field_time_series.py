@@ -0,0 +1,42 @@
+from __future__ import print_function, division
+
+import sys
+
+import numpy as np
+
+from odb_io_functions import read_fields_from_odb
+from read_many_from_odb import read_request
+from timing import phase
+import transport
+
+# np.isin is missing in old numpy versions shipped with abaqus and np.in1d is removed in numpy 2
+isin = getattr(np, 'isin', None) or np.in1d
+
+
+def main():
+    parameter_pickle_name = sys.argv[-2]
+    results_pickle_name = sys.argv[-1]
+
+    parameters = transport.load(parameter_pickle_name)
+
+    # The requests are the fields in all frames, read in one opening of the odb
+    requests = [read_request(request_parameters) for request_parameters in parameters['requests']]
+    labels = parameters.get('labels', None)
+    if labels is not None:
+        labels = np.asarray(labels, dtype=int)
+    label_key = 'node_labels' if parameters['position'] in ['NODAL', 'ELEMENT_NODAL'] else 'element_labels'
+    results = []
+    for data, frame_value, node_labels, element_labels in read_fields_from_odb(str(parameters['odb_file_name']),
+                                                                               requests):
+        row_labels = node_labels if label_key == 'node_labels' else element_labels
+        if labels is not None:
+            rows = isin(row_labels, labels)
+            data, row_labels = data[rows], row_labels[rows]
+        results.append({'data': data, 'frame_value': frame_value, 'labels': row_labels})
+
+    with phase('serialize'):
+        transport.dump(results, results_pickle_name)
+
+
+if __name__ == '__main__':
+    main()
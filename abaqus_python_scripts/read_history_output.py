@@ -0,0 +1,53 @@
+from __future__ import print_function, division
+
+import pickle
+import sys
+
+import numpy as np
+
+from utilities import OpenOdb
+from timing import phase
+import transport
+
+
+def main():
+    parameter_pickle_name = sys.argv[-2]
+    results_pickle_name = sys.argv[-1]
+
+    with open(parameter_pickle_name, 'rb') as parameter_pickle:
+        parameters = pickle.load(parameter_pickle)
+
+    region_names = parameters.get('region_names', None)
+    output_names = parameters.get('output_names', None)
+    history = {}
+    with OpenOdb(str(parameters['odb_file_name']), read_only=True) as odb:
+        step_names = parameters.get('step_names', None) or odb.steps.keys()
+        step_names = [str(step_name) for step_name in step_names]
+        for step_index, step_name in enumerate(step_names):
+            step = odb.steps[step_name]
+            for region_name in step.historyRegions.keys():
+                if region_names is not None and region_name not in region_names:
+                    continue
+                history_outputs = step.historyRegions[region_name].historyOutputs
+                for output_name in history_outputs.keys():
+                    if output_names is not None and output_name not in output_names:
+                        continue
+                    # The history data is a sequence of (step time, value) pairs
+                    data = np.array(history_outputs[output_name].data, dtype=float).reshape(-1, 2)
+                    output = history.setdefault(str(region_name), {}).setdefault(str(output_name), {
+                        'steps': [], 'step_time': [], 'total_time': [], 'value': []})
+                    output['steps'].append(np.repeat(step_index, data.shape[0]))
+                    output['step_time'].append(data[:, 0])
+                    output['total_time'].append(data[:, 0] + step.totalTime)
+                    output['value'].append(data[:, 1])
+
+    for outputs in history.values():
+        for output in outputs.values():
+            for key in list(output.keys()):
+                output[key] = np.concatenate(output[key])
+    with phase('serialize'):
+        transport.dump({'step_names': step_names, 'history': history}, results_pickle_name)
+
+
+if __name__ == '__main__':
+    main()
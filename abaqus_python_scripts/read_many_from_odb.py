@@ -0,0 +1,61 @@
+from __future__ import print_function, division
+
+import pickle
+import sys
+
+from abaqus_constants import output_positions, invariants
+from odb_io_functions import read_fields_from_odb
+from timing import phase
+import transport
+
+
+def read_request(parameters):
+    instance_name = str(parameters['instance_name'])
+    if instance_name == "None":
+        instance_name = None
+    invariant = parameters["invariant"]
+    if invariant:
+        invariant = invariants[invariant]
+    coordinate_system = parameters.get('coordinate_system', None)
+    if coordinate_system is not None and not isinstance(coordinate_system, dict):
+        coordinate_system = str(coordinate_system)
+    return {
+        'field_id': str(parameters['field_id']),
+        'step_name': str(parameters['step_name']),
+        'frame_number': parameters['frame_number'],
+        'set_name': str(parameters['set_name']),
+        'instance_name': instance_name,
+        'position': output_positions[str(parameters['position'])],
+        'invariant': invariant,
+        'coordinate_system': coordinate_system,
+        'rotating_system': parameters.get('deform_system', True)
+    }
+
+
+def read_many(odb_file_name, parameter_list):
+    """
+    Reads the fields given by the read parameters of ABQInterface and returns a list of dicts with the data, the frame
+    value and the node and element labels of every field
+    """
+    requests = [read_request(request_parameters) for request_parameters in parameter_list]
+    results = []
+    for data, frame_value, node_labels, element_labels in read_fields_from_odb(str(odb_file_name), requests):
+        results.append({'data': data, 'frame_value': frame_value, 'node_labels': node_labels,
+                        'element_labels': element_labels})
+    return results
+
+
+def main():
+    parameter_pickle_name = sys.argv[-2]
+    results_pickle_name = sys.argv[-1]
+
+    with open(parameter_pickle_name, 'rb') as parameter_pickle:
+        parameters = pickle.load(parameter_pickle)
+
+    results = read_many(parameters['odb_file_name'], parameters['requests'])
+    with phase('serialize'):
+        transport.dump(results, results_pickle_name)
+
+
+if __name__ == '__main__':
+    main()
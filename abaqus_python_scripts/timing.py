@@ -0,0 +1,42 @@
+"""
+Timing of the phases of the scripts, like opening the odb and extracting the field data. The timings are written at
+exit to the file in the environment variable ABAQUS_PYTHON_INTERFACE_TIMINGS, if set, and read by ABQInterface
+"""
+from __future__ import print_function, division
+
+from contextlib import contextmanager
+
+import atexit
+import os
+import pickle
+import time
+
+timings_variable = 'ABAQUS_PYTHON_INTERFACE_TIMINGS'
+
+phases = {}
+_start_time = [time.time()]
+
+
+def reset():
+    phases.clear()
+    _start_time[0] = time.time()
+
+
+@contextmanager
+def phase(name):
+    start_time = time.time()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.) + time.time() - start_time
+
+
+def dump():
+    timings_file_name = os.environ.get(timings_variable, None)
+    if not timings_file_name:
+        return
+    with open(timings_file_name, 'wb') as timings_file:
+        pickle.dump({'script_time': time.time() - _start_time[0], 'phases': dict(phases)}, timings_file, 2)
+
+
+atexit.register(dump)
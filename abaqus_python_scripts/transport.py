@@ -0,0 +1,62 @@
+from __future__ import print_function, division
+
+import os
+import pickle
+
+import numpy as np
+
+# Numeric arrays with at least this many items are written as .npy files next to the pickle
+min_array_size = 1024
+
+
+def _array_reference(file_name):
+    return {'__npy_file__': file_name}
+
+
+def _is_array_reference(obj):
+    return isinstance(obj, dict) and len(obj) == 1 and '__npy_file__' in obj
+
+
+def _replace(obj, function):
+    if isinstance(obj, dict) and not _is_array_reference(obj):
+        return dict((key, _replace(value, function)) for key, value in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_replace(item, function) for item in obj)
+    return function(obj)
+
+
+def dump(data, pickle_file_name):
+    """
+    Pickles data to pickle_file_name where large numeric numpy arrays, also inside dicts, lists and tuples, are
+    written as raw .npy files in the same directory. Only references to the files are kept in the pickle.
+    """
+    directory, base_name = os.path.split(os.path.abspath(pickle_file_name))
+    base_name = os.path.splitext(base_name)[0]
+    array_count = [0]
+
+    def write_array(obj):
+        if isinstance(obj, np.ndarray) and obj.dtype.kind in 'biuf' and obj.size >= min_array_size:
+            file_name = base_name + '_array_' + str(array_count[0]) + '.npy'
+            array_count[0] += 1
+            np.save(os.path.join(directory, file_name), np.ascontiguousarray(obj))
+            return _array_reference(file_name)
+        return obj
+
+    with open(pickle_file_name, 'wb') as pickle_file:
+        pickle.dump(_replace(data, write_array), pickle_file, 2)
+
+
+def load(pickle_file_name, mmap_mode='r'):
+    """
+    Loads data written by dump, the arrays stored in .npy files are memory mapped
+    """
+    directory = os.path.dirname(os.path.abspath(pickle_file_name))
+    with open(pickle_file_name, 'rb') as pickle_file:
+        data = pickle.load(pickle_file)
+
+    def read_array(obj):
+        if _is_array_reference(obj):
+            return np.load(os.path.join(directory, str(obj['__npy_file__'])), mmap_mode=mmap_mode)
+        return obj
+
+    return _replace(data, read_array)
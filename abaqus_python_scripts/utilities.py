@@ -3,24 +3,85 @@ import os
 
 from odbAccess import openOdb
 
+from timing import phase
+
+
+def _file_stamp(odb_file_name):
+    stat = os.stat(odb_file_name)
+    return stat.st_size, stat.st_mtime
+
+
+class OdbCache:
+    """
+    Keeps odb files opened read only between the calls handled by odb_server.py. An odb that has been modified on disk
+    since it was opened is reopened and an odb that is opened for writing is first closed in the cache
+    """
+    def __init__(self):
+        self.enabled = False
+        self.odbs = {}
+
+    def get(self, odb_file_name):
+        odb_file_name = os.path.abspath(odb_file_name)
+        if odb_file_name in self.odbs:
+            odb, stamp = self.odbs[odb_file_name]
+            if os.path.isfile(odb_file_name) and stamp == _file_stamp(odb_file_name):
+                return odb
+            self.close(odb_file_name)
+        return None
+
+    def add(self, odb_file_name, odb):
+        odb_file_name = os.path.abspath(odb_file_name)
+        self.odbs[odb_file_name] = (odb, _file_stamp(odb_file_name))
+
+    def close(self, odb_file_name=None):
+        if odb_file_name is None:
+            odb_file_names = list(self.odbs.keys())
+        else:
+            odb_file_names = [os.path.abspath(odb_file_name)]
+        for name in odb_file_names:
+            if name in self.odbs:
+                odb, _ = self.odbs.pop(name)
+                odb.close()
+
+
+odb_cache = OdbCache()
+
 
 class OpenOdb:
+    """
+    Opens an odb in a with block. An odb opened for writing is saved when the block exits normally and closed without
+    saving if an exception is raised, so that a failing write leaves the odb on disk unchanged
+    """
     def __init__(self, odb_file_name, read_only=True):
         self.filename = odb_file_name
         self.read_only = read_only
         self.odb = None
+        self.cached = False
 
     def __enter__(self):
+        if self.read_only and odb_cache.enabled:
+            self.odb = odb_cache.get(self.filename)
+            if self.odb is None:
+                with phase('open'):
+                    self.odb = openOdb(self.filename, readOnly=True)
+                odb_cache.add(self.filename, self.odb)
+            self.cached = True
+            return self.odb
+        odb_cache.close(self.filename)
         lock_file = os.path.splitext(self.filename)[0] + ".lck"
         if not self.read_only and os.path.isfile(lock_file):
             print("Lock file " + lock_file + " detected. The odb-file will be opened when the lock file is removed")
             while os.path.isfile(lock_file):
                 pass
-        self.odb = openOdb(self.filename, readOnly=self.read_only)
+        with phase('open'):
+            self.odb = openOdb(self.filename, readOnly=self.read_only)
         return self.odb
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.read_only is False:
-            self.odb.update()
-            self.odb.save()
-        self.odb.close()
+        if self.cached:
+            return
+        with phase('save' if self.read_only is False else 'close'):
+            if self.read_only is False and exc_type is None:
+                self.odb.update()
+                self.odb.save()
+            self.odb.close()
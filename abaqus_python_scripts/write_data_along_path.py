@@ -40,7 +40,7 @@ def get_data_from_path(path, session, variable, component=None, output_position=
 
 def main():
     pickle_file_name = sys.argv[-1]
-    with open(pickle_file_name, 'r') as parameter_pickle:
+    with open(pickle_file_name, 'rb') as parameter_pickle:
         parameters = pickle.load(parameter_pickle)
 
     odb_file_name = str(parameters['odb_filename'])
@@ -48,9 +48,14 @@ def main():
     variable = str(parameters['variable'])
     output_position = output_positions[str(parameters['output_position'])]
     data_filename = str(parameters['data_filename'])
-    component = None
-    if 'component' in parameters:
-        component = str(parameters['component'])
+    # A list of components gives data of the shape (frames, points, components) and a single component, or none
+    # for scalar fields, data of the shape (frames, points)
+    if 'components' in parameters:
+        components = [str(component) for component in parameters['components']]
+    elif 'component' in parameters:
+        components = [str(parameters['component'])]
+    else:
+        components = [None]
 
     with OpenOdb(odb_file_name, read_only=True) as odb:
         session.Viewport(name='Viewport: 1', origin=(0.0, 0.0), width=309.913116455078,
@@ -81,11 +86,15 @@ def main():
 
         path_points = np.load(path_points_filename)
         path = create_path(path_points, 'path', session)
-        data = np.zeros((len(frame_numbers), path_points.shape[0]))
+        data = np.zeros((len(frame_numbers), path_points.shape[0], len(components)))
         for i, frame_number in enumerate(frame_numbers):
             session.viewports['Viewport: 1'].odbDisplay.setFrame(step=step_index, frame=frame_number)
-            data_set = np.array(get_data_from_path(path, session, variable, component, output_position=output_position))
-            data[i, :] = data_set[:, 1]
+            for j, component in enumerate(components):
+                data_set = np.array(get_data_from_path(path, session, variable, component,
+                                                       output_position=output_position))
+                data[i, :, j] = data_set[:, 1]
+        if 'components' not in parameters:
+            data = data[:, :, 0]
         np.save(data_filename, data)
 
 
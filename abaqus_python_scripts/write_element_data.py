@@ -1,41 +1,72 @@
 from __future__ import print_function, division
-from collections import defaultdict
 import pickle
 import sys
 
 import numpy as np
+
+from odb_io_functions import mesh_arrays, set_labels
+from timing import phase
 from utilities import OpenOdb
+import transport
+
+# np.isin is missing in old numpy versions shipped with abaqus and np.in1d is removed in numpy 2
+isin = getattr(np, 'isin', None) or np.in1d
+
 
-parameter_pickle_file = sys.argv[-2]
-results_pickle_file = sys.argv[-1]
-with open(parameter_pickle_file, 'r') as parameter_pickle:
-    parameters = pickle.load(parameter_pickle)
-odb_filename = str(parameters['odb_filename'])
-element_set = parameters.get("element_set", None)
-if element_set:
-    element_set = str(element_set)
-instance_name = parameters.get("instance_name", None)
-if instance_name:
-    instance_name = str(instance_name)
-all_element_data = defaultdict(dict)
-with OpenOdb(odb_filename, read_only=True) as odb:
-    if element_set is None:
-        element_base = odb.rootAssembly.instances[instance_name].elements
+def element_data(odb_filename, element_set=None, instance_name=None):
+    """
+    Returns the mesh of an instance, or of the elements in an element set, as a dict with the node labels, the node
+    coordinates and the labels and connectivity of the elements of each element type
+    """
+    odb_filename = str(odb_filename)
+    if element_set:
+        element_set = str(element_set)
+    if instance_name:
+        instance_name = str(instance_name)
     else:
-        element_base = odb.rootAssembly.instances[instance_name].elementSets[element_set].elements
-    nodes = {}
-    node_list = odb.rootAssembly.instances[instance_name].nodes
-    for i in range(len(node_list)):
-        nodes[node_list[i].label] = node_list[i].coordinates
-
-    for i in range(len(element_base)):
-        e = element_base[i]
-        element_data = all_element_data[e.type]
-        element_nodal_coordinates = []
-        for node_label in e.connectivity:
-            element_nodal_coordinates.append(nodes[node_label])
-        element_nodal_coordinates = np.array(element_nodal_coordinates)
-        element_data[e.label] = element_nodal_coordinates
-
-    with open(results_pickle_file, 'wb') as results_pickle:
-        pickle.dump(all_element_data, results_pickle)
+        instance_name = None
+
+    with OpenOdb(odb_filename, read_only=True) as odb:
+        set_element_labels = None
+        if instance_name is None:
+            # An element set on the rootAssembly, only sets with elements from one instance are supported
+            labels_by_instance = set_labels(odb.rootAssembly.elementSets[element_set], "element", assembly_set=True)
+            if len(labels_by_instance) != 1:
+                raise ValueError("The element set " + element_set + " contains elements from several instances")
+            instance_name, set_element_labels = list(labels_by_instance.items())[0]
+        elif element_set:
+            set_element_labels = set_labels(odb.rootAssembly.instances[instance_name].elementSets[element_set],
+                                            "element")
+        node_labels, node_coordinates, elements = mesh_arrays(odb.rootAssembly.instances[instance_name])
+
+    if set_element_labels is not None:
+        for element_type in list(elements.keys()):
+            element_labels, connectivity = elements[element_type]
+            in_set = isin(element_labels, set_element_labels)
+            if np.any(in_set):
+                elements[element_type] = (element_labels[in_set], connectivity[in_set])
+            else:
+                del elements[element_type]
+        # Only the nodes of the elements in the set are kept
+        used_nodes = isin(node_labels, np.concatenate([connectivity.ravel() for _, connectivity in elements.values()]
+                                                      + [np.zeros(0, dtype=int)]))
+        node_labels, node_coordinates = node_labels[used_nodes], node_coordinates[used_nodes]
+
+    return {'node_labels': node_labels, 'node_coordinates': node_coordinates,
+            'elements': dict((element_type, {'labels': labels, 'connectivity': connectivity})
+                             for element_type, (labels, connectivity) in elements.items())}
+
+
+def main():
+    parameter_pickle_file = sys.argv[-2]
+    results_pickle_file = sys.argv[-1]
+    with open(parameter_pickle_file, 'rb') as parameter_pickle:
+        parameters = pickle.load(parameter_pickle)
+    mesh_data = element_data(parameters['odb_filename'], parameters.get("element_set", None),
+                             parameters.get("instance_name", None))
+    with phase('serialize'):
+        transport.dump(mesh_data, results_pickle_file)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+from __future__ import print_function, division
+
+import pickle
+import sys
+
+from odbAccess import OdbError
+
+from abaqus_constants import output_positions, invariants
+from odb_io_functions import _add_set, _new_frame, _step, _write_field
+from utilities import OpenOdb
+import transport
+
+
+def _optional_string(value):
+    if value is None or value == '':
+        return None
+    return str(value)
+
+
+def apply_operation(odb, operation):
+    operation_type = operation['operation']
+    if operation_type == 'create_step':
+        _step(odb, str(operation['step_name']), str(operation['step_description']))
+    elif operation_type == 'create_frame':
+        step = _step(odb, str(operation['step_name']), str(operation['step_description']))
+        _new_frame(step, operation['frame_value'], str(operation['frame_description']))
+    elif operation_type == 'add_set':
+        _add_set(odb, str(operation['set_name']), str(operation['set_type']), operation['labels'],
+                 _optional_string(operation['instance_name']))
+    elif operation_type == 'write_field':
+        _write_field(odb, operation['field_data'], str(operation['field_id']), str(operation['step_name']),
+                     instance_name=_optional_string(operation['instance_name']),
+                     set_name=_optional_string(operation['set_name']),
+                     step_description=str(operation['step_description']),
+                     frame_number=operation['frame_number'], frame_value=operation['frame_value'],
+                     field_description=str(operation['field_description']),
+                     invariants=[invariants[str(inv)] for inv in operation['invariants']],
+                     position=output_positions[str(operation['position'])], labels=operation['labels'])
+    else:
+        raise ValueError("Unknown odb operation " + str(operation_type))
+
+
+def apply_operations(odb_file, operations):
+    """
+    Applies the operations to an odb and returns a dict {'ERROR': messages} if an operation failed, else an empty dict.
+    If an operation fails, the odb is closed without saving and none of the operations are applied
+    """
+    odb_file = str(odb_file)
+    try:
+        # All operations are applied to the odb opened once, it is saved once when all operations have succeeded
+        with OpenOdb(odb_file, read_only=False) as odb:
+            for operation in operations:
+                apply_operation(odb, operation)
+    except (OdbError, KeyError, TypeError, ValueError) as e:
+        return {'ERROR': ["problems in writing data to the odb " + odb_file, str(e)]}
+    return {}
+
+
+def main():
+    pickle_file_name = sys.argv[-1]
+    data = transport.load(pickle_file_name)
+    errors = apply_operations(data['odb_file'], data['operations'])
+    if errors:
+        with open(pickle_file_name, 'wb') as pickle_file:
+            pickle.dump(errors, pickle_file)
+
+
+if __name__ == '__main__':
+    main()
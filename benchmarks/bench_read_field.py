@@ -0,0 +1,52 @@
+"""
+Compares the bulk extraction of field data with the per-point loop over field.values on a synthetic odb using the
+stand-in odbAccess module in test/abaqus_stub
+
+    python benchmarks/bench_read_field.py --elements 40 40 40
+"""
+import argparse
+import pathlib
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+root_directory = pathlib.Path(__file__).parents[1]
+sys.path.insert(0, str(root_directory / 'test' / 'abaqus_stub'))
+sys.path.insert(0, str(root_directory / 'abaqus_python_scripts'))
+
+from abaqusConstants import INTEGRATION_POINT  # noqa: E402
+from odbAccess import openOdb  # noqa: E402
+from odb_io_functions import field_data_as_arrays, _field_data_from_values  # noqa: E402
+from synthetic_odb import create_synthetic_odb  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--elements', type=int, nargs=3, default=(30, 30, 30), help='Elements in x, y and z')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as work_directory:
+        odb_file_name = pathlib.Path(work_directory) / 'benchmark.odb'
+        create_synthetic_odb(odb_file_name, elements=args.elements, steps=(('loading', 2),), fields=('S',))
+        odb = openOdb(str(odb_file_name), readOnly=True)
+        field = odb.steps['loading'].frames[-1].fieldOutputs['S'].getSubset(position=INTEGRATION_POINT)
+
+        start_time = time.perf_counter()
+        bulk_data, _, bulk_labels = field_data_as_arrays(field, INTEGRATION_POINT)
+        bulk_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        loop_data, _, loop_labels = _field_data_from_values(field.values, INTEGRATION_POINT)
+        loop_time = time.perf_counter() - start_time
+        odb.close()
+
+    assert np.array_equal(bulk_data, loop_data) and np.array_equal(bulk_labels, loop_labels)
+    print("Integration points:    ", bulk_data.shape[0])
+    print("bulkDataBlocks:         %.3f s" % bulk_time)
+    print("field.values loop:      %.3f s" % loop_time)
+    print("Speedup:                %.1f" % (loop_time/bulk_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,338 @@
+"""
+Runs the operations of ABQInterface and the routines in odb_io_functions on a synthetic odb using the stand-in
+odbAccess module in test/abaqus_stub and reports the time, the throughput in values per second and the peak memory of
+each operation. The results can be stored as a baseline and later runs are compared against the baseline of the same
+model size, so regressions in the hot paths show up without an abaqus license
+
+    python benchmarks/bench_suite.py --elements 20 20 20 --frames 5 --save-baseline
+    python benchmarks/bench_suite.py --elements 20 20 20 --frames 5
+
+The odb_io_functions routines are run in this process and their peak memory is the peak of the numpy and python
+allocations during the routine. The ABQInterface operations launch the stub abaqus and their peak memory is the peak of
+the allocations on the client side. Every repetition of an ABQInterface operation uses a new interface, so the time
+includes reading the odb metadata. The times are the minimum over the repetitions.
+"""
+from collections import namedtuple
+
+import argparse
+import json
+import pathlib
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+root_directory = pathlib.Path(__file__).parents[1]
+stub_directory = root_directory / 'test' / 'abaqus_stub'
+sys.path.insert(0, str(stub_directory))
+sys.path.insert(0, str(root_directory / 'abaqus_python_scripts'))
+sys.path.insert(0, str(root_directory))
+
+import odb_io_functions  # noqa: E402
+from abaqusConstants import INTEGRATION_POINT, NODAL, MISES  # noqa: E402
+from odbAccess import openOdb  # noqa: E402
+from synthetic_odb import create_synthetic_odb  # noqa: E402
+
+from abaqus_python_interface.abaqus_interface import ABQInterface, FieldRequest  # noqa: E402
+from abaqus_python_interface.operator_cache import OperatorCache  # noqa: E402
+
+default_baseline_file = pathlib.Path(__file__).parent / 'baselines.json'
+stub_abaqus_command = sys.executable + ' ' + str(stub_directory / 'abaqus_stub.py')
+
+# setup(model) returns the arguments of run, it is not included in the time. run returns the results of the operation
+# which are counted for the throughput
+Benchmark = namedtuple('Benchmark', ['name', 'setup', 'run'])
+
+
+class Model:
+    """
+    The synthetic odb and the interface used by the benchmarks
+    """
+    def __init__(self, work_directory, elements, frames, fields, session):
+        self.work_directory = pathlib.Path(work_directory)
+        self.odb_file_name = self.work_directory / 'benchmark.odb'
+        self.fields = fields
+        self.frames = frames
+        self.element_count = int(np.prod(elements))
+        create_synthetic_odb(self.odb_file_name, elements=elements, steps=(('loading', frames),), fields=fields)
+        self.abq = ABQInterface(stub_abaqus_command, output=False, cache_directory=False)
+        if session:
+            self.abq.start_session()
+        self.copies = 0
+        self.odb = None
+
+    def odb_copy(self):
+        """
+        Returns a new copy of the odb for the operations writing to the odb
+        """
+        self.copies += 1
+        copy_file_name = self.work_directory / ('copy_' + str(self.copies) + '.odb')
+        shutil.copyfile(self.odb_file_name, copy_file_name)
+        return copy_file_name
+
+    def interface(self):
+        """
+        Returns a new ABQInterface without any cached metadata or interpolation operators, using the session of the
+        model if there is one
+        """
+        abq = self.abq._clone()
+        abq.operator_cache = OperatorCache(False)
+        abq.abaqus_session = self.abq.abaqus_session
+        return abq
+
+    def open_odb(self):
+        if self.odb is None:
+            self.odb = openOdb(str(self.odb_file_name), readOnly=True)
+        return self.odb
+
+    def close(self):
+        self.abq.stop_session()
+        if self.odb is not None:
+            self.odb.close()
+
+
+def _path_points(points=200):
+    t = np.linspace(0.05, 0.95, points)
+    return np.vstack([t, 0.5*np.ones(points), t]).T
+
+
+def _odb_io_benchmarks(model):
+    benchmarks = [
+        Benchmark('read_field_from_odb[S]',
+                  lambda: (model.odb_file_name,),
+                  lambda odb: odb_io_functions.read_field_from_odb('S', str(odb), 'loading',
+                                                                   instance_name='PART-1', get_position_numbers=True)),
+        Benchmark('read_field_from_odb[S, MISES]',
+                  lambda: (model.odb_file_name,),
+                  lambda odb: odb_io_functions.read_field_from_odb('S', str(odb), 'loading', instance_name='PART-1',
+                                                                   invariant=MISES)),
+        Benchmark('read_field_from_odb[U, NODAL, BOTTOM]',
+                  lambda: (model.odb_file_name,),
+                  lambda odb: odb_io_functions.read_field_from_odb('U', str(odb), 'loading', set_name='BOTTOM',
+                                                                   instance_name='PART-1', position=NODAL)),
+        Benchmark('read_fields_from_odb[all frames]',
+                  lambda: (model.odb_file_name,),
+                  lambda odb: odb_io_functions.read_fields_from_odb(
+                      str(odb), [{'field_id': field_id, 'step_name': 'loading', 'frame_number': frame_number,
+                                  'instance_name': 'PART-1',
+                                  'position': NODAL if field_id in ('U', 'TEMP') else INTEGRATION_POINT}
+                                 for field_id in model.fields for frame_number in range(model.frames)])),
+        Benchmark('field_data_as_arrays[S]',
+                  lambda: (model.open_odb().steps['loading'].frames[-1].fieldOutputs['S'],),
+                  lambda field: odb_io_functions.field_data_as_arrays(field, INTEGRATION_POINT)),
+        Benchmark('mesh_arrays',
+                  lambda: (model.open_odb().rootAssembly.instances['PART-1'],),
+                  odb_io_functions.mesh_arrays),
+        Benchmark('get_nodal_coordinates_from_node_set',
+                  lambda: (model.odb_file_name,),
+                  lambda odb: odb_io_functions.get_nodal_coordinates_from_node_set(str(odb), 'BOTTOM', 'PART-1')),
+        Benchmark('write_field_to_odb[S]',
+                  lambda: (odb_io_functions.read_field_from_odb('S', str(model.odb_file_name), 'loading',
+                                                                instance_name='PART-1'), model.odb_copy()),
+                  lambda data, odb: (odb_io_functions.write_field_to_odb(data, 'S_COPY', str(odb), 'written'),
+                                     data)[1]),
+        Benchmark('add_sets',
+                  lambda: (model.odb_copy(), np.arange(1, model.element_count + 1)),
+                  lambda odb, labels: (odb_io_functions.add_sets(str(odb), [('NEW_NODES', 'node', labels, 'PART-1'),
+                                                                             ('NEW_ELEMENTS', 'element', labels,
+                                                                              'PART-1')]), labels)[1]),
+        Benchmark('add_node_set',
+                  lambda: (model.odb_copy(), np.arange(1, model.element_count + 1).tolist()),
+                  lambda odb, labels: (odb_io_functions.add_node_set(str(odb), 'NEW_NODES', labels, 'PART-1'),
+                                       labels)[1]),
+        Benchmark('add_element_set',
+                  lambda: (model.odb_copy(), np.arange(1, model.element_count + 1).tolist()),
+                  lambda odb, labels: (odb_io_functions.add_element_set(str(odb), 'NEW_ELEMENTS', labels, 'PART-1'),
+                                       labels)[1]),
+        Benchmark('flip_node_order',
+                  lambda: (np.ones((8*model.element_count, 6)),),
+                  lambda data: odb_io_functions.flip_node_order(data, 'z')),
+    ]
+    return benchmarks
+
+
+def _interface_benchmarks(model):
+    odb_file_name = model.odb_file_name
+
+    def interface(*arguments):
+        return lambda: (model.interface(),) + tuple(argument() for argument in arguments)
+
+    benchmarks = [
+        Benchmark('ABQInterface.get_odb_summary', interface(), lambda abq: abq.get_odb_summary(odb_file_name)),
+        Benchmark('ABQInterface.read_data_from_odb[S]', interface(),
+                  lambda abq: abq.read_data_from_odb('S', odb_file_name, get_position_numbers=True)),
+        Benchmark('ABQInterface.read_data_from_odb[S, MISES]', interface(),
+                  lambda abq: abq.read_data_from_odb('S', odb_file_name, invariant='MISES')),
+        Benchmark('ABQInterface.read_many[all frames]', interface(),
+                  lambda abq: abq.read_many(odb_file_name, [
+                      FieldRequest(field_id, frame_number=frame_number,
+                                   position='NODAL' if field_id in ('U', 'TEMP') else 'INTEGRATION_POINT')
+                      for field_id in model.fields for frame_number in range(model.frames)])),
+        Benchmark('ABQInterface.read_field_time_series', interface(),
+                  lambda abq: abq.read_field_time_series(odb_file_name, model.fields[0], labels=np.arange(1, 101),
+                                                         position=('NODAL' if model.fields[0] in ('U', 'TEMP')
+                                                                   else 'INTEGRATION_POINT'))),
+        Benchmark('ABQInterface.read_history_output', interface(),
+                  lambda abq: abq.read_history_output(odb_file_name)),
+        Benchmark('ABQInterface.get_mesh', interface(), lambda abq: abq.get_mesh(odb_file_name)),
+        Benchmark('ABQInterface.get_element_data', interface(), lambda abq: abq.get_element_data(odb_file_name)),
+        Benchmark('ABQInterface.get_odb_geometry', interface(), lambda abq: abq.get_odb_geometry(odb_file_name)),
+        Benchmark('ABQInterface.get_nodal_coordinates_from_node_set', interface(),
+                  lambda abq: abq.get_nodal_coordinates_from_node_set(odb_file_name, 'BOTTOM', 'PART-1')),
+        Benchmark('ABQInterface.write_data_to_odb[S]',
+                  interface(lambda: model.abq.read_data_from_odb('S', odb_file_name), model.odb_copy),
+                  lambda abq, data, odb: (abq.write_data_to_odb(data, 'S_COPY', odb, 'written'), data)[1]),
+        Benchmark('ABQInterface.add_sets',
+                  interface(model.odb_copy, lambda: np.arange(1, model.element_count + 1)),
+                  lambda abq, odb, labels: (abq.add_sets(odb, node_sets={'PART-1': {'NEW_NODES': labels}},
+                                                         element_sets={'PART-1': {'NEW_ELEMENTS': labels}}),
+                                            labels)[1]),
+        Benchmark('ABQInterface.create_empty_odb_from_odb',
+                  interface(lambda: model.odb_copy().with_suffix('.empty.odb')),
+                  lambda abq, new_odb: abq.create_empty_odb_from_odb(new_odb, odb_file_name)),
+    ]
+    if 'U' in model.fields:
+        benchmarks += [
+            Benchmark('ABQInterface.get_data_from_path[U, numpy]', interface(),
+                      lambda abq: abq.get_data_from_path(odb_file_name, _path_points(), 'U', 'U1',
+                                                         output_position='NODAL', frame_numbers='ALL',
+                                                         engine='numpy')),
+            Benchmark('ABQInterface.get_tensor_from_path[U, numpy]', interface(),
+                      lambda abq: abq.get_tensor_from_path(odb_file_name, _path_points(), 'U',
+                                                           components=('1', '2', '3'), output_position='NODAL',
+                                                           frame_numbers='ALL', engine='numpy'))
+        ]
+    return benchmarks
+
+
+def _values(result):
+    """
+    Number of values in the results of an operation, the arrays in nested containers
+    """
+    if isinstance(result, np.ndarray):
+        if result.dtype.names:
+            return sum(result[name].size for name in result.dtype.names)
+        return result.size
+    if isinstance(result, dict):
+        return sum(_values(value) for value in result.values())
+    if isinstance(result, (list, tuple)):
+        return sum(_values(value) for value in result)
+    if isinstance(result, (int, float, np.number)):
+        return 1
+    if hasattr(result, '__dict__'):
+        return _values(vars(result))
+    return 0
+
+
+def measure(benchmark, repeat):
+    """
+    Runs a benchmark and returns a dict with the time, the values per second and the peak memory in bytes
+    """
+    times = []
+    for _ in range(repeat):
+        arguments = benchmark.setup()
+        start_time = time.perf_counter()
+        result = benchmark.run(*arguments)
+        times.append(time.perf_counter() - start_time)
+    values = _values(result)
+    del result
+
+    arguments = benchmark.setup()
+    tracemalloc.start()
+    try:
+        result = benchmark.run(*arguments)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    best_time = min(times)
+    return {'time': best_time, 'values': values, 'values_per_second': values/best_time if best_time > 0 else 0.,
+            'peak_memory': peak_memory}
+
+
+def configuration_key(args):
+    return ('elements=' + 'x'.join(str(n) for n in args.elements) + ' frames=' + str(args.frames)
+            + ' fields=' + ','.join(args.fields))
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returns a list with the names of the operations that are slower or use more memory than the baseline
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name, None)
+        if reference is None:
+            continue
+        if (result['time'] > (1 + tolerance)*reference['time']
+                or result['peak_memory'] > (1 + tolerance)*reference['peak_memory']):
+            regressions.append(name)
+    return regressions
+
+
+def _print_results(results, baseline):
+    print(format('Operation', '56s') + format('Time [s]', '>10s') + format('Values/s', '>12s')
+          + format('Peak [MB]', '>11s') + format('vs baseline', '>13s'))
+    for name, result in results.items():
+        line = (format(name, '56s') + format(result['time'], '10.4f') + format(result['values_per_second'], '12.3g')
+                + format(result['peak_memory']/2**20, '11.2f'))
+        if name in baseline:
+            line += format(result['time']/baseline[name]['time'], '12.2f') + 'x'
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--elements', type=int, nargs=3, default=(10, 10, 10), help='Elements in x, y and z')
+    parser.add_argument('--frames', type=int, default=3, help='Number of frames')
+    parser.add_argument('--fields', nargs='+', default=['S', 'PE', 'U', 'TEMP'], choices=['S', 'PE', 'U', 'TEMP'],
+                        help='Fields in the frames')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetitions of every operation')
+    parser.add_argument('--operations', nargs='+', default=None,
+                        help='Only run the operations with names containing any of these strings')
+    parser.add_argument('--session', action='store_true', help='Run the ABQInterface operations in a session')
+    parser.add_argument('--baseline-file', type=pathlib.Path, default=default_baseline_file,
+                        help='File with the stored baselines')
+    parser.add_argument('--save-baseline', action='store_true', help='Store the results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed relative increase of time and peak memory over the baseline')
+    args = parser.parse_args()
+
+    baselines = {}
+    if args.baseline_file.is_file():
+        with open(args.baseline_file) as baseline_file:
+            baselines = json.load(baseline_file)
+    key = configuration_key(args)
+    baseline = baselines.get(key, {})
+
+    results = {}
+    with tempfile.TemporaryDirectory() as work_directory:
+        model = Model(work_directory, args.elements, args.frames, args.fields, args.session)
+        try:
+            for benchmark in _odb_io_benchmarks(model) + _interface_benchmarks(model):
+                if args.operations and not any(operation in benchmark.name for operation in args.operations):
+                    continue
+                results[benchmark.name] = measure(benchmark, args.repeat)
+        finally:
+            model.close()
+
+    print(key)
+    _print_results(results, baseline)
+    if args.save_baseline:
+        baselines[key] = dict(baseline, **results)
+        with open(args.baseline_file, 'w') as baseline_file:
+            json.dump(baselines, baseline_file, indent=2, sort_keys=True)
+        print('Baseline saved to', args.baseline_file)
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for name in regressions:
+        print('Regression:', name)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""
+Stand-in for the abaqusConstants module of Abaqus used when the scripts in abaqus_python_scripts are tested under
+plain python.
+"""
+
+
+class SymbolicConstant(str):
+    def __repr__(self):
+        return str(self)
+
+
+_constant_names = [
+    # Output positions
+    'NODAL', 'ELEMENT_NODAL', 'INTEGRATION_POINT', 'CENTROID', 'ELEMENT_CENTROID', 'ELEMENT_FACE', 'WHOLE_ELEMENT',
+    'WHOLE_MODEL', 'WHOLE_REGION', 'WHOLE_PART_INSTANCE', 'GENERAL_PARTICLE',
+    # Invariants
+    'MISES', 'PRESS', 'MAGNITUDE', 'TRESCA', 'INV3', 'MAX_PRINCIPAL', 'MID_PRINCIPAL', 'MIN_PRINCIPAL',
+    'MAX_INPLANE_PRINCIPAL', 'MIN_INPLANE_PRINCIPAL', 'OUTOFPLANE_PRINCIPAL',
+    # Field types
+    'SCALAR', 'VECTOR', 'TENSOR_3D_FULL', 'TENSOR_3D_PLANAR', 'TENSOR_3D_SURFACE', 'TENSOR_2D_PLANAR',
+    'TENSOR_2D_SURFACE',
+    # Coordinate systems
+    'CYLINDRICAL', 'CARTESIAN', 'SPHERICAL',
+    # Parts and steps
+    'DEFORMABLE_BODY', 'DISCRETE_RIGID_SURFACE', 'ANALYTIC_RIGID_SURFACE', 'THREE_D', 'TWO_D_PLANAR', 'AXISYMMETRIC',
+    'TIME', 'FREQUENCY', 'MODAL', 'ARC_LENGTH',
+    # Paths and xy-data
+    'POINT_LIST', 'TRUE_DISTANCE', 'UNDEFORMED', 'PATH_POINTS', 'COMPONENT', 'INVARIANT',
+    # Precision
+    'SINGLE_PRECISION', 'DOUBLE_PRECISION',
+]
+
+for _name in _constant_names:
+    globals()[_name] = SymbolicConstant(_name)
+
+ON = True
+OFF = False
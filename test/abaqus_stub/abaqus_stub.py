@@ -0,0 +1,61 @@
+"""
+Stand-in for the abaqus command used in the tests. The commands
+
+    abaqus python script.py arguments
+    abaqus viewer noGUI=script.py -- arguments
+
+runs the script under the python interpreter running this file with the stand-in odbAccess and abaqusConstants
+modules on the path. The abaqus command given to ABQInterface is then "python /path/to/abaqus_stub.py"
+
+The command "abaqus j=job [cpus=n] [user=...] [ask_delete=OFF] interactive" is a fake solver reading job.inp in the
+working directory. A line "** sleep t" makes it run for t seconds and a line "** fail" makes it fail with exit code 1.
+The solver writes job.msg, job.sta and, if it does not fail, an empty job.odb.
+"""
+import os
+import runpy
+import sys
+import time
+
+stub_directory = os.path.dirname(os.path.abspath(__file__))
+
+
+def solve(arguments):
+    options = dict(argument.split('=', 1) for argument in arguments if '=' in argument)
+    job_name = options['j']
+    with open(job_name + '.inp') as input_file:
+        comments = [line[2:].split() for line in input_file if line.startswith('**')]
+    sleep_time = sum(float(comment[1]) for comment in comments if comment and comment[0] == 'sleep')
+    fail = any(comment and comment[0] == 'fail' for comment in comments)
+    with open(job_name + '.msg', 'w') as msg_file:
+        msg_file.write('cpus=' + options.get('cpus', '1') + '\n')
+    time.sleep(sleep_time)
+    with open(job_name + '.sta', 'w') as sta_file:
+        if fail:
+            sta_file.write(' THE ANALYSIS HAS NOT BEEN COMPLETED\n')
+        else:
+            sta_file.write(' THE ANALYSIS HAS COMPLETED SUCCESSFULLY\n')
+    if fail:
+        sys.exit(1)
+    open(job_name + '.odb', 'wb').close()
+
+
+def main():
+    arguments = sys.argv[1:]
+    if arguments and arguments[0].startswith('j='):
+        solve(arguments)
+        return
+    if len(arguments) > 1 and arguments[0] == 'python':
+        script_name = arguments[1]
+    elif len(arguments) > 1 and arguments[0] == 'viewer' and arguments[1].startswith('noGUI='):
+        script_name = arguments[1][len('noGUI='):]
+    else:
+        sys.exit('The abaqus stand-in only supports "abaqus python" and "abaqus viewer noGUI="')
+    script_name = os.path.abspath(script_name)
+    sys.path.insert(0, stub_directory)
+    sys.path.insert(0, os.path.dirname(script_name))
+    sys.argv = [script_name] + arguments[2:]
+    runpy.run_path(script_name, run_name='__main__')
+
+
+if __name__ == '__main__':
+    main()
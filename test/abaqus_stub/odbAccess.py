@@ -0,0 +1,810 @@
+"""
+Stand-in for the odbAccess module of Abaqus used when the scripts in abaqus_python_scripts are tested under plain
+python. Only the parts of the odb api used by the scripts are implemented. An odb is stored as a pickle of the Odb
+object, the field data is kept in numpy arrays in the same blocks as exposed by FieldOutput.bulkDataBlocks and the
+per-point objects, OdbMeshNode, OdbMeshElement and FieldValue, are created when they are accessed as in Abaqus.
+"""
+import os
+import pickle
+
+import numpy as np
+
+from abaqusConstants import NODAL, ELEMENT_NODAL, INTEGRATION_POINT, CENTROID, ELEMENT_CENTROID, WHOLE_ELEMENT
+from abaqusConstants import SCALAR, VECTOR, TENSOR_3D_FULL, CYLINDRICAL, SINGLE_PRECISION, DEFORMABLE_BODY
+from abaqusConstants import MISES, PRESS, TRESCA, INV3, MAGNITUDE, MAX_PRINCIPAL, MID_PRINCIPAL, MIN_PRINCIPAL
+
+integration_points_per_element = {
+    'C3D4': 1, 'C3D4T': 1, 'C3D6': 2, 'C3D6T': 2, 'C3D8': 8, 'C3D8T': 8, 'C3D8R': 1, 'C3D8RT': 1, 'C3D8I': 8,
+    'C3D10': 4, 'C3D10M': 4, 'C3D15': 9, 'C3D20': 27, 'C3D20T': 27, 'C3D20R': 8, 'C3D20RT': 8
+}
+
+field_components = {SCALAR: 1, VECTOR: 3, TENSOR_3D_FULL: 6}
+component_suffixes = {SCALAR: [''], VECTOR: ['1', '2', '3'], TENSOR_3D_FULL: ['11', '22', '33', '12', '13', '23']}
+element_positions = [INTEGRATION_POINT, CENTROID, ELEMENT_NODAL, ELEMENT_CENTROID, WHOLE_ELEMENT]
+
+
+class OdbError(Exception):
+    pass
+
+
+class Repository(dict):
+    """
+    Repositories in Abaqus are ordered and keys() returns a list
+    """
+    def __init__(self):
+        super(Repository, self).__init__()
+        self._order = []
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self._order.append(key)
+        super(Repository, self).__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._order.remove(key)
+        super(Repository, self).__delitem__(key)
+
+    def __iter__(self):
+        return iter(list(self._order))
+
+    def keys(self):
+        return list(self._order)
+
+    def values(self):
+        return [self[key] for key in self._order]
+
+    def items(self):
+        return [(key, self[key]) for key in self._order]
+
+    def __reduce__(self):
+        return _rebuild_repository, (self.items(),)
+
+
+def _rebuild_repository(items):
+    repository = Repository()
+    for key, value in items:
+        repository[key] = value
+    return repository
+
+
+class OdbMeshNode(object):
+    def __init__(self, label, coordinates, instance_name):
+        self.label = int(label)
+        self.coordinates = tuple(float(c) for c in coordinates)
+        self.instanceName = instance_name
+
+
+class OdbMeshElement(object):
+    def __init__(self, label, element_type, connectivity, instance_name):
+        self.label = int(label)
+        self.type = element_type
+        self.connectivity = tuple(int(n) for n in connectivity)
+        self.instanceName = instance_name
+        self.instanceNames = (instance_name,)
+
+
+class OdbMeshNodeArray(object):
+    def __init__(self, container, indices=None):
+        self.container = container
+        self.indices = indices
+
+    def __len__(self):
+        if self.indices is None:
+            return self.container.node_labels.shape[0]
+        return len(self.indices)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError('Sequence index out of range')
+        idx = i if self.indices is None else self.indices[i]
+        return OdbMeshNode(self.container.node_labels[idx], self.container.node_coordinates[idx],
+                           self.container.name)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class OdbMeshElementArray(object):
+    def __init__(self, container, indices=None):
+        self.container = container
+        self.indices = indices
+
+    def __len__(self):
+        if self.indices is None:
+            return self.container.element_labels.shape[0]
+        return len(self.indices)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError('Sequence index out of range')
+        idx = i if self.indices is None else self.indices[i]
+        block_idx, row = self.container.element_position(idx)
+        element_type, labels, connectivity = self.container.element_blocks[block_idx]
+        return OdbMeshElement(labels[row], element_type, connectivity[row], self.container.name)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class OdbSet(object):
+    """
+    A node or element set. The labels are stored per instance name, sets on parts and instances only have one entry
+    """
+    def __init__(self, name, set_type, labels_by_instance, assembly=None):
+        self.name = name
+        self.set_type = set_type
+        self.labels_by_instance = dict((instance_name, np.asarray(labels, dtype=int))
+                                       for instance_name, labels in labels_by_instance.items())
+        self.assembly = assembly
+
+    @property
+    def instanceNames(self):
+        return tuple(self.labels_by_instance.keys())
+
+    def _objects(self, container, labels):
+        if self.set_type == 'node':
+            return OdbMeshNodeArray(container, container.node_indices(labels))
+        return OdbMeshElementArray(container, container.element_indices(labels))
+
+    @property
+    def nodes(self):
+        if self.set_type != 'node':
+            return None
+        return self._set_objects()
+
+    @property
+    def elements(self):
+        if self.set_type != 'element':
+            return None
+        return self._set_objects()
+
+    def _set_objects(self):
+        if self.assembly is None:
+            container, labels = self._container, next(iter(self.labels_by_instance.values()))
+            return self._objects(container, labels)
+        return [self._objects(self.assembly.instances[name], labels)
+                for name, labels in self.labels_by_instance.items()]
+
+
+class DatumCsys(object):
+    def __init__(self, name, coordSysType, origin, xAxis, yAxis, zAxis):
+        self.name = name
+        self.coordSysType = coordSysType
+        self.origin = tuple(origin)
+        self.xAxis = tuple(xAxis)
+        self.yAxis = tuple(yAxis)
+        self.zAxis = tuple(zAxis)
+
+
+class _MeshContainer(object):
+    def __init__(self, name):
+        self.name = name
+        self.node_labels = np.zeros(0, dtype=int)
+        self.node_coordinates = np.zeros((0, 3), dtype=np.float32)
+        self.element_blocks = []
+        self.nodeSets = Repository()
+        self.elementSets = Repository()
+
+    @property
+    def element_labels(self):
+        if not self.element_blocks:
+            return np.zeros(0, dtype=int)
+        return np.concatenate([labels for _, labels, _ in self.element_blocks])
+
+    def element_position(self, idx):
+        for block_idx, (_, labels, _) in enumerate(self.element_blocks):
+            if idx < labels.shape[0]:
+                return block_idx, idx
+            idx -= labels.shape[0]
+        raise IndexError('Sequence index out of range')
+
+    def node_indices(self, labels):
+        return _indices_of(self.node_labels, labels)
+
+    def element_indices(self, labels):
+        return _indices_of(self.element_labels, labels)
+
+    def element_connectivity(self, labels):
+        """
+        Returns the element type and the connectivity for each element label
+        """
+        types = []
+        connectivity = []
+        labels = np.asarray(labels, dtype=int)
+        for element_type, block_labels, block_connectivity in self.element_blocks:
+            rows = _indices_of(block_labels, labels, missing_ok=True)
+            for label, row in zip(labels, rows):
+                if row >= 0:
+                    types.append((label, element_type))
+                    connectivity.append((label, block_connectivity[row]))
+        type_dict = dict(types)
+        connectivity_dict = dict(connectivity)
+        if len(type_dict) != labels.shape[0]:
+            raise OdbError('Element labels not present in ' + self.name)
+        return [type_dict[label] for label in labels], [connectivity_dict[label] for label in labels]
+
+    @property
+    def nodes(self):
+        return OdbMeshNodeArray(self)
+
+    @property
+    def elements(self):
+        return OdbMeshElementArray(self)
+
+    def addNodes(self, labels=None, coordinates=None, nodeData=None, nodeSetName=None):
+        if nodeData is not None:
+            labels = [n[0] for n in nodeData]
+            coordinates = [n[1:] for n in nodeData]
+        labels = np.asarray(labels, dtype=int)
+        coordinates = np.asarray(coordinates, dtype=np.float32).reshape(labels.shape[0], -1)
+        if coordinates.shape[1] < 3:
+            coordinates = np.hstack([coordinates, np.zeros((labels.shape[0], 3 - coordinates.shape[1]),
+                                                           dtype=np.float32)])
+        self.node_labels = np.concatenate([self.node_labels, labels])
+        self.node_coordinates = np.vstack([self.node_coordinates, coordinates])
+        if nodeSetName:
+            self.nodeSets[nodeSetName] = self._create_set(nodeSetName, 'node', labels)
+
+    def addElements(self, labels=None, connectivity=None, type=None, elementData=None, elementSetName=None):
+        if elementData is not None:
+            labels = [e[0] for e in elementData]
+            connectivity = [e[1:] for e in elementData]
+        labels = np.asarray(labels, dtype=int)
+        connectivity = np.asarray(connectivity, dtype=int).reshape(labels.shape[0], -1)
+        self.element_blocks.append((str(type), labels, connectivity))
+        if elementSetName:
+            self.elementSets[elementSetName] = self._create_set(elementSetName, 'element', labels)
+
+    def _create_set(self, name, set_type, labels):
+        odb_set = OdbSet(name, set_type, {self.name: labels})
+        odb_set._container = self
+        return odb_set
+
+    def _add_set(self, repository, name, set_type, labels):
+        if name in repository:
+            raise OdbError('The set ' + name + ' already exists')
+        repository[name] = self._create_set(name, set_type, labels)
+        return repository[name]
+
+    def NodeSet(self, name, nodes):
+        return self._add_set(self.nodeSets, name, 'node', [n.label for n in nodes])
+
+    def ElementSet(self, name, elements):
+        return self._add_set(self.elementSets, name, 'element', [e.label for e in elements])
+
+    def NodeSetFromNodeLabels(self, name, nodeLabels):
+        return self._add_set(self.nodeSets, name, 'node', nodeLabels)
+
+    def ElementSetFromElementLabels(self, name, elementLabels):
+        return self._add_set(self.elementSets, name, 'element', elementLabels)
+
+
+class OdbPart(_MeshContainer):
+    def __init__(self, name, embeddedSpace, type):
+        super(OdbPart, self).__init__(name)
+        self.embeddedSpace = embeddedSpace
+        self.type = type
+
+
+class OdbInstance(_MeshContainer):
+    def __init__(self, name, part):
+        super(OdbInstance, self).__init__(name)
+        self.embeddedSpace = part.embeddedSpace
+        self.type = part.type
+        self.node_labels = part.node_labels.copy()
+        self.node_coordinates = part.node_coordinates.copy()
+        self.element_blocks = [(t, labels.copy(), connectivity.copy()) for t, labels, connectivity
+                               in part.element_blocks]
+        for set_name, part_set in part.nodeSets.items():
+            self.nodeSets[set_name] = self._create_set(set_name, 'node', part_set.labels_by_instance[part.name])
+        for set_name, part_set in part.elementSets.items():
+            self.elementSets[set_name] = self._create_set(set_name, 'element',
+                                                          part_set.labels_by_instance[part.name])
+
+
+class OdbAssembly(object):
+    def __init__(self):
+        self.name = 'ASSEMBLY'
+        self.instances = Repository()
+        self.nodeSets = Repository()
+        self.elementSets = Repository()
+        self.surfaces = Repository()
+        self.datumCsyses = Repository()
+
+    @property
+    def nodes(self):
+        return []
+
+    @property
+    def elements(self):
+        return []
+
+    def Instance(self, name, object, localCoordSystem=None):
+        self.instances[name] = OdbInstance(name, object)
+        return self.instances[name]
+
+    def _add_set(self, repository, name, set_type, labels_by_instance):
+        if name in repository:
+            raise OdbError('The set ' + name + ' already exists')
+        repository[name] = OdbSet(name, set_type, labels_by_instance, assembly=self)
+        return repository[name]
+
+    def NodeSet(self, name, nodes):
+        labels = {}
+        for instance_nodes in nodes:
+            for n in instance_nodes:
+                labels.setdefault(n.instanceName, []).append(n.label)
+        return self._add_set(self.nodeSets, name, 'node', labels)
+
+    def ElementSet(self, name, elements):
+        labels = {}
+        for instance_elements in elements:
+            for e in instance_elements:
+                labels.setdefault(e.instanceName, []).append(e.label)
+        return self._add_set(self.elementSets, name, 'element', labels)
+
+    def NodeSetFromNodeLabels(self, name, nodeLabels):
+        return self._add_set(self.nodeSets, name, 'node', dict((str(i), labels) for i, labels in nodeLabels))
+
+    def ElementSetFromElementLabels(self, name, elementLabels):
+        return self._add_set(self.elementSets, name, 'element', dict((str(i), labels) for i, labels in elementLabels))
+
+    def DatumCsysByThreePoints(self, name, coordSysType, origin, point1, point2):
+        origin = np.array(origin, dtype=float)
+        x_axis = np.array(point1, dtype=float) - origin
+        x_axis /= np.linalg.norm(x_axis)
+        z_axis = np.cross(x_axis, np.array(point2, dtype=float) - origin)
+        z_axis /= np.linalg.norm(z_axis)
+        y_axis = np.cross(z_axis, x_axis)
+        self.datumCsyses[name] = DatumCsys(name, coordSysType, origin, x_axis, y_axis, z_axis)
+        return self.datumCsyses[name]
+
+
+class SectionPoint(object):
+    def __init__(self, number, description=''):
+        self.number = number
+        self.description = description
+
+
+class SectionCategory(object):
+    def __init__(self, name, description=''):
+        self.name = name
+        self.description = description
+        self.sectionPoints = []
+
+    def SectionPoint(self, number, description=''):
+        section_point = SectionPoint(number, description)
+        self.sectionPoints.append(section_point)
+        return section_point
+
+
+class FieldValue(object):
+    def __init__(self, block, row):
+        data = block.data[row]
+        self.data = float(data[0]) if block.data.shape[1] == 1 else tuple(float(d) for d in data)
+        self.position = block.position
+        self.instance = block.instance
+        self.type = block.type
+        self.precision = SINGLE_PRECISION
+        self.elementLabel = None if block.elementLabels is None else int(block.elementLabels[row])
+        self.nodeLabel = None if block.nodeLabels is None else int(block.nodeLabels[row])
+        self.integrationPoint = None if block.integrationPoints is None else int(block.integrationPoints[row])
+        self.baseElementType = block.baseElementType
+        self.sectionPoint = block.sectionPoint
+
+
+class FieldBulkData(object):
+    def __init__(self, position, instance, base_element_type, data, field_type, component_labels,
+                 element_labels=None, node_labels=None, integration_points=None, section_point=None):
+        self.position = position
+        self.instance = instance
+        self.baseElementType = base_element_type
+        self.data = np.asarray(data, dtype=np.float32)
+        self.type = field_type
+        self.componentLabels = tuple(component_labels)
+        self.elementLabels = element_labels
+        self.nodeLabels = node_labels
+        self.integrationPoints = integration_points
+        self.sectionPoint = section_point
+        self.precision = SINGLE_PRECISION
+
+    def subset(self, rows, data=None, position=None, field_type=None, component_labels=None, **labels):
+        def take(array):
+            return None if array is None else array[rows]
+        arrays = {'element_labels': take(self.elementLabels), 'node_labels': take(self.nodeLabels),
+                  'integration_points': take(self.integrationPoints)}
+        arrays.update(labels)
+        return FieldBulkData(position or self.position, self.instance, self.baseElementType,
+                             self.data[rows] if data is None else data, field_type or self.type,
+                             component_labels or self.componentLabels, section_point=self.sectionPoint, **arrays)
+
+
+class FieldLocation(object):
+    def __init__(self, position):
+        self.position = position
+
+
+class FieldOutput(object):
+    def __init__(self, name, description='', type=SCALAR, validInvariants=(), componentLabels=None, blocks=None):
+        self.name = name
+        self.description = description
+        self.type = type
+        self.validInvariants = tuple(validInvariants)
+        if componentLabels is None:
+            componentLabels = tuple(name + suffix for suffix in component_suffixes[type]) if type != SCALAR else ()
+        self.componentLabels = tuple(componentLabels)
+        self.bulkDataBlocks = blocks if blocks is not None else []
+
+    def _copy(self, blocks, field_type=None, component_labels=None, name=None):
+        return FieldOutput(name or self.name, self.description, field_type or self.type, self.validInvariants,
+                           component_labels if component_labels is not None else self.componentLabels, blocks)
+
+    @property
+    def locations(self):
+        positions = []
+        for block in self.bulkDataBlocks:
+            if block.position not in positions:
+                positions.append(block.position)
+        return [FieldLocation(position) for position in positions]
+
+    @property
+    def values(self):
+        return [FieldValue(block, row) for block in self.bulkDataBlocks for row in range(block.data.shape[0])]
+
+    def addData(self, position, instance, labels, data, sectionPoint=None, localCoordSystem=None):
+        labels = np.asarray(labels, dtype=int)
+        data = np.asarray(data, dtype=np.float32)
+        if data.ndim == 1:
+            data = data[:, np.newaxis]
+        if data.shape[1] != field_components[self.type]:
+            raise OdbError('The data does not match the type of the field ' + self.name)
+        if labels.shape[0] == 0 or data.shape[0] % labels.shape[0] != 0:
+            raise OdbError('The number of data points does not match the number of labels')
+        component_labels = self.componentLabels
+        if position == NODAL:
+            if data.shape[0] != labels.shape[0]:
+                raise OdbError('Nodal data must have one data point per node')
+            self.bulkDataBlocks.append(FieldBulkData(position, instance, None, data, self.type, component_labels,
+                                                     node_labels=labels, section_point=sectionPoint))
+            return
+        rows_per_element = data.shape[0] // labels.shape[0]
+        element_types, connectivity = instance.element_connectivity(labels)
+        data = data.reshape(labels.shape[0], rows_per_element, -1)
+        for element_type in sorted(set(element_types)):
+            idx = np.array([i for i, t in enumerate(element_types) if t == element_type], dtype=int)
+            block_data = data[idx].reshape(-1, data.shape[2])
+            element_labels = np.repeat(labels[idx], rows_per_element)
+            node_labels = None
+            integration_points = None
+            if position == ELEMENT_NODAL:
+                node_labels = np.array([connectivity[i] for i in idx], dtype=int).ravel()
+                if node_labels.shape[0] != block_data.shape[0]:
+                    raise OdbError('Element nodal data must have one data point per element node')
+            elif position == INTEGRATION_POINT:
+                integration_points = np.tile(np.arange(1, rows_per_element + 1), idx.shape[0])
+            self.bulkDataBlocks.append(FieldBulkData(position, instance, element_type, block_data, self.type,
+                                                     component_labels, element_labels=element_labels,
+                                                     node_labels=node_labels, integration_points=integration_points,
+                                                     section_point=sectionPoint))
+
+    def getSubset(self, position=None, region=None, elementType=None, location=None):
+        blocks = self.bulkDataBlocks
+        if position is not None:
+            blocks = [b for b in (_convert_block(block, position) for block in blocks) if b is not None]
+        if region is not None:
+            blocks = [b for b in (_filter_block(block, region) for block in blocks) if b is not None]
+        if elementType is not None:
+            blocks = [block for block in blocks if block.baseElementType == elementType]
+        return self._copy(blocks)
+
+    def getScalarField(self, invariant=None, componentLabel=None):
+        if componentLabel is not None:
+            idx = list(self.componentLabels).index(componentLabel)
+            blocks = [block.subset(slice(None), data=block.data[:, idx:idx + 1], field_type=SCALAR,
+                                   component_labels=('',)) for block in self.bulkDataBlocks]
+            return self._copy(blocks, SCALAR, (), name=componentLabel)
+        blocks = [block.subset(slice(None), data=_invariant(block.data, invariant, self.type)[:, np.newaxis],
+                               field_type=SCALAR, component_labels=('',)) for block in self.bulkDataBlocks]
+        return self._copy(blocks, SCALAR, ())
+
+    def getTransformedField(self, datumCsys, deformationField=None, projected22Axis=None, projectionTolerance=None):
+        if self.type == SCALAR:
+            return self._copy(list(self.bulkDataBlocks))
+        blocks = []
+        for block in self.bulkDataBlocks:
+            rotation = _rotation_matrices(datumCsys, _block_coordinates(block))
+            blocks.append(block.subset(slice(None), data=_rotate(block.data, rotation, self.type)))
+        return self._copy(blocks)
+
+
+class HistoryOutput(object):
+    def __init__(self, name, description='', type=SCALAR):
+        self.name = name
+        self.description = description
+        self.type = type
+        self.data = ()
+
+    def addData(self, frame=None, value=None, data=None):
+        if data is not None:
+            self.data = self.data + tuple((float(t), float(v)) for t, v in data)
+        else:
+            self.data = self.data + ((float(frame), float(value)),)
+
+
+class HistoryPoint(object):
+    def __init__(self, node=None, element=None, ipNumber=0, assembly=None, region=None):
+        self.node = node
+        self.element = element
+        self.ipNumber = ipNumber
+        self.assembly = assembly
+        self.region = region
+
+
+class HistoryRegion(object):
+    def __init__(self, name, description='', point=None, position=NODAL):
+        self.name = name
+        self.description = description
+        self.point = point
+        self.position = position
+        self.historyOutputs = Repository()
+
+    def HistoryOutput(self, name, description='', type=SCALAR):
+        self.historyOutputs[name] = HistoryOutput(name, description, type)
+        return self.historyOutputs[name]
+
+
+class OdbFrame(object):
+    def __init__(self, incrementNumber, frameValue, description='', frameId=0):
+        self.incrementNumber = incrementNumber
+        self.frameId = frameId
+        self.frameValue = frameValue
+        self.description = description
+        self.fieldOutputs = Repository()
+
+    def FieldOutput(self, name, description='', type=SCALAR, validInvariants=(), componentLabels=None):
+        if name in self.fieldOutputs:
+            raise OdbError('The field output ' + name + ' already exists')
+        self.fieldOutputs[name] = FieldOutput(name, description, type, validInvariants, componentLabels)
+        return self.fieldOutputs[name]
+
+
+class OdbStep(object):
+    def __init__(self, name, description='', domain=None, timePeriod=1., previousStepName=None, totalTime=None):
+        self.name = name
+        self.description = description
+        self.domain = domain
+        self.timePeriod = timePeriod
+        self.totalTime = totalTime
+        self.frames = []
+        self.historyRegions = Repository()
+
+    def Frame(self, incrementNumber, frameValue, description=''):
+        frame = OdbFrame(incrementNumber, frameValue, description, frameId=len(self.frames))
+        self.frames.append(frame)
+        return frame
+
+    def HistoryRegion(self, name, description='', point=None, position=NODAL):
+        self.historyRegions[name] = HistoryRegion(name, description, point, position)
+        return self.historyRegions[name]
+
+
+class Odb(object):
+    def __init__(self, name, path, analysisTitle='', description=''):
+        self.name = name
+        self.path = path
+        self.analysisTitle = analysisTitle
+        self.description = description
+        self.parts = Repository()
+        self.rootAssembly = OdbAssembly()
+        self.steps = Repository()
+        self.sectionCategories = Repository()
+        self.isReadOnly = False
+        self.closed = False
+        # Like abaqus, the odb file is created on disk with the Odb object
+        self.save()
+
+    def Part(self, name, embeddedSpace, type=DEFORMABLE_BODY):
+        if name in self.parts:
+            raise OdbError('The part ' + name + ' already exists')
+        self.parts[name] = OdbPart(name, embeddedSpace, type)
+        return self.parts[name]
+
+    def Step(self, name, description='', domain=None, timePeriod=1., previousStepName=None, totalTime=None):
+        if name in self.steps:
+            raise OdbError('The step ' + name + ' already exists')
+        self.steps[name] = OdbStep(name, description, domain, timePeriod, previousStepName, totalTime)
+        return self.steps[name]
+
+    def SectionCategory(self, name, description=''):
+        self.sectionCategories[name] = SectionCategory(name, description)
+        return self.sectionCategories[name]
+
+    def update(self):
+        pass
+
+    def save(self):
+        if self.closed:
+            raise OdbError('The odb ' + str(self.path) + ' is closed')
+        if self.isReadOnly:
+            raise OdbError('The odb ' + str(self.path) + ' is opened read only and cannot be saved')
+        temp_file_name = str(self.path) + '.' + str(os.getpid()) + '.tmp'
+        with open(temp_file_name, 'wb') as odb_file:
+            pickle.dump(self, odb_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file_name, str(self.path))
+
+    def close(self):
+        self.closed = True
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['isReadOnly'] = False
+        state['closed'] = False
+        return state
+
+
+def openOdb(path, readOnly=False, readInternalSets=False):
+    path = str(path)
+    if not os.path.isfile(path):
+        raise OdbError('The odb ' + path + ' does not exist')
+    with open(path, 'rb') as odb_file:
+        odb = pickle.load(odb_file)
+    odb.path = path
+    odb.isReadOnly = readOnly
+    return odb
+
+
+def isUpgradeRequiredForOdb(upgradeRequiredOdbPath):
+    return False
+
+
+def _indices_of(labels, wanted, missing_ok=False):
+    wanted = np.asarray(wanted, dtype=int).ravel()
+    if labels.shape[0] == 0:
+        if missing_ok or wanted.shape[0] == 0:
+            return -np.ones(wanted.shape[0], dtype=int)
+        raise OdbError('Labels not found')
+    order = np.argsort(labels, kind='stable')
+    positions = np.searchsorted(labels[order], wanted)
+    positions = np.clip(positions, 0, labels.shape[0] - 1)
+    indices = order[positions]
+    found = labels[indices] == wanted
+    if not np.all(found):
+        if not missing_ok:
+            raise OdbError('Labels not found')
+        indices = np.where(found, indices, -1)
+    return indices
+
+
+def _element_groups(element_labels):
+    """
+    Returns the start index of each element in a block where the rows of an element are consecutive
+    """
+    starts = np.flatnonzero(np.concatenate([[True], element_labels[1:] != element_labels[:-1]]))
+    return starts
+
+
+def _convert_block(block, position):
+    if block.position == position or (block.position == CENTROID and position == ELEMENT_CENTROID):
+        return block
+    if block.position == NODAL or position == NODAL and block.position not in [ELEMENT_NODAL, INTEGRATION_POINT]:
+        return None
+    starts = _element_groups(block.elementLabels)
+    element_means = np.add.reduceat(block.data, starts, axis=0) / np.diff(np.append(starts, block.data.shape[0]))[
+        :, np.newaxis]
+    element_labels = block.elementLabels[starts]
+    if position in [CENTROID, ELEMENT_CENTROID, WHOLE_ELEMENT]:
+        return block.subset(starts, data=element_means, position=position, integration_points=None,
+                            node_labels=None)
+    if position in [ELEMENT_NODAL, NODAL]:
+        if block.position == ELEMENT_NODAL:
+            element_nodal = block
+        else:
+            _, connectivity = block.instance.element_connectivity(element_labels)
+            connectivity = np.array(connectivity, dtype=int)
+            nodes_per_element = connectivity.shape[1]
+            element_nodal = FieldBulkData(ELEMENT_NODAL, block.instance, block.baseElementType,
+                                          np.repeat(element_means, nodes_per_element, axis=0), block.type,
+                                          block.componentLabels,
+                                          element_labels=np.repeat(element_labels, nodes_per_element),
+                                          node_labels=connectivity.ravel(), section_point=block.sectionPoint)
+        if position == ELEMENT_NODAL:
+            return element_nodal
+        node_labels, inverse = np.unique(element_nodal.nodeLabels, return_inverse=True)
+        nodal_data = np.zeros((node_labels.shape[0], element_nodal.data.shape[1]))
+        np.add.at(nodal_data, inverse, element_nodal.data)
+        nodal_data /= np.bincount(inverse)[:, np.newaxis]
+        return FieldBulkData(NODAL, block.instance, None, nodal_data, block.type, block.componentLabels,
+                             node_labels=node_labels)
+    return None
+
+
+def _filter_block(block, region):
+    labels = region.labels_by_instance.get(block.instance.name, None)
+    if labels is None:
+        return None
+    if region.set_type == 'element':
+        if block.elementLabels is None:
+            _, connectivity = block.instance.element_connectivity(labels)
+            rows = np.isin(block.nodeLabels, np.unique(np.concatenate([np.asarray(c) for c in connectivity])))
+        else:
+            rows = np.isin(block.elementLabels, labels)
+    else:
+        if block.nodeLabels is None:
+            return None
+        rows = np.isin(block.nodeLabels, labels)
+    if not np.any(rows):
+        return None
+    return block.subset(np.flatnonzero(rows))
+
+
+def _full_tensors(data):
+    tensors = np.zeros((data.shape[0], 3, 3))
+    for idx, (i, j) in enumerate([(0, 0), (1, 1), (2, 2), (0, 1), (0, 2), (1, 2)]):
+        tensors[:, i, j] = data[:, idx]
+        tensors[:, j, i] = data[:, idx]
+    return tensors
+
+
+def _invariant(data, invariant, field_type):
+    data = np.asarray(data, dtype=float)
+    if field_type == VECTOR:
+        if invariant == MAGNITUDE:
+            return np.sqrt(np.sum(data**2, axis=1))
+        raise OdbError('The invariant ' + str(invariant) + ' is not valid for vectors')
+    if field_type != TENSOR_3D_FULL:
+        raise OdbError('Invariants can only be calculated for vectors and tensors')
+    tensors = _full_tensors(data)
+    pressure = -np.trace(tensors, axis1=1, axis2=2) / 3
+    if invariant == PRESS:
+        return pressure
+    deviator = tensors + pressure[:, np.newaxis, np.newaxis] * np.eye(3)
+    if invariant == MISES:
+        return np.sqrt(1.5 * np.sum(deviator**2, axis=(1, 2)))
+    if invariant == INV3:
+        return np.cbrt(13.5 * np.linalg.det(deviator))
+    principal = np.linalg.eigvalsh(tensors)
+    if invariant == MAX_PRINCIPAL:
+        return principal[:, 2]
+    if invariant == MID_PRINCIPAL:
+        return principal[:, 1]
+    if invariant == MIN_PRINCIPAL:
+        return principal[:, 0]
+    if invariant == TRESCA:
+        return principal[:, 2] - principal[:, 0]
+    raise OdbError('The invariant ' + str(invariant) + ' is not implemented')
+
+
+def _block_coordinates(block):
+    instance = block.instance
+    if block.nodeLabels is not None:
+        return instance.node_coordinates[instance.node_indices(block.nodeLabels)]
+    _, connectivity = instance.element_connectivity(block.elementLabels)
+    return np.array([np.mean(instance.node_coordinates[instance.node_indices(c)], axis=0) for c in connectivity])
+
+
+def _rotation_matrices(datum, coordinates):
+    axes = np.array([datum.xAxis, datum.yAxis, datum.zAxis])
+    if datum.coordSysType != CYLINDRICAL:
+        return np.repeat(axes[np.newaxis, :, :], coordinates.shape[0], axis=0)
+    local = np.dot(coordinates - np.array(datum.origin), axes.T)
+    local[:, 2] = 0
+    radius = np.sqrt(np.sum(local**2, axis=1))
+    radius[radius == 0] = 1.
+    e_r = local / radius[:, np.newaxis]
+    e_z = np.repeat(np.array([[0., 0., 1.]]), coordinates.shape[0], axis=0)
+    e_theta = np.cross(e_z, e_r)
+    local_axes = np.stack([e_r, e_theta, e_z], axis=1)
+    return np.einsum('nij,jk->nik', local_axes, axes)
+
+
+def _rotate(data, rotation, field_type):
+    if field_type == VECTOR:
+        return np.einsum('nij,nj->ni', rotation, data)
+    tensors = np.einsum('nij,njk,nlk->nil', rotation, _full_tensors(data), rotation)
+    return np.array([tensors[:, i, j] for i, j in [(0, 0), (1, 1), (2, 2), (0, 1), (0, 2), (1, 2)]]).T
@@ -0,0 +1,117 @@
+"""
+Creates synthetic odb files for the stand-in odbAccess module. The model is a block of C3D8 elements with stresses and
+plastic strains at the integration points and displacements and temperatures at the nodes, and history outputs of the
+internal energy and the displacement of the last node. The values are given by the functions below so that the tests
+can check the data read from the odb.
+"""
+import numpy as np
+
+import odbAccess
+from abaqusConstants import THREE_D, DEFORMABLE_BODY, TIME, INTEGRATION_POINT, NODAL, TENSOR_3D_FULL, VECTOR, SCALAR
+from abaqusConstants import MISES, MAX_PRINCIPAL, MIN_PRINCIPAL, MAGNITUDE
+
+tensor_scale = np.array([1., 2., 3., 0.4, 0.5, 0.6])
+
+
+def stress(element_labels, integration_points, frame_value):
+    return frame_value*(element_labels + 0.1*integration_points)[:, np.newaxis]*tensor_scale
+
+
+def plastic_strain(element_labels, integration_points, frame_value):
+    return 1e-3*stress(element_labels, integration_points, frame_value)
+
+
+def displacement(node_coordinates, frame_value):
+    return 1e-3*frame_value*node_coordinates
+
+
+def temperature(node_labels, frame_value):
+    return 20. + frame_value*node_labels
+
+
+def internal_energy(frame_value):
+    return 10.*frame_value**2
+
+
+def structured_mesh(elements=(4, 4, 4), size=(1., 1., 1.)):
+    """
+    Returns node labels, node coordinates, element labels and connectivity of a block meshed with C3D8 elements
+    """
+    nx, ny, nz = elements
+    x, y, z = [np.linspace(0., size[i], elements[i] + 1) for i in range(3)]
+    zz, yy, xx = np.meshgrid(z, y, x, indexing='ij')
+    node_coordinates = np.vstack([xx.ravel(), yy.ravel(), zz.ravel()]).T
+    node_labels = np.arange(1, node_coordinates.shape[0] + 1)
+
+    def node(i, j, k):
+        return 1 + i + j*(nx + 1) + k*(nx + 1)*(ny + 1)
+
+    k, j, i = [a.ravel() for a in np.meshgrid(np.arange(nz), np.arange(ny), np.arange(nx), indexing='ij')]
+    connectivity = np.vstack([node(i, j, k), node(i + 1, j, k), node(i + 1, j + 1, k), node(i, j + 1, k),
+                              node(i, j, k + 1), node(i + 1, j, k + 1), node(i + 1, j + 1, k + 1),
+                              node(i, j + 1, k + 1)]).T
+    element_labels = np.arange(1, connectivity.shape[0] + 1)
+    return node_labels, node_coordinates, element_labels, connectivity
+
+
+def create_synthetic_odb(odb_file_name, elements=(4, 4, 4), steps=(('loading', 3),), fields=('S', 'PE', 'U', 'TEMP'),
+                         instance_name='PART-1'):
+    """
+    Creates an odb with one instance of a block meshed with C3D8 elements
+
+    :param odb_file_name:   Name of the odb file to create
+    :param elements:        Number of elements in x, y and z
+    :param steps:           Sequence of (step_name, number_of_frames), the frame values goes from 0 to 1 in each step
+    :param fields:          The fields to write in every frame, any of 'S', 'PE', 'U' and 'TEMP'
+    :param instance_name:   Name of the part and the instance
+    :return:                Nothing
+    """
+    odb_file_name = str(odb_file_name)
+    node_labels, node_coordinates, element_labels, connectivity = structured_mesh(elements)
+    odb = odbAccess.Odb(name=instance_name, path=odb_file_name)
+    part = odb.Part(name=instance_name, embeddedSpace=THREE_D, type=DEFORMABLE_BODY)
+    part.addNodes(labels=node_labels, coordinates=node_coordinates)
+    part.addElements(labels=element_labels, connectivity=connectivity, type='C3D8')
+    centroids = np.mean(node_coordinates[connectivity - 1], axis=1)
+    part.ElementSetFromElementLabels(name='HALF', elementLabels=element_labels[centroids[:, 0] < 0.5])
+    part.NodeSetFromNodeLabels(name='BOTTOM', nodeLabels=node_labels[node_coordinates[:, 2] == 0.])
+    instance = odb.rootAssembly.Instance(name=instance_name, object=part)
+    odb.rootAssembly.ElementSetFromElementLabels(name='ASSEMBLY_HALF',
+                                                 elementLabels=((instance_name, element_labels[centroids[:, 0] < 0.5]),))
+
+    integration_points = np.tile(np.arange(1, 9), element_labels.shape[0])
+    ip_labels = np.repeat(element_labels, 8)
+    for step_index, (step_name, number_of_frames) in enumerate(steps):
+        step = odb.Step(name=step_name, description='', domain=TIME, timePeriod=1., totalTime=float(step_index))
+        energy = step.HistoryRegion(name='Assembly ASSEMBLY', point=odbAccess.HistoryPoint(assembly=odb.rootAssembly))
+        energy.HistoryOutput(name='ALLIE', description='Internal energy')
+        corner_node = step.HistoryRegion(name='Node ' + instance_name + '.' + str(node_labels[-1]),
+                                         point=odbAccess.HistoryPoint(node=node_labels[-1]))
+        corner_node.HistoryOutput(name='U3', description='Displacement')
+        for frame_number in range(number_of_frames):
+            frame_value = frame_number/max(number_of_frames - 1, 1)
+            frame = step.Frame(incrementNumber=frame_number, frameValue=frame_value)
+            energy.historyOutputs['ALLIE'].addData(frame=frame_value, value=internal_energy(frame_value))
+            corner_node.historyOutputs['U3'].addData(frame=frame_value,
+                                                     value=displacement(node_coordinates[-1], frame_value)[2])
+            if 'S' in fields:
+                field = frame.FieldOutput(name='S', description='Stress', type=TENSOR_3D_FULL,
+                                          validInvariants=(MISES, MAX_PRINCIPAL, MIN_PRINCIPAL))
+                field.addData(position=INTEGRATION_POINT, instance=instance, labels=element_labels,
+                              data=stress(ip_labels, integration_points, frame_value))
+            if 'PE' in fields:
+                field = frame.FieldOutput(name='PE', description='Plastic strain', type=TENSOR_3D_FULL,
+                                          validInvariants=(MISES, MAX_PRINCIPAL, MIN_PRINCIPAL))
+                field.addData(position=INTEGRATION_POINT, instance=instance, labels=element_labels,
+                              data=plastic_strain(ip_labels, integration_points, frame_value))
+            if 'U' in fields:
+                field = frame.FieldOutput(name='U', description='Displacement', type=VECTOR,
+                                          validInvariants=(MAGNITUDE,))
+                field.addData(position=NODAL, instance=instance, labels=node_labels,
+                              data=displacement(node_coordinates, frame_value))
+            if 'TEMP' in fields:
+                field = frame.FieldOutput(name='TEMP', description='Temperature', type=SCALAR)
+                field.addData(position=NODAL, instance=instance, labels=node_labels,
+                              data=temperature(node_labels, frame_value))
+    odb.save()
+    odb.close()
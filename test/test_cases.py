@@ -1,5 +1,49 @@
+import os
 import pathlib
+import sys
+import tempfile
 import unittest
+import warnings
+
+import numpy as np
+
+
+stub_directory = pathlib.Path(__file__).parent / 'abaqus_stub'
+stub_abaqus_command = sys.executable + ' ' + str(stub_directory / 'abaqus_stub.py')
+
+
+def setUpModule():
+    # The stub odbAccess, synthetic_odb and the abaqus python scripts are imported by the tests and by the scripts run
+    # in this process
+    from abaqus_python_interface.common import abaqus_python_directory
+    for directory in [stub_directory, abaqus_python_directory]:
+        if str(directory) not in sys.path:
+            sys.path.insert(0, str(directory))
+
+
+class OdbTestCase(unittest.TestCase):
+    """
+    Tests working on synthetic odb files in a temporary directory which is removed after each test
+    """
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.work_directory = pathlib.Path(self.temporary_directory.name)
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def create_odb(self, name='model.odb', **kwargs):
+        from synthetic_odb import create_synthetic_odb
+        odb_file_name = self.work_directory / name
+        create_synthetic_odb(odb_file_name, **kwargs)
+        return odb_file_name
+
+    @staticmethod
+    def interface(**kwargs):
+        from abaqus_python_interface.abaqus_interface import ABQInterface
+        kwargs.setdefault('output', False)
+        kwargs.setdefault('cache_directory', False)
+        return ABQInterface(stub_abaqus_command, **kwargs)
 
 
 class TestTemporaryDirectory(unittest.TestCase):
@@ -28,4 +72,945 @@ class TestInputFile(unittest.TestCase):
     def test_non_existing_inp_file(self):
         from abaqus_python_interface.abaqus_interface import ABQInterface
         abq = ABQInterface("..")
-        abq.run_abaqus_inp("non_existing_file.inp")
\ No newline at end of file
+        abq.run_abaqus_inp("non_existing_file.inp")
+
+
+class TestAbaqusSession(OdbTestCase):
+    def setUp(self):
+        super().setUp()
+        self.odb_file_name = self.create_odb(elements=(2, 2, 2))
+        self.abq = self.interface()
+
+    def tearDown(self):
+        self.abq.stop_session()
+        super().tearDown()
+
+    def test_reads_in_one_process(self):
+        from synthetic_odb import stress
+        with self.abq.session():
+            pid = self.abq.abaqus_session.process.pid
+            data, _, element_labels = self.abq.read_data_from_odb('S', self.odb_file_name, get_position_numbers=True)
+            mises = self.abq.read_data_from_odb('S', self.odb_file_name, invariant='MISES', set_name='HALF')
+            self.assertEqual(pid, self.abq.abaqus_session.process.pid)
+        integration_points = np.tile(np.arange(1, 9), 8)
+        np.testing.assert_allclose(data, stress(np.array(element_labels), integration_points, 1.), rtol=1e-6)
+        self.assertEqual(mises.shape, (32,))
+        self.assertIsNone(self.abq.abaqus_session)
+
+    def test_write_in_session(self):
+        with self.abq.session():
+            data = self.abq.read_data_from_odb('S', self.odb_file_name)
+            self.abq.write_data_to_odb(2*data, 'S2', self.odb_file_name, 'new_step')
+        abq = self.interface()
+        new_data = abq.read_data_from_odb('S2', self.odb_file_name, step_name='new_step')
+        np.testing.assert_allclose(new_data, 2*data, rtol=1e-6)
+
+    def test_restart_after_crash(self):
+        from abaqus_python_interface import AbaqusSessionError
+        self.abq.start_session()
+        self.abq.abaqus_session.process.kill()
+        self.abq.abaqus_session.process.wait()
+        data = self.abq.read_data_from_odb('TEMP', self.odb_file_name, position='NODAL')
+        self.assertEqual(data.shape, (27,))
+        with self.assertRaises(AbaqusSessionError):
+            self.abq.abaqus_session.run_script('read_data_from_odb.py', ['missing.pkl', 'results.pkl'])
+        self.assertTrue(self.abq.abaqus_session.is_running)
+
+
+# Exits with the standard error still held open by a process started in the background, like a license helper
+background_child_command = (sys.executable + ' -c "import subprocess, sys; subprocess.Popen([sys.executable, \'-c\', '
+                            + '\'import time; time.sleep(10)\']); sys.stderr.write(\'license helper started\'); '
+                            + 'sys.exit(2)"')
+
+
+class TestLauncher(unittest.TestCase):
+    def test_errors_and_timeout(self):
+        import contextlib
+        import io
+        import time
+        from abaqus_python_interface import AbaqusLaunchError, AbaqusLauncher
+        launcher = AbaqusLauncher(sys.executable + ' -c "import sys, time; sys.stderr.write(\'no license\'); '
+                                  + 'sys.stderr.flush(); time.sleep(float(sys.argv[1])); sys.exit(int(sys.argv[2]))"',
+                                  environment_shell=None)
+        self.assertEqual(launcher.run(['0', '0'], output=False), 0)
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            self.assertEqual(launcher.run(['0', '0'], output=True), 0)
+        self.assertEqual(stderr.getvalue(), 'no license')
+        with self.assertRaises(AbaqusLaunchError) as error:
+            launcher.run(['0', '3'], output=False)
+        self.assertEqual(error.exception.returncode, 3)
+        self.assertEqual(error.exception.stderr, 'no license')
+        start_time = time.time()
+        with self.assertRaises(AbaqusLaunchError) as error:
+            launcher.run(['30', '0'], output=False, timeout=0.5)
+        self.assertLess(time.time() - start_time, 10.)
+        self.assertIsNone(error.exception.returncode)
+        self.assertIn('0.5 s', str(error.exception))
+        # The standard error written before the timeout is kept
+        self.assertEqual(error.exception.stderr, 'no license')
+
+        # Only the end of the standard error is kept
+        launcher = AbaqusLauncher(sys.executable + ' -c "import sys; sys.stderr.write(\'x\'*10**6 + \'end\'); '
+                                  + 'sys.exit(1)"', environment_shell=None)
+        with self.assertRaises(AbaqusLaunchError) as error:
+            launcher.run([], output=False)
+        self.assertTrue(error.exception.stderr.endswith('end'))
+        self.assertLess(len(error.exception.stderr), 10**5)
+
+    def test_background_process_keeps_stderr_open(self):
+        import time
+        from unittest import mock
+        from abaqus_python_interface import AbaqusLaunchError, AbaqusLauncher
+        from abaqus_python_interface import processes
+        launcher = AbaqusLauncher(background_child_command, environment_shell=None)
+        start_time = time.time()
+        with mock.patch.object(processes, 'stderr_join_timeout', 0.5):
+            with self.assertRaises(AbaqusLaunchError) as error:
+                launcher.run([], output=False)
+        self.assertLess(time.time() - start_time, 5.)
+        self.assertEqual(error.exception.returncode, 2)
+        self.assertEqual(error.exception.stderr, 'license helper started')
+
+    def test_resolve_in_shell(self):
+        from abaqus_python_interface import AbaqusLaunchError, AbaqusLauncher
+        launcher = AbaqusLauncher(stub_abaqus_command, shell='/bin/sh')
+        command = launcher.command(['python', 'script.py'])
+        self.assertTrue(os.path.samefile(command[0], sys.executable))
+        self.assertEqual(command[1:], [str(stub_directory / 'abaqus_stub.py'), 'python', 'script.py'])
+        self.assertIs(launcher.resolve(), AbaqusLauncher(stub_abaqus_command, shell='/bin/sh').resolve())
+        self.assertIn('PATH', launcher.environment())
+        with self.assertRaises(AbaqusLaunchError):
+            AbaqusLauncher('non_existing_abaqus_command', shell='/bin/sh').command([])
+
+
+class TestFieldExtraction(OdbTestCase):
+    def test_bulk_data_matches_field_values(self):
+        from abaqusConstants import ELEMENT_NODAL, INTEGRATION_POINT, NODAL, SCALAR, TENSOR_3D_FULL
+        from odbAccess import openOdb
+        from odb_io_functions import _field_data_from_values, field_data_as_arrays
+        odb = openOdb(str(self.create_odb(elements=(2, 2, 2), fields=())))
+        instance = odb.rootAssembly.instances['PART-1']
+        frame = odb.steps['loading'].frames[0]
+        category = odb.SectionCategory('shell < STEEL > < 3 section points >')
+        section_points = [category.SectionPoint(number, 'layer ' + str(number)) for number in range(1, 4)]
+        random = np.random.default_rng(0)
+        stress = frame.FieldOutput('S', type=TENSOR_3D_FULL)
+        strain = frame.FieldOutput('E', type=TENSOR_3D_FULL)
+        temperature = frame.FieldOutput('TEMP', type=SCALAR)
+        # Several blocks for different element sets and one block per section point
+        for labels in [[1, 2, 3], [4, 5, 6, 7, 8]]:
+            for section_point in section_points:
+                stress.addData(position=INTEGRATION_POINT, instance=instance, labels=labels,
+                               data=random.random((8*len(labels), 6)), sectionPoint=section_point)
+            strain.addData(position=ELEMENT_NODAL, instance=instance, labels=labels,
+                           data=random.random((8*len(labels), 6)))
+        for labels in [np.arange(1, 15), np.arange(15, 28)]:
+            temperature.addData(position=NODAL, instance=instance, labels=labels, data=random.random(len(labels)))
+
+        for field, position in [(stress, INTEGRATION_POINT), (strain, ELEMENT_NODAL), (temperature, NODAL),
+                                (stress.getScalarField(invariant='MISES'), INTEGRATION_POINT)]:
+            self.assertGreater(len(field.bulkDataBlocks), 1)
+            bulk_arrays = field_data_as_arrays(field, position)
+            value_arrays = _field_data_from_values(field.values, position)
+            self.assertEqual(bulk_arrays[0].shape, value_arrays[0].shape)
+            for bulk_array, value_array in zip(bulk_arrays, value_arrays):
+                np.testing.assert_array_equal(bulk_array, value_array)
+        self.assertEqual([value.sectionPoint.number for value in stress.values[:25:8]], [1, 1, 1, 2])
+
+
+class TestReadMany(OdbTestCase):
+    def test_read_many(self):
+        from abaqus_python_interface.abaqus_interface import FieldRequest
+        from synthetic_odb import temperature
+        odb_file_name = self.create_odb(elements=(2, 2, 2))
+        abq = self.interface()
+        requests = [FieldRequest('TEMP', frame_number=frame, position='NODAL') for frame in range(3)]
+        requests.append(FieldRequest('S', invariant='MISES', set_name='HALF'))
+        requests.append({'field_id': 'U', 'position': 'NODAL', 'set_name': 'BOTTOM'})
+        results = abq.read_many(odb_file_name, requests, get_position_numbers=True)
+        self.assertEqual(len(results), 5)
+        for frame in range(3):
+            data, node_labels, _ = results[requests[frame]]
+            np.testing.assert_allclose(data, temperature(np.array(node_labels), frame/2), rtol=1e-6)
+        self.assertEqual(results[requests[3]][0].shape, (32,))
+        self.assertEqual(results[FieldRequest('U', position='NODAL', set_name='BOTTOM')][0].shape, (9, 3))
+        np.testing.assert_allclose(results[requests[3]][0],
+                                   abq.read_data_from_odb('S', odb_file_name, invariant='MISES', set_name='HALF'))
+
+
+class TestMap(OdbTestCase):
+    def test_map_over_odbs(self):
+        from abaqus_python_interface.abaqus_interface import OdbReadingError
+        from synthetic_odb import temperature
+        odb_files = [self.create_odb('model_' + str(i) + '.odb', elements=(1, 1, 1), fields=('TEMP',))
+                     for i in range(3)] + [self.work_directory / 'model_3.odb']
+        abq = self.interface()
+        results = abq.map(odb_files[::-1], lambda worker_abq, odb: worker_abq.read_data_from_odb(
+            'TEMP', odb, position='NODAL', get_position_numbers=True), max_workers=2)
+        self.assertEqual([result.odb_file_name for result in results], odb_files[::-1])
+        self.assertIsInstance(results[0].error, OdbReadingError)
+        for result in results[1:]:
+            self.assertIsNone(result.error)
+            data, node_labels, _ = result.result
+            np.testing.assert_allclose(data, temperature(np.array(node_labels), 1.), rtol=1e-6)
+
+
+class TestConcurrency(OdbTestCase):
+    def concurrent_reads(self, abq, odb_file_name, repeats):
+        from concurrent.futures import ThreadPoolExecutor
+        from synthetic_odb import temperature
+        requests = [(frame, set_name) for frame in range(3) for set_name in ['', 'BOTTOM']] * repeats
+        current_directory = os.getcwd()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda request: abq.read_data_from_odb(
+                'TEMP', odb_file_name, frame_number=request[0], set_name=request[1], position='NODAL',
+                get_position_numbers=True), requests))
+        self.assertEqual(os.getcwd(), current_directory)
+        for (frame, set_name), (data, node_labels, _) in zip(requests, results):
+            self.assertEqual(data.shape, (9,) if set_name else (27,))
+            np.testing.assert_allclose(data, temperature(np.array(node_labels), frame/2), rtol=1e-6)
+
+    def test_concurrent_reads(self):
+        odb_file_name = self.create_odb(elements=(2, 2, 2), fields=('TEMP',))
+        abq = self.interface(cache_directory=self.work_directory / 'c')
+        self.concurrent_reads(abq, odb_file_name, repeats=1)
+
+    def test_concurrent_reads_in_session(self):
+        odb_file_name = self.create_odb(elements=(2, 2, 2), fields=('TEMP',))
+        abq = self.interface()
+        with abq.session():
+            self.concurrent_reads(abq, odb_file_name, repeats=10)
+
+
+class TestAsyncInterface(OdbTestCase):
+    def test_concurrent_reads_and_write(self):
+        import asyncio
+        from abaqus_python_interface.async_interface import AsyncABQInterface
+        odb_file_name = self.create_odb(elements=(2, 2, 2), fields=('TEMP',))
+        from synthetic_odb import temperature
+        records = []
+        abq = AsyncABQInterface(stub_abaqus_command, output=False, cache_directory=False, max_concurrent=3,
+                                stats_callback=records.append)
+
+        async def run():
+            results = await asyncio.gather(*[abq.read_data_from_odb(
+                'TEMP', odb_file_name, frame_number=frame, position='NODAL', get_position_numbers=True)
+                for frame in range(3)])
+            await abq.write_data_to_odb(np.ones(27), 'SDV1', odb_file_name, 'loading', position='NODAL')
+            written = await abq.read_data_from_odb('SDV1', odb_file_name, position='NODAL')
+            return results, written
+
+        results, written = asyncio.run(run())
+        for frame, (data, node_labels, _) in enumerate(results):
+            np.testing.assert_allclose(data, temperature(np.array(node_labels), frame/2), rtol=1e-6)
+        np.testing.assert_allclose(written, np.ones(27))
+        self.assertEqual(list(abq.stats.records), records)
+        self.assertEqual(abq.stats.totals()['read_data_from_odb.py']['calls'], 4)
+        self.assertEqual(abq.stats.totals()['write_data_to_odb.py']['calls'], 1)
+        read_records = [record for record in records if record.script == 'read_data_from_odb.py']
+        self.assertTrue(all(record.script_time is not None and record.payload_bytes > 0 for record in read_records))
+        self.assertEqual(len(abq.metadata_locks), 0)
+
+    def test_results_are_loaded_off_the_event_loop(self):
+        import asyncio
+        import time
+        from unittest import mock
+        from abaqus_python_interface import transport
+        from abaqus_python_interface.async_interface import AsyncABQInterface
+        odb_file_name = self.create_odb(elements=(2, 2, 2), fields=('TEMP',))
+        abq = AsyncABQInterface(stub_abaqus_command, output=False, cache_directory=False)
+        load = transport.load
+
+        def slow_load(file_name):
+            time.sleep(1.)
+            return load(file_name)
+
+        async def run():
+            ticks = []
+
+            async def ticker():
+                while True:
+                    ticks.append(time.time())
+                    await asyncio.sleep(0.05)
+
+            ticking = asyncio.ensure_future(ticker())
+            await abq.read_data_from_odb('TEMP', odb_file_name, position='NODAL')
+            ticking.cancel()
+            return np.max(np.diff(ticks))
+
+        with mock.patch.object(transport, 'load', side_effect=slow_load):
+            self.assertLess(asyncio.run(run()), 0.5)
+
+    def test_cancel_kills_process(self):
+        import asyncio
+        import time
+        from abaqus_python_interface.async_interface import AsyncABQInterface
+        marker_file = self.work_directory / 'marker'
+        # The script arguments are passed to the python code after the marker file and are ignored
+        abq = AsyncABQInterface(sys.executable + ' -c "import pathlib, sys, time; time.sleep(2); '
+                                + 'pathlib.Path(sys.argv[1]).touch()" ' + str(marker_file), shell='/bin/sh',
+                                output=False, cache_directory=False)
+
+        async def run():
+            await asyncio.wait_for(abq._run_script('odb_summary.py'), timeout=0.5)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(run())
+        # The killed process would create the marker file after 2 s
+        deadline = time.time() + 3
+        while time.time() < deadline:
+            self.assertFalse(marker_file.exists())
+            time.sleep(0.1)
+
+    def test_errors_and_timeout(self):
+        import asyncio
+        from abaqus_python_interface import AbaqusLaunchError
+        from abaqus_python_interface.async_interface import AsyncABQInterface
+        abq = AsyncABQInterface(sys.executable + ' -c "import sys, time; sys.stderr.write(\'no license\'); '
+                                + 'sys.stderr.flush(); time.sleep(float(sys.argv[1])); sys.exit(int(sys.argv[2]))"',
+                                shell='/bin/sh', output=False, cache_directory=False, timeout=0.5)
+        self.assertEqual(asyncio.run(abq.run_command(['0', '0'])), 0)
+        with self.assertRaises(AbaqusLaunchError) as error:
+            asyncio.run(abq.run_command(['0', '3']))
+        self.assertEqual(error.exception.returncode, 3)
+        self.assertEqual(error.exception.stderr, 'no license')
+        with self.assertRaises(AbaqusLaunchError) as error:
+            asyncio.run(abq.run_command(['30', '0']))
+        self.assertIsNone(error.exception.returncode)
+        self.assertIn('0.5 s', str(error.exception))
+        self.assertEqual(error.exception.stderr, 'no license')
+
+    def test_background_process_keeps_stderr_open(self):
+        import asyncio
+        import time
+        from unittest import mock
+        from abaqus_python_interface import AbaqusLaunchError
+        from abaqus_python_interface import processes
+        from abaqus_python_interface.async_interface import AsyncABQInterface
+        abq = AsyncABQInterface(background_child_command, shell='/bin/sh', output=False, cache_directory=False)
+        start_time = time.time()
+        with mock.patch.object(processes, 'stderr_join_timeout', 0.5):
+            with self.assertRaises(AbaqusLaunchError) as error:
+                asyncio.run(abq.run_command([]))
+        self.assertLess(time.time() - start_time, 5.)
+        self.assertEqual(error.exception.returncode, 2)
+        self.assertEqual(error.exception.stderr, 'license helper started')
+
+
+class TestJobScheduler(OdbTestCase):
+    def setUp(self):
+        super().setUp()
+        self.abq = self.interface(shell='/bin/sh')
+
+    def input_file(self, name, *comments):
+        input_file = self.work_directory / (name + '.inp')
+        input_file.write_text(''.join('** ' + comment + '\n' for comment in comments) + '*Heading\n')
+        return input_file
+
+    def max_running(self, jobs):
+        times = sorted([(job.start_time, 1) for job in jobs] + [(job.end_time, -1) for job in jobs])
+        return max(np.cumsum([change for _, change in times]))
+
+    def test_cpu_budget(self):
+        from abaqus_python_interface.job_scheduler import JobScheduler, COMPLETED
+        with JobScheduler(self.abq, max_cpus=4) as scheduler:
+            jobs = [scheduler.submit(self.input_file('job' + str(i), 'sleep 0.5'), cpus=2) for i in range(5)]
+            self.assertEqual(len(scheduler.wait_all(timeout=60)), 5)
+        self.assertEqual(self.max_running(jobs), 2)
+        for job in jobs:
+            self.assertEqual(job.status, COMPLETED)
+            self.assertEqual(job.exit_code, 0)
+            self.assertGreater(job.wall_time, 0.5)
+            self.assertTrue(job.odb_file.is_file())
+            self.assertIn('COMPLETED SUCCESSFULLY', job.sta_file.read_text())
+            self.assertEqual(job.msg_file.read_text(), 'cpus=2\n')
+
+    def test_license_budget_and_failures(self):
+        from abaqus_python_interface.job_scheduler import JobScheduler, COMPLETED, FAILED, CANCELLED
+        with JobScheduler(self.abq, max_cpus=8, license_tokens=5) as scheduler:
+            failing_job = scheduler.submit(self.input_file('failing', 'sleep 0.2', 'fail'))
+            job = scheduler.submit(self.input_file('job', 'sleep 0.2'))
+            cancelled_job = scheduler.submit(self.input_file('cancelled'))
+            cancelled_job.cancel()
+            self.assertEqual(scheduler.wait_any([failing_job, job], timeout=60), [failing_job])
+            with self.assertRaises(ValueError):
+                scheduler.submit(self.input_file('big'), cpus=4)
+            self.assertTrue(job.wait(timeout=60))
+        self.assertEqual(self.max_running([failing_job, job]), 1)
+        self.assertEqual(failing_job.status, FAILED)
+        self.assertEqual(failing_job.exit_code, 1)
+        self.assertFalse(failing_job.odb_file.exists())
+        self.assertEqual(job.status, COMPLETED)
+        self.assertEqual(cancelled_job.status, CANCELLED)
+        self.assertIsNone(cancelled_job.wall_time)
+
+    def test_jobs_start_outside_the_lock(self):
+        import threading
+        import time
+        from unittest import mock
+        from abaqus_python_interface.job_scheduler import JobScheduler, CANCELLED
+        started, release = threading.Event(), threading.Event()
+        popen = self.abq.launcher.popen
+
+        def slow_popen(*args, **kwargs):
+            # Like the first launch, which resolves the abaqus command in a shell
+            started.set()
+            release.wait(30)
+            return popen(*args, **kwargs)
+
+        with mock.patch.object(self.abq.launcher, 'popen', side_effect=slow_popen):
+            with JobScheduler(self.abq, max_cpus=1) as scheduler:
+                submitter = threading.Thread(target=scheduler.submit, args=(self.input_file('job', 'sleep 30'),))
+                submitter.start()
+                self.assertTrue(started.wait(30))
+                start_time = time.time()
+                self.assertEqual(scheduler.wait_any(timeout=0.2), [])
+                job, = scheduler.jobs
+                job.cancel()
+                self.assertLess(time.time() - start_time, 5.)
+                release.set()
+                submitter.join()
+                self.assertTrue(job.wait(timeout=10))
+        self.assertEqual(job.status, CANCELLED)
+
+
+class TestWriteData(OdbTestCase):
+    def test_write_with_labels(self):
+        odb_file_name = self.create_odb(elements=(2, 2, 2), fields=('S',))
+        abq = self.interface()
+        data, _, element_labels = abq.read_data_from_odb('S', odb_file_name, set_name='HALF',
+                                                         get_position_numbers=True)
+        abq.write_data_to_odb(data[:, 0], 'S11', odb_file_name, 'S11_step', labels=element_labels[::8])
+        s11, _, s11_labels = abq.read_data_from_odb('S11', odb_file_name, step_name='S11_step',
+                                                    get_position_numbers=True)
+        np.testing.assert_array_equal(s11_labels, element_labels)
+        np.testing.assert_allclose(s11, data[:, 0], rtol=1e-6)
+
+
+class TestWriteTransaction(OdbTestCase):
+    def test_transaction(self):
+        from unittest import mock
+        odb_file_name = self.create_odb(elements=(2, 2, 2), fields=('TEMP',))
+        abq = self.interface()
+        with mock.patch.object(abq, '_run_script', wraps=abq._run_script) as run_script:
+            with abq.write_transaction(odb_file_name) as transaction:
+                transaction.create_step('cooling')
+                transaction.add_node_set('CORNER', [1, 2], instance_name='PART-1')
+                for i in range(3):
+                    frame_number = transaction.create_frame('cooling', frame_value=0.5*i)
+                    self.assertEqual(frame_number, i)
+                    transaction.write_field(np.full(27, i), 'NT11', 'cooling', frame_number=frame_number,
+                                            position='NODAL')
+                    transaction.write_field(np.full((2, 3), i), 'U', 'cooling', frame_number=frame_number,
+                                            position='NODAL', set_name='CORNER')
+                self.assertEqual(transaction.write_field(np.zeros(27), 'NT11', 'cooling', position='NODAL'), 3)
+            # One launch for the odb summary and one for the commit
+            self.assertEqual([call[0][0] for call in run_script.call_args_list],
+                             ['odb_summary.py', 'write_transaction.py'])
+        self.assertEqual(abq.get_odb_summary(odb_file_name)["steps"]["cooling"]["frame_values"],
+                         [0., 0.5, 1., 2.])
+        self.assertEqual(abq.get_odb_summary(odb_file_name),
+                         self.interface().get_odb_summary(odb_file_name))
+        for i in range(3):
+            np.testing.assert_allclose(abq.read_data_from_odb('NT11', odb_file_name, 'cooling', i,
+                                                              position='NODAL'), i)
+            np.testing.assert_allclose(abq.read_data_from_odb('U', odb_file_name, 'cooling', i, position='NODAL',
+                                                              set_name='CORNER'), np.full((2, 3), i))
+
+    def test_exception_discards_transaction(self):
+        from abaqus_python_interface.abaqus_interface import OdbReadingError
+        odb_file_name = self.create_odb(elements=(1, 1, 1), fields=('TEMP',))
+        abq = self.interface()
+        with self.assertRaises(OdbReadingError):
+            with abq.write_transaction(odb_file_name) as transaction:
+                transaction.create_step('cooling')
+                transaction.write_field(np.ones(8), 'NT11', 'cooling', position='NODAL', set_name='MISSING')
+        self.assertNotIn('cooling', abq.get_steps(odb_file_name))
+
+    def test_failing_commit_leaves_odb_unchanged(self):
+        from abaqus_python_interface.abaqus_interface import OdbWritingError
+        odb_file_name = self.create_odb(elements=(1, 1, 1), fields=('TEMP',))
+        odb_content = odb_file_name.read_bytes()
+        abq = self.interface()
+        with self.assertRaises(OdbWritingError):
+            with abq.write_transaction(odb_file_name) as transaction:
+                transaction.create_step('cooling')
+                transaction.add_node_set('CORNER', [1, 2], instance_name='PART-1')
+                transaction.write_field(np.ones(8), 'NT11', 'cooling', position='NODAL')
+                # Passes the validation in python but the element label does not exist in the odb
+                transaction.write_field(np.ones(8), 'SDV1', 'cooling', frame_number=0, labels=[100])
+        self.assertEqual(odb_file_name.read_bytes(), odb_content)
+        self.assertEqual(abq.get_steps(odb_file_name), ['loading'])
+
+
+class TestSets(OdbTestCase):
+    def test_add_sets(self):
+        from unittest import mock
+        odb_file_name = self.create_odb(elements=(2, 2, 2), fields=('TEMP',))
+        abq = self.interface()
+        element_sets = {'PART-1': {'E' + str(i): [i + 1] for i in range(8)}, None: {'ROOT_E': np.arange(1, 5)}}
+        with mock.patch.object(abq, '_run_script', wraps=abq._run_script) as run_script:
+            abq.add_sets(odb_file_name, node_sets={'PART-1': {'N1': [1], 'N2': np.array([1, 2])}},
+                         element_sets=element_sets)
+            self.assertEqual(run_script.call_count, 2)
+        summary = self.interface().get_odb_summary(odb_file_name)
+        self.assertEqual(summary, abq.get_odb_summary(odb_file_name))
+        self.assertTrue({'N1', 'N2'} <= set(summary["rootAssembly"]["instances"]["PART-1"]["nodeSets"]))
+        self.assertIn('E7', summary["rootAssembly"]["instances"]["PART-1"]["elementSets"])
+        self.assertIn('ROOT_E', summary["rootAssembly"]["elementSets"])
+        self.assertEqual(abq.read_data_from_odb('TEMP', odb_file_name, position='NODAL', set_name='N2').shape,
+                         (2,))
+
+    def test_existing_sets_are_kept(self):
+        odb_file_name = self.create_odb(elements=(2, 2, 2), fields=('TEMP',))
+        full_copy = self.work_directory / 'full_copy.odb'
+        abq = self.interface()
+        abq.create_empty_odb_from_odb(full_copy, odb_file_name)
+        abq.add_sets(full_copy, node_sets={'PART-1': {'BOTTOM': [1], 'TOP': [25, 26, 27]}},
+                     element_sets={None: {'ASSEMBLY_HALF': [1]}})
+        geometry = self.interface().get_odb_geometry(full_copy)
+        self.assertEqual(len(geometry.nodal_coordinates('BOTTOM', 'PART-1')), 9)
+        self.assertEqual(sorted(geometry.nodal_coordinates('TOP', 'PART-1')), [25, 26, 27])
+        self.assertEqual(geometry.root_assembly()["elementSets"], ['ASSEMBLY_HALF'])
+
+    def test_create_odb_with_sets(self):
+        from types import SimpleNamespace
+        from abaqus_python_interface.abaqus_interface import OdbInstance
+        from synthetic_odb import structured_mesh
+        odb_file_name = self.work_directory / 'created.odb'
+        node_labels, coordinates, element_labels, connectivity = structured_mesh((2, 1, 1))
+        input_file_data = SimpleNamespace(
+            nodal_data=np.column_stack([node_labels, coordinates]),
+            elements={'C3D8': np.column_stack([element_labels, connectivity])},
+            set_data={'nset': {'N' + str(i): np.array([label]) for i, label in enumerate(node_labels)},
+                      'elset': {'FIRST': np.array([1]), 'ALL': element_labels}})
+        abq = self.interface()
+        abq.create_empty_odb_from_nodes_and_elements(odb_file_name, [OdbInstance('PART-1', input_file_data)])
+        instance = abq.get_odb_summary(odb_file_name)["rootAssembly"]["instances"]["PART-1"]
+        self.assertEqual(set(instance["nodeSets"]), {'N' + str(i) for i in range(len(node_labels))})
+        self.assertEqual(set(instance["elementSets"]), {'FIRST', 'ALL'})
+
+
+class TestCreateEmptyOdb(OdbTestCase):
+    def test_copy_odb(self):
+        odb_file_name = self.create_odb(elements=(2, 2, 2), fields=('TEMP',))
+        abq = self.interface()
+        abq.add_sets(odb_file_name, node_sets={None: {'ROOT_BOTTOM': [1, 2, 3]}})
+        full_copy = self.work_directory / 'full_copy.odb'
+        abq.create_empty_odb_from_odb(full_copy, odb_file_name)
+        summary = abq.get_odb_summary(odb_file_name)
+        copy_summary = abq.get_odb_summary(full_copy)
+        self.assertEqual(copy_summary["steps"], {})
+        self.assertEqual(copy_summary["rootAssembly"], summary["rootAssembly"])
+        from odbAccess import openOdb
+        instance, copied_instance = [openOdb(str(name)).rootAssembly.instances['PART-1']
+                                     for name in [odb_file_name, full_copy]]
+        np.testing.assert_array_equal(copied_instance.node_labels, instance.node_labels)
+        np.testing.assert_array_equal(copied_instance.node_coordinates, instance.node_coordinates)
+        for block, copied_block in zip(instance.element_blocks, copied_instance.element_blocks):
+            self.assertEqual(copied_block[0], block[0])
+            np.testing.assert_array_equal(copied_block[1], block[1])
+            np.testing.assert_array_equal(copied_block[2], block[2])
+
+        partial_copy = self.work_directory / 'partial_copy.odb'
+        abq.create_empty_odb_from_odb(partial_copy, odb_file_name, instance_names=['PART-1'],
+                                      set_names=['BOTTOM', 'ROOT_BOTTOM'])
+        root_assembly = abq.get_odb_summary(partial_copy)["rootAssembly"]
+        self.assertEqual(root_assembly["instances"]["PART-1"], {"nodeSets": ['BOTTOM'], "elementSets": []})
+        self.assertEqual(root_assembly["nodeSets"], ['ROOT_BOTTOM'])
+        self.assertEqual(root_assembly["elementSets"], [])
+
+
+class TestMesh(OdbTestCase):
+    def test_get_mesh(self):
+        odb_file_name = self.create_odb(elements=(2, 2, 2), fields=('TEMP',))
+        from synthetic_odb import structured_mesh
+        node_labels, node_coordinates, element_labels, connectivity = structured_mesh((2, 2, 2))
+        abq = self.interface()
+        mesh = abq.get_mesh(odb_file_name)
+        self.assertEqual(mesh.element_types, ['C3D8'])
+        np.testing.assert_array_equal(mesh.elements['C3D8'].labels, element_labels)
+        np.testing.assert_array_equal(mesh.elements['C3D8'].connectivity, connectivity)
+        element_coordinates = mesh.element_coordinates('C3D8')
+        self.assertEqual(element_coordinates.shape, (8, 8, 3))
+        np.testing.assert_allclose(element_coordinates, node_coordinates[connectivity - 1])
+
+        element_data = abq.get_element_data(odb_file_name, element_set='HALF')
+        self.assertEqual(list(element_data), ['C3D8'])
+        self.assertEqual(len(element_data['C3D8']), 4)
+        for label, coordinates in element_data['C3D8'].items():
+            np.testing.assert_allclose(coordinates, node_coordinates[connectivity[label - 1] - 1])
+            self.assertTrue(np.all(coordinates.mean(axis=0)[0] < 0.5))
+        half_mesh = abq.get_mesh(odb_file_name, element_set='ASSEMBLY_HALF')
+        self.assertEqual(half_mesh.elements['C3D8'].labels.shape, (4,))
+        self.assertEqual(half_mesh.node_labels.shape, (18,))
+
+    def test_mixed_element_types(self):
+        from odbAccess import Odb
+        from odb_io_functions import mesh_arrays
+        from synthetic_odb import structured_mesh
+        node_labels, node_coordinates, element_labels, connectivity = structured_mesh((2, 1, 1))
+        part = Odb('mixed', str(self.work_directory / 'mixed.odb')).Part('PART-1', embeddedSpace=None)
+        part.addNodes(labels=node_labels, coordinates=node_coordinates)
+        # The element types are not contiguous
+        part.addElements(labels=element_labels[:1], connectivity=connectivity[:1], type='C3D8')
+        part.addElements(labels=[11, 12], connectivity=[[1, 2, 4, 7], [2, 3, 5, 8]], type='C3D4')
+        part.addElements(labels=element_labels[1:], connectivity=connectivity[1:], type='C3D8')
+        labels, coordinates, elements = mesh_arrays(part)
+        np.testing.assert_array_equal(labels, node_labels)
+        np.testing.assert_allclose(coordinates, node_coordinates)
+        self.assertEqual(list(elements), ['C3D8', 'C3D4'])
+        np.testing.assert_array_equal(elements['C3D8'][0], element_labels)
+        np.testing.assert_array_equal(elements['C3D8'][1], connectivity)
+        np.testing.assert_array_equal(elements['C3D4'][0], [11, 12])
+        np.testing.assert_array_equal(elements['C3D4'][1], [[1, 2, 4, 7], [2, 3, 5, 8]])
+        empty_part = Odb('empty', str(self.work_directory / 'empty.odb')).Part('EMPTY', embeddedSpace=None)
+        self.assertEqual([array.shape for array in mesh_arrays(empty_part)[:2]], [(0,), (0, 3)])
+
+    def test_mesh_store(self):
+        from abaqus_python_interface import AbaqusLaunchError
+        from abaqus_python_interface.abaqus_interface import ABQInterface
+        cache_directory = self.work_directory / 'cache'
+        odb_file_name = self.create_odb(elements=(2, 2, 2), fields=('TEMP',))
+        abq = self.interface(cache_directory=cache_directory, use_mesh_store=True)
+        half_mesh = abq.get_mesh(odb_file_name, element_set='ASSEMBLY_HALF')
+        self.assertTrue((self.work_directory / 'model_mesh.npz').is_file())
+        self.assertEqual(half_mesh.elements['C3D8'].labels.shape, (4,))
+        self.assertEqual(half_mesh.node_labels.shape, (18,))
+        abq.write_data_to_odb(np.ones(8), 'SDV1', odb_file_name, 'loading', frame_number=1)
+
+        # Writing fields keeps the store valid, other interfaces read it without launching abaqus
+        stored_abq = ABQInterface('false', cache_directory=cache_directory, use_mesh_store=True)
+        mesh = stored_abq.get_mesh(odb_file_name)
+        self.assertEqual(mesh.elements['C3D8'].labels.shape, (8,))
+        bottom_nodes = stored_abq.get_nodal_coordinates_from_node_set(odb_file_name, 'BOTTOM')
+        self.assertEqual(len(bottom_nodes), 9)
+        self.assertTrue(all(coordinates[2] == 0. for coordinates in bottom_nodes.values()))
+        geometry = stored_abq.get_odb_geometry(odb_file_name)
+        self.assertEqual(geometry.root_assembly()["elementSets"], ['ASSEMBLY_HALF'])
+        self.assertEqual(geometry.datum_systems, {})
+
+        abq.add_node_set(odb_file_name, 'TOP', [25, 26, 27], instance_name='PART-1')
+        with self.assertRaises(AbaqusLaunchError):
+            stored_abq.get_odb_geometry(odb_file_name)
+        top_nodes = abq.get_nodal_coordinates_from_node_set(odb_file_name, 'TOP', 'PART-1')
+        self.assertEqual(sorted(top_nodes), [25, 26, 27])
+
+    def test_geometries_are_bounded(self):
+        odb_files = [self.create_odb('model_' + str(i) + '.odb', elements=(1, 1, 1)) for i in range(3)]
+        abq = self.interface(use_mesh_store=True)
+        abq.max_geometries = 2
+        for odb_file_name in odb_files + odb_files[1:2]:
+            abq.get_odb_geometry(odb_file_name)
+        self.assertEqual(list(abq.geometries), [odb_files[2], odb_files[1]])
+
+
+class TestPathEngine(OdbTestCase):
+    def test_interpolation_operator(self):
+        from abaqus_python_interface.mesh import Mesh
+        from abaqus_python_interface.path_engine import interpolation_operator, locate_points
+        from synthetic_odb import structured_mesh
+        node_labels, node_coordinates, element_labels, connectivity = structured_mesh((3, 3, 3))
+        mesh = Mesh(node_labels, node_coordinates, {'C3D8': (element_labels, connectivity)})
+        points = np.array([[0.1, 0.2, 0.3], [0.5, 0.5, 0.5], [1., 1., 1.], [1.5, 0., 0.]])
+        locations = locate_points(mesh, points)
+        np.testing.assert_array_equal(locations.element_labels, [1, 14, 27, -1])
+
+        linear_field = node_coordinates @ np.array([1., 2., 3.])
+        nodal_data = interpolation_operator(locations, 'NODAL', node_labels=node_labels).apply(linear_field)
+        np.testing.assert_allclose(nodal_data[:3], points[:3] @ np.array([1., 2., 3.]))
+        self.assertTrue(np.isnan(nodal_data[3]))
+
+        element_nodal_labels = connectivity.ravel()
+        operator = interpolation_operator(locations, 'ELEMENT_NODAL', node_labels=element_nodal_labels,
+                                          element_labels=np.repeat(element_labels, 8))
+        frame_data = np.stack([linear_field[element_nodal_labels - 1], 2*linear_field[element_nodal_labels - 1]])
+        np.testing.assert_allclose(operator.apply(frame_data, axis=1)[:, :3],
+                                   [points[:3] @ np.array([1., 2., 3.]), 2*points[:3] @ np.array([1., 2., 3.])])
+
+    def test_graded_mesh(self):
+        from unittest import mock
+        from abaqus_python_interface import path_engine
+        from abaqus_python_interface.mesh import Mesh
+        from abaqus_python_interface.path_engine import interpolation_operator, locate_points
+        from synthetic_odb import structured_mesh
+        node_labels, node_coordinates, element_labels, connectivity = structured_mesh((8, 2, 2))
+        # The element lengths along x grow by a factor of 4 from element to element
+        x_nodes = np.concatenate([[0.], np.cumsum(4.**np.arange(8))])/4.**7
+        node_coordinates[:, 0] = x_nodes[np.rint(8*node_coordinates[:, 0]).astype(int)]
+        mesh = Mesh(node_labels, node_coordinates, {'C3D8': (element_labels, connectivity)})
+        element_centers = node_coordinates[connectivity - 1].mean(axis=1)
+        points = np.vstack([element_centers, node_coordinates, [[-1e-3, 0.5, 0.5]]])
+        locations = locate_points(mesh, points)
+        np.testing.assert_array_equal(locations.element_labels[:element_labels.shape[0]], element_labels)
+        self.assertTrue(np.all(locations.element_labels[:-1] > 0))
+        self.assertEqual(locations.element_labels[-1], -1)
+        linear_field = node_coordinates @ np.array([1., 2., 3.])
+        nodal_data = interpolation_operator(locations, 'NODAL', node_labels=node_labels).apply(linear_field)
+        np.testing.assert_allclose(nodal_data[:-1], points[:-1] @ np.array([1., 2., 3.]), atol=1e-12)
+        # The largest elements overlap too many cells of the spatial index and are checked against every point
+        element_coordinates = mesh.element_coordinates('C3D8')
+        index = path_engine._CellIndex(element_coordinates.min(axis=1), element_coordinates.max(axis=1))
+        self.assertGreater(index.large_elements.shape[0], 0)
+        with mock.patch.object(path_engine, '_max_cells_per_element', 1):
+            np.testing.assert_array_equal(locate_points(mesh, points).element_labels, locations.element_labels)
+
+    def test_unsupported_element_types(self):
+        from abaqus_python_interface.mesh import Mesh
+        from abaqus_python_interface.path_engine import locate_points
+        from synthetic_odb import structured_mesh
+        node_labels, node_coordinates, element_labels, connectivity = structured_mesh((2, 2, 2))
+        mesh = Mesh(node_labels, node_coordinates, {'C3D8': (element_labels, connectivity),
+                                                    'S4R': (np.array([9]), connectivity[:1, :4])})
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            locations = locate_points(mesh, [[0.75, 0.75, 0.75]])
+        self.assertEqual(locations.element_labels.tolist(), [8])
+        with self.assertWarnsRegex(UserWarning, 'S4R'):
+            locations = locate_points(mesh, [[0.75, 0.75, 0.75], [2., 0., 0.]])
+        self.assertEqual(locations.element_labels.tolist(), [8, -1])
+
+    def test_numpy_path_engine(self):
+        odb_file_name = self.create_odb(elements=(2, 2, 2), fields=('U', 'TEMP'))
+        abq = self.interface()
+        path_points = np.array([[0.1, 0.2, 0.3], [0.5, 0.5, 0.5], [0.9, 0.9, 0.9]])
+        displacement = abq.get_data_from_path(odb_file_name, path_points, 'U', 'U1', output_position='NODAL',
+                                              engine='numpy')
+        np.testing.assert_allclose(displacement, [1e-3*path_points[:, 0]])
+        temperature = abq.get_data_from_path(odb_file_name, path_points, 'TEMP', output_position='NODAL',
+                                             frame_numbers='ALL', engine='numpy')
+        self.assertEqual(temperature.shape, (3, 3))
+        np.testing.assert_allclose(temperature[0], 20.)
+        displacements = abq.get_tensor_from_path(odb_file_name, path_points, 'U', components=('1', '2', 'U3'),
+                                                 frame_numbers=[1, 2], output_position='NODAL', engine='numpy')
+        self.assertEqual(displacements.shape, (2, 3, 3))
+        np.testing.assert_allclose(displacements[1], 1e-3*path_points)
+
+    def test_operator_cache(self):
+        from abaqus_python_interface.operator_cache import OperatorCache, operator_key
+        from abaqus_python_interface.path_engine import InterpolationOperator
+        operators = [InterpolationOperator(np.arange(10000), np.arange(10000), np.ones(10000), (10000, 10000))
+                     for _ in range(3)]
+        keys = [operator_key('mesh', np.arange(3) + i, 'NODAL') for i in range(3)]
+        cache = OperatorCache(self.work_directory, max_bytes=2.5*operators[0].nbytes)
+        for key, operator in zip(keys, operators):
+            cache.put(key, operator)
+        self.assertEqual(list(cache.operators), keys[1:])
+        self.assertEqual(len(list(self.work_directory.glob('*.npz'))), 2)
+        self.assertIsNone(cache.get(keys[0]))
+        cached_operator = OperatorCache(self.work_directory).get(keys[2])
+        np.testing.assert_array_equal(cached_operator.weights, operators[2].weights)
+        self.assertEqual(cached_operator.shape, (10000, 10000))
+
+    def test_operator_reuse(self):
+        from unittest import mock
+        cache_directory = self.work_directory / 'cache'
+        path_points = np.array([[0.1, 0.2, 0.3], [0.5, 0.5, 0.5]])
+        for name in ['model_1.odb', 'model_2.odb']:
+            odb_file_name = self.create_odb(name, elements=(2, 2, 2), fields=('U',))
+            abq = self.interface(cache_directory=cache_directory)
+            displacement = abq.get_data_from_path(odb_file_name, path_points, 'U', 'U2',
+                                                  output_position='NODAL', engine='numpy')
+            np.testing.assert_allclose(displacement, [1e-3*path_points[:, 1]])
+            # The odb files have the same mesh and share the operator
+            self.assertEqual(len(list((cache_directory / 'operators').glob('*.npz'))), 1)
+
+        # A repeated query finds the operator without loading the mesh
+        abq = self.interface(cache_directory=cache_directory)
+        with mock.patch.object(abq, 'get_odb_geometry') as get_odb_geometry, \
+                mock.patch.object(abq, '_run_script', wraps=abq._run_script) as run_script:
+            displacement = abq.get_data_from_path(odb_file_name, path_points, 'U', 'U2', output_position='NODAL',
+                                                  engine='numpy')
+        np.testing.assert_allclose(displacement, [1e-3*path_points[:, 1]])
+        get_odb_geometry.assert_not_called()
+        self.assertEqual([call[0][0] for call in run_script.call_args_list], ['read_many_from_odb.py'])
+
+
+class TestTimeSeries(OdbTestCase):
+    def test_history_output(self):
+        odb_file_name = self.create_odb(elements=(2, 2, 2), steps=(('loading', 3), ('unloading', 2)), fields=())
+        from synthetic_odb import internal_energy
+        abq = self.interface()
+        history = abq.read_history_output(odb_file_name)
+        self.assertEqual(sorted(history), ['Assembly ASSEMBLY', 'Node PART-1.27'])
+        energy = history['Assembly ASSEMBLY']['ALLIE']
+        self.assertEqual(energy.shape, (5,))
+        self.assertEqual(energy['step'].tolist(), ['loading']*3 + ['unloading']*2)
+        np.testing.assert_allclose(energy['total_time'], [0., 0.5, 1., 1., 2.])
+        np.testing.assert_allclose(energy['value'], internal_energy(energy['step_time']))
+
+        history = abq.read_history_output(odb_file_name, output_names=['U3'], step_names=['unloading'])
+        np.testing.assert_allclose(history['Node PART-1.27']['U3']['value'], [0., 1e-3])
+
+    def test_field_time_series(self):
+        odb_file_name = self.create_odb(elements=(2, 2, 2), fields=('S', 'TEMP'))
+        from synthetic_odb import temperature
+        abq = self.interface()
+        time_series = abq.read_field_time_series(odb_file_name, ['S', 'TEMP'], labels=[2, 5], position='NODAL')
+        temperatures = time_series['TEMP']
+        self.assertEqual(temperatures.shape, (3,))
+        np.testing.assert_allclose(temperatures['frame_value'], [0., 0.5, 1.])
+        np.testing.assert_array_equal(temperatures['labels'][0], [2, 5])
+        np.testing.assert_allclose(temperatures['data'], temperature(np.array([2, 5]),
+                                                                     temperatures['frame_value'][:, None]))
+
+        stresses = abq.read_field_time_series(odb_file_name, 'S', frame_numbers=[-1], labels=[3],
+                                              invariant='MISES')['S']
+        self.assertEqual(stresses['data'].shape, (1, 8))
+        np.testing.assert_array_equal(stresses['labels'][0], [3]*8)
+
+
+class TestStats(OdbTestCase):
+    def test_call_stats(self):
+        odb_file_name = self.create_odb(elements=(2, 2, 2), fields=('S',))
+        records = []
+        abq = self.interface(stats_callback=records.append)
+        abq.read_data_from_odb('S', odb_file_name)
+        self.assertEqual([record.script for record in records],
+                         ['odb_summary.py', 'odb_frame_info.py', 'read_data_from_odb.py'])
+        read_stats = records[-1]
+        self.assertFalse(read_stats.session)
+        self.assertTrue({'open', 'subset', 'extract', 'serialize'} <= set(read_stats.phases))
+        self.assertLessEqual(read_stats.script_time, read_stats.wall_time)
+        self.assertGreater(read_stats.payload_bytes, 64*6*8)
+        self.assertEqual(abq.stats.totals()['read_data_from_odb.py']['calls'], 1)
+
+        with abq.session():
+            abq.read_data_from_odb('S', odb_file_name, invariant='MISES')
+        self.assertTrue(records[-1].session)
+        self.assertIn('extract', records[-1].phases)
+
+    def test_profile(self):
+        import pstats
+        profile_directory = self.work_directory / 'profiles'
+        odb_file_name = self.create_odb(elements=(2, 2, 2), fields=('S',))
+        abq = self.interface(profile_directory=profile_directory)
+        data = abq.read_data_from_odb('S', odb_file_name)
+        self.assertEqual(data.shape, (64, 6))
+        profile_file = abq.stats.records[-1].profile_file
+        self.assertEqual(pathlib.Path(profile_file).parent, profile_directory)
+        self.assertTrue(pathlib.Path(profile_file).name.startswith('read_data_from_odb_'))
+        self.assertGreater(pstats.Stats(profile_file).total_calls, 0)
+
+        with abq.session():
+            abq.read_data_from_odb('S', odb_file_name, invariant='MISES')
+        self.assertGreater(pstats.Stats(abq.stats.records[-1].profile_file).total_calls, 0)
+
+
+class TestInProcess(OdbTestCase):
+    def test_in_process_backend(self):
+        from abaqus_python_interface.abaqus_interface import ABQInterface
+        odb_file_name = self.create_odb(elements=(2, 2, 2), fields=('S', 'TEMP'))
+        from synthetic_odb import stress, structured_mesh
+        # No abaqus is launched, the command does not exist
+        abq = ABQInterface('non_existing_abaqus_command', output=False, cache_directory=False, backend='auto')
+        self.assertEqual(abq.backend, 'in_process')
+        data, element_labels = abq.read_data_from_odb('S', odb_file_name, get_position_numbers=True)[::2]
+        np.testing.assert_allclose(data, stress(element_labels, np.tile(np.arange(1, 9), 8), 1.))
+        self.assertIn('read_many_from_odb.read_many', [record.script for record in abq.stats.records])
+
+        abq.write_data_to_odb(data[:, 0], 'S11', odb_file_name, 'S11_step')
+        np.testing.assert_allclose(abq.read_data_from_odb('S11', odb_file_name, step_name='S11_step'),
+                                   data[:, 0])
+        abq.add_sets(odb_file_name, element_sets={'PART-1': {'FIRST': [1, 2]}})
+        mesh = abq.get_mesh(odb_file_name, element_set='FIRST', instance_name='PART-1')
+        _, _, _, connectivity = structured_mesh((2, 2, 2))
+        np.testing.assert_array_equal(mesh.elements['C3D8'].connectivity, connectivity[:2])
+        self.assertEqual(len(abq.read_history_output(odb_file_name)), 2)
+
+    def test_write_errors_match_subprocess(self):
+        from abaqus_python_interface import OdbWritingError
+        from abaqus_python_interface.abaqus_interface import ABQInterface
+        odb_file_name = self.create_odb(elements=(2, 2, 2), fields=('TEMP',))
+        errors = []
+        for abq in [ABQInterface('non_existing_abaqus_command', output=False, cache_directory=False,
+                                 backend='in_process'), self.interface()]:
+            with self.assertRaises(OdbWritingError) as error:
+                abq.write_data_to_odb(np.ones(8), 'SDV1', odb_file_name, 'loading', position='NODAL',
+                                      labels=[1, 2, 3])
+            errors.append(str(error.exception))
+        self.assertEqual(errors[0], errors[1])
+        self.assertIn('does not match the 3 labels', errors[0])
+
+
+class TestTransport(OdbTestCase):
+    def test_round_trip(self):
+        import importlib.util
+        from abaqus_python_interface import transport
+        spec = importlib.util.spec_from_file_location('abaqus_side_transport', pathlib.Path(__file__).parents[1]
+                                                      / 'abaqus_python_scripts' / 'transport.py')
+        abaqus_side_transport = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(abaqus_side_transport)
+        pickle_file_name = self.work_directory / 'parameters.pkl'
+        field_data = np.arange(12.).reshape(4, 3)
+        transport.dump({'field_data': field_data, 'labels': [1, 2, 3]}, pickle_file_name)
+        parameters = abaqus_side_transport.load(str(pickle_file_name))
+        np.testing.assert_array_equal(parameters['field_data'], field_data)
+        self.assertEqual(parameters['labels'], [1, 2, 3])
+
+        results_file_name = self.work_directory / 'results.pkl'
+        results = [{'data': np.ones((2000, 6)), 'frame_value': 1., 'element_labels': np.arange(3)}]
+        abaqus_side_transport.dump(results, str(results_file_name))
+        loaded_results = transport.load(results_file_name, memory_map=True)
+        self.assertIsInstance(loaded_results[0]['data'], np.memmap)
+        np.testing.assert_array_equal(loaded_results[0]['data'], results[0]['data'])
+        np.testing.assert_array_equal(loaded_results[0]['element_labels'], np.arange(3))
+        loaded_results[0]['data'][0, 0] = 2.
+        self.assertEqual(transport.load(results_file_name)[0]['data'][0, 0], 1.)
+
+
+class TestMetadataCache(OdbTestCase):
+    def test_persistent_cache(self):
+        from abaqus_python_interface.abaqus_interface import ABQInterface
+        cache_directory = self.work_directory / 'cache'
+        odb_file_name = self.create_odb(elements=(1, 1, 1))
+        abq = self.interface(cache_directory=cache_directory)
+        odb_dict = abq.get_odb_as_dict(odb_file_name)
+        abq.write_data_to_odb(np.ones(8), 'SDV1', odb_file_name, 'loading', frame_number=1)
+        abq.add_element_set(odb_file_name, 'FIRST', [1], instance_name='PART-1')
+
+        # The cache is read by a new interface with a command that cannot launch abaqus
+        cached_odb_dict = ABQInterface('false', cache_directory=cache_directory).get_odb_as_dict(odb_file_name)
+        self.assertEqual(list(odb_dict["steps"]), list(cached_odb_dict["steps"]))
+        self.assertIn('SDV1', cached_odb_dict["steps"]["loading"][1]["fieldOutputs"])
+        self.assertIn('FIRST', cached_odb_dict["rootAssembly"]["instances"]["PART-1"]["elementSets"])
+        self.assertEqual(cached_odb_dict, self.interface().get_odb_as_dict(odb_file_name))
+
+    def test_stale_entry_is_not_patched(self):
+        from odbAccess import openOdb
+        odb_file_name = self.create_odb(elements=(1, 1, 1))
+        abq = self.interface(cache_directory=self.work_directory / 'cache')
+        with abq.write_transaction(odb_file_name) as transaction:
+            transaction.create_step('cooling')
+            # The odb is changed by someone else after the summary was cached and before the commit
+            odb = openOdb(str(odb_file_name))
+            odb.Step('external')
+            odb.save()
+            odb.close()
+        self.assertEqual(list(abq.get_odb_summary(odb_file_name)["steps"]), ['loading', 'external', 'cooling'])
+
+    def test_tiered_metadata(self):
+        from abaqus_python_interface.abaqus_interface import ABQInterface
+        cache_directory = self.work_directory / 'cache'
+        odb_file_name = self.create_odb(elements=(1, 1, 1))
+        abq = self.interface(cache_directory=cache_directory)
+        summary = abq.get_odb_summary(odb_file_name)
+        self.assertEqual(summary["steps"]["loading"]["frame_count"], 3)
+        self.assertEqual(abq.get_frames(odb_file_name, 'loading'), [0, 1, 2])
+        fields = abq.get_frame_fields(odb_file_name)
+        self.assertEqual(fields['S']["component_labels"], ['S11', 'S22', 'S33', 'S12', 'S13', 'S23'])
+        self.assertIn('INTEGRATION_POINT', fields['S']["positions"])
+        abq.write_data_to_odb(np.ones(8), 'SDV1', odb_file_name, 'loading', frame_value=2.)
+        abq.add_element_set(odb_file_name, 'FIRST', [1], instance_name='PART-1')
+
+        cached_abq = ABQInterface('false', cache_directory=cache_directory)
+        cached_summary = cached_abq.get_odb_summary(odb_file_name)
+        self.assertEqual(cached_summary["steps"]["loading"]["frame_values"][-1], 2.)
+        self.assertIn('FIRST', cached_summary["rootAssembly"]["instances"]["PART-1"]["elementSets"])
+        self.assertEqual(cached_abq.validate_field(odb_file_name, None, -1, 'SDV1'), ('loading', 3))
+        self.assertEqual(cached_abq.get_frame_fields(odb_file_name, 'loading', 3)['SDV1']["type"], 'SCALAR')
+        fresh_abq = self.interface()
+        self.assertEqual(cached_summary, fresh_abq.get_odb_summary(odb_file_name))
+        self.assertEqual(cached_abq.get_frame_fields(odb_file_name, 'loading', 2).keys(),
+                         fresh_abq.get_frame_fields(odb_file_name, 'loading', 1).keys())